@@ -23,6 +23,8 @@ class KatelloAPI(object):
     @ivar server: L{Server} instance
     """
 
+    PAGE_SIZE = 500
+
     def __init__(self):
         pass
 
@@ -30,3 +32,63 @@ class KatelloAPI(object):
     @property
     def server(self):
         return server.active_server
+
+    def _get_paged(self, path, queries=None, collection=None, page_size=None):
+        """
+        Generator of records of a list resource that fetches them page
+        by page, so that the whole collection is never held in memory.
+
+        The request asks for pages with the 'paged', 'offset' and 'page_size'
+        query parameters. A paged response is a dict with the records under
+        the collection key and the number of matching records in 'subtotal'.
+        Plain list responses are accepted too, for resources that don't
+        support paging. A list longer than the page size means the resource
+        ignored paging and returned everything, so no other page is requested.
+
+        @type path: str
+        @param path: path of the list resource
+        @type queries: dict
+        @param queries: other query parameters
+        @type collection: str
+        @param collection: key of the records in a paged response
+        @type page_size: int
+        @param page_size: number of records fetched in one request
+        @rtype: generator of dicts
+        @raise ValueError: when a paged response doesn't contain the collection
+        """
+        page_size = page_size or self.PAGE_SIZE
+        offset = 0
+        first_record = None
+        while True:
+            page_queries = dict(queries or {})
+            page_queries.update({'paged': 'true', 'offset': offset, 'page_size': page_size})
+            page = self.server.GET(path, page_queries)[1]
+
+            if isinstance(page, dict):
+                if collection not in page:
+                    raise ValueError(_("Unexpected response from %(path)s: no '%(collection)s' in the paged listing")
+                        % {'path': path, 'collection': collection})
+                records = page[collection]
+                total = page.get('subtotal', page.get('total'))
+            else:
+                records = page
+                total = None
+                # the resource ignores paging and has returned the same records again
+                if offset > 0 and records and records[0] == first_record:
+                    return
+
+            if not records:
+                return
+            if total is None and len(records) > page_size:
+                # the resource ignores paging and has returned the whole collection
+                for record in records:
+                    yield record
+                return
+            if offset == 0:
+                first_record = records[0]
+            for record in records:
+                yield record
+
+            offset += len(records)
+            if len(records) < page_size or (total is not None and offset >= total):
+                return
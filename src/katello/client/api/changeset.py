@@ -15,7 +15,7 @@
 
 from katello.client.api.base import KatelloAPI
 from katello.client.lib.utils.encoding import u_str
-from katello.client.lib.utils.data import update_dict_unless_none
+from katello.client.lib.utils.data import update_dict_unless_none, has_fields
 
 class ChangesetAPI(KatelloAPI):
 
@@ -29,10 +29,13 @@ class ChangesetAPI(KatelloAPI):
         cset = self.server.GET(path)[1]
         return cset
 
-    def changeset_by_name(self, orgName, envId, csName):
+    def changeset_by_name(self, orgName, envId, csName, fields=None):
         path = "/api/organizations/%s/environments/%s/changesets/" % (orgName, envId)
         csets = self.server.GET(path, {"name": csName})[1]
         if len(csets) > 0:
+            # the listing is enough when it contains all the fields needed
+            if has_fields(csets[0], fields):
+                return csets[0]
             return self.changeset(csets[0]["id"])
         else:
             return None
@@ -92,6 +92,14 @@ class DistributorAPI(KatelloAPI):
         path = "/api/organizations/%s/distributors" % orgId
         return self.server.GET(path, query)[1]
 
+    def iter_distributors_by_org(self, orgId, query = None):
+        path = "/api/organizations/%s/distributors" % orgId
+        return self._get_paged(path, query, 'distributors')
+
     def distributors_by_env(self, environment_id, query = None):
         path = "/api/environments/%s/distributors" % environment_id
         return self.server.GET(path, query)[1]
+
+    def iter_distributors_by_env(self, environment_id, query = None):
+        path = "/api/environments/%s/distributors" % environment_id
+        return self._get_paged(path, query, 'distributors')
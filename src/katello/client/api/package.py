@@ -29,6 +29,10 @@ class PackageAPI(KatelloAPI):
         pack_list = self.server.GET(path)[1]
         return pack_list
 
+    def iter_packages_by_repo(self, repoId):
+        path = "/api/repositories/%s/packages" % repoId
+        return self._get_paged(path, collection='packages')
+
     def search(self, query, repoId):
         path = "/api/repositories/%s/packages/search" % repoId
         pack_list = self.server.GET(path, {"search": query})[1]
@@ -91,12 +91,12 @@ class ProviderAPI(KatelloAPI):
         return data
 
 
-    def import_manifest(self, provId, manifestFile, force=False):
+    def import_manifest(self, provId, manifestFile, force=False, progress=None):
         path = "/api/providers/%s/import_manifest" % u_str(provId)
         params = {"import": manifestFile}
         if force:
             params["force"] = "true"
-        result = self.server.POST(path, params, multipart=True)[1]
+        result = self.server.POST(path, params, multipart=True, progress=progress)[1]
         return result
 
 
@@ -155,22 +155,30 @@ class SystemAPI(KatelloAPI):
         path = "/api/organizations/%s/systems" % orgId
         return self.server.GET(path, query)[1]
 
+    def iter_systems_by_org(self, orgId, query = None):
+        path = "/api/organizations/%s/systems" % orgId
+        return self._get_paged(path, query, 'systems')
+
     def systems_by_env(self, environment_id, query = None):
         path = "/api/environments/%s/systems" % environment_id
         return self.server.GET(path, query)[1]
 
+    def iter_systems_by_env(self, environment_id, query = None):
+        path = "/api/environments/%s/systems" % environment_id
+        return self._get_paged(path, query, 'systems')
+
     def errata(self, system_id):
         path = "/api/systems/%s/errata" % system_id
         return self.server.GET(path)[1]
 
-    def report_by_org(self, orgId, format_in):
+    def report_by_org(self, orgId, format_in, output=None, progress=None):
         path = "/api/organizations/%s/systems/report" % orgId
-        to_return = self.server.GET(path, custom_headers={"Accept": format_in})
+        to_return = self.server.GET(path, custom_headers={"Accept": format_in}, output=output, progress=progress)
         return (to_return[1], to_return[2])
 
-    def report_by_env(self, env_id, format_in):
+    def report_by_env(self, env_id, format_in, output=None, progress=None):
         path = "/api/environments/%s/systems/report" % env_id
-        to_return = self.server.GET(path, custom_headers={"Accept": format_in})
+        to_return = self.server.GET(path, custom_headers={"Accept": format_in}, output=output, progress=progress)
         return (to_return[1], to_return[2])
 
     def add_system_groups(self, system_id, system_group_ids):
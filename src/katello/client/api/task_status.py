@@ -13,11 +13,78 @@
 # granted to use or replicate Red Hat trademarks that are incorporated
 # in this software or its documentation.
 
+import httplib
+import os
+import time
+
+try:
+    import json
+except ImportError:
+    import simplejson as json
+
 from katello.client.api.base import KatelloAPI
+from katello.client.lib.utils.io import write_private_file
+from katello.client.logutil import getLogger
 from katello.client.server import ServerRequestError
 
 
+_log = getLogger(__name__)
+
+
 class TaskStatusAPI(KatelloAPI):
+
+    # set to False when disabled in the configuration or once the server
+    # refuses the batch status request
+    batch_supported = True
+
+    # file remembering servers that refused the batch status request for
+    # UNSUPPORTED_FOR seconds, they are forgotten with the process when not set
+    unsupported_servers_path = None
+    UNSUPPORTED_FOR = 86400
+
+    # statuses of a server that doesn't know the batch status request
+    UNSUPPORTED_STATUSES = (httplib.BAD_REQUEST, httplib.NOT_FOUND, httplib.METHOD_NOT_ALLOWED,
+        httplib.NOT_IMPLEMENTED)
+
+    def __server_name(self):
+        return '%s://%s:%s' % (self.server.protocol, self.server.host, self.server.port)
+
+    @classmethod
+    def __unsupported_servers(cls):
+        if not cls.unsupported_servers_path or not os.path.exists(cls.unsupported_servers_path):
+            return {}
+        try:
+            servers = json.load(open(cls.unsupported_servers_path))
+        except (IOError, ValueError), e:
+            _log.warning("can't read servers without batch task status: %s" % e)
+            return {}
+        if not isinstance(servers, dict):
+            return {}
+        now = time.time()
+        return dict((name, expires) for name, expires in servers.items()
+            if isinstance(expires, (int, float)) and expires > now)
+
+    def is_batch_supported(self):
+        """
+        Servers that refused the batch status request are remembered in
+        unsupported_servers_path, so that later invocations don't try it again
+        @rtype: bool
+        """
+        if TaskStatusAPI.batch_supported and self.__server_name() in self.__unsupported_servers():
+            TaskStatusAPI.batch_supported = False
+        return TaskStatusAPI.batch_supported
+
+    def set_batch_unsupported(self):
+        TaskStatusAPI.batch_supported = False
+        if not self.unsupported_servers_path:
+            return
+        servers = self.__unsupported_servers()
+        servers[self.__server_name()] = time.time() + self.UNSUPPORTED_FOR
+        try:
+            write_private_file(self.unsupported_servers_path, json.dumps(servers))
+        except (IOError, OSError), e:
+            _log.warning("can't save servers without batch task status: %s" % e)
+
     def status(self, taskUuid):
         path = "/api/tasks/%s" % str(taskUuid)
         try:
@@ -26,6 +93,37 @@ class TaskStatusAPI(KatelloAPI):
             task = None
         return task
 
+    def statuses(self, taskUuids):
+        """
+        Fetch statuses of several tasks in one request
+        @type taskUuids: list of str
+        @rtype: dict
+        @return: task statuses by uuid or None when the server doesn't
+        support batch status requests or any of the tasks was not found
+        """
+        if not self.is_batch_supported():
+            return None
+        path = "/api/tasks/"
+        try:
+            tasks = self.server.GET(path, {'uuids': ','.join([str(u) for u in taskUuids])})[1]
+        except ServerRequestError, e:
+            if e.args[0] in self.UNSUPPORTED_STATUSES:
+                self.set_batch_unsupported()
+            return None
+        if not isinstance(tasks, list) or [t for t in tasks if not isinstance(t, dict) or 'uuid' not in t]:
+            self.set_batch_unsupported()
+            return None
+        found = dict((t['uuid'], t) for t in tasks)
+        requested = set([str(u) for u in taskUuids])
+        if not set(found.keys()) <= requested:
+            # the server has ignored the filter and listed other tasks
+            self.set_batch_unsupported()
+            return None
+        if set(found.keys()) != requested:
+            # the missing tasks are looked up one by one, the server supports the request
+            return None
+        return found
+
 
 class SystemTaskStatusAPI(KatelloAPI):
     def status(self, taskUuid):
@@ -92,6 +92,7 @@ class UserAPI(KatelloAPI):
         path = "/api/users/%s/roles/" % u_str(user_id)
         return self.server.GET(path)[1]
 
-    def report(self, format_in):
-        to_return = self.server.GET("/api/users/report", custom_headers={"Accept": format_in})
+    def report(self, format_in, output=None, progress=None):
+        to_return = self.server.GET("/api/users/report", custom_headers={"Accept": format_in}, output=output,
+            progress=progress)
         return (to_return[1], to_return[2])
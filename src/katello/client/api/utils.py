@@ -19,9 +19,14 @@ Bunch of api utilities for finding records by their names.
 Katello API uses integer ids for record identification in most
 cases. These util functions help with translating names to ids.
 All of them throw ApiDataError if any of the records is not found.
+
+Organizations, environments, products, content views, providers,
+system groups and user roles found by these functions are kept in
+the active lookup cache, when one is set.
 """
 
 
+from katello.client import server
 from katello.client.api.organization import OrganizationAPI
 from katello.client.api.environment import EnvironmentAPI
 from katello.client.api.product import ProductAPI
@@ -38,6 +43,8 @@ from katello.client.api.distributor import DistributorAPI
 from katello.client.api.content_view import ContentViewAPI
 from katello.client.api.content_view_definition import ContentViewDefinitionAPI
 from katello.client.api.filter import FilterAPI
+from katello.client.lib.executor import wait_all
+from katello.client.lib.utils.data import has_fields
 
 
 class ApiDataError(Exception):
@@ -50,10 +57,43 @@ class ApiDataError(Exception):
     pass
 
 
+# current lookup cache --------------------------------------------------------
+
+lookup_cache = None
+
+
+def set_lookup_cache(cache):
+    """
+    @type cache: LookupCache
+    @param cache: cache used by the lookups or None to disable caching
+    """
+    global lookup_cache
+    lookup_cache = cache
+
+
+def _lookup(entity, key, find):
+    if lookup_cache is None:
+        return find()
+    return lookup_cache.lookup(entity, key, find)
+
+
+def find_concurrently(*calls):
+    """
+    Run independent lookups at the same time
+    @type calls: tuples (function, arg1, arg2, ...)
+    @return: list of the lookup results in the order of calls
+    @raise ApiDataError: when any of the records is not found
+    """
+    if server.active_server is None:
+        return [call[0](*call[1:]) for call in calls]
+    executor = server.active_server.executor
+    return wait_all([executor.submit(*call) for call in calls])
+
+
 def get_organization(orgName):
     organization_api = OrganizationAPI()
 
-    org = organization_api.organization(orgName)
+    org = _lookup('organization', (orgName,), lambda: organization_api.organization(orgName))
     if org == None:
         raise ApiDataError(_("Could not find organization [ %s ]") % orgName)
 
@@ -64,10 +104,11 @@ def get_environment(orgName, envName=None):
     environment_api = EnvironmentAPI()
 
     if envName == None:
-        env = environment_api.library_by_org(orgName)
+        env = _lookup('environment', (orgName, None), lambda: environment_api.library_by_org(orgName))
         envName = env['name']
     else:
-        env = environment_api.environment_by_name(orgName, envName)
+        env = _lookup('environment', (orgName, envName),
+            lambda: environment_api.environment_by_name(orgName, envName))
 
     if env == None:
         raise ApiDataError(_("Could not find environment [ %(envName)s ] within organization [ %(orgName)s ]") %
@@ -85,7 +126,8 @@ def get_product(orgName, prodName=None, prodLabel=None, prodId=None):
     """
     product_api = ProductAPI()
 
-    products = product_api.product_by_name_or_label_or_id(orgName, prodName, prodLabel, prodId)
+    products = _lookup('product', (orgName, prodName, prodLabel, prodId),
+        lambda: product_api.product_by_name_or_label_or_id(orgName, prodName, prodLabel, prodId))
 
     if len(products) > 1:
         raise ApiDataError(_("More than 1 product found with the name or label provided, "\
@@ -101,8 +143,8 @@ def get_product(orgName, prodName=None, prodLabel=None, prodId=None):
 def get_content_view(org_name, view_label=None, view_name=None, view_id=None):
     cv_api = ContentViewAPI()
 
-    views = cv_api.views_by_label_name_or_id(org_name, view_label,
-            view_name, view_id)
+    views = _lookup('content_view', (org_name, view_label, view_name, view_id),
+        lambda: cv_api.views_by_label_name_or_id(org_name, view_label, view_name, view_id))
 
     if len(views) > 1:
         raise ApiDataError(_("More than 1 content view with name provided, " \
@@ -151,20 +193,33 @@ def get_filter(org_name, def_id, filter_name=None, filter_id=None):
 
 
 def get_repo(orgName, repoName, prodName=None, prodLabel=None, prodId=None, envName=None, includeDisabled=False,
-             viewName=None, viewLabel=None, viewId=None):
+             viewName=None, viewLabel=None, viewId=None, fields=None):
+    """
+    Retrieve repository by its name, product and environment.
+    The environment, product and content view are looked up concurrently.
+
+    @type fields: list of str
+    @param fields: keys the caller needs; when the repository listing
+    already contains all of them, the details of the repository are not fetched
+    """
     repo_api = RepoAPI()
 
-    env  = get_environment(orgName, envName)
-    prod = get_product(orgName, prodName, prodLabel, prodId)
+    calls = [(get_environment, orgName, envName), (get_product, orgName, prodName, prodLabel, prodId)]
+    if viewName or viewLabel or viewId:
+        calls.append((get_content_view, orgName, viewLabel, viewName, viewId))
+    found = find_concurrently(*calls)
+    env, prod = found[:2]
 
     view = None
     viewId = None
-    if viewName or viewLabel or viewId:
-        view = get_content_view(orgName, viewLabel, viewName, viewId)
+    if len(found) > 2:
+        view = found[2]
         viewId = view["id"]
 
     repos = repo_api.repos_by_env_product(env["id"], prod["id"], repoName, includeDisabled, viewId)
     if len(repos) > 0:
+        if has_fields(repos[0], fields):
+            return repos[0]
         #repo by id call provides more information
         return repo_api.repo(repos[0]["id"])
 
@@ -183,18 +238,25 @@ def get_repo(orgName, repoName, prodName=None, prodLabel=None, prodId=None, envN
 def get_provider(orgName, provName):
     provider_api = ProviderAPI()
 
-    prov = provider_api.provider_by_name(orgName, provName)
+    prov = _lookup('provider', (orgName, provName), lambda: provider_api.provider_by_name(orgName, provName))
     if prov == None:
         raise ApiDataError(_("Could not find provider [ %(provName)s ] within organization [ %(orgName)s ]") %
             {'provName':provName, 'orgName':orgName})
     return prov
 
 
-def get_changeset(orgName, envName, csName):
+def get_changeset(orgName, envName, csName, fields=None):
+    """
+    Retrieve changeset by its name and environment.
+
+    @type fields: list of str
+    @param fields: keys the caller needs; when the changeset listing
+    already contains all of them, the details of the changeset are not fetched
+    """
     changeset_api = ChangesetAPI()
 
     env = get_environment(orgName, envName)
-    cset = changeset_api.changeset_by_name(orgName, env["id"], csName)
+    cset = changeset_api.changeset_by_name(orgName, env["id"], csName, fields)
     if cset == None:
         raise ApiDataError(_("Could not find changeset [ %(csName)s ] within environment [ %(env_name)s ]") %
             {'csName':csName, 'env_name':env["name"]})
@@ -209,7 +271,7 @@ def get_user(userName):
 
 def get_role(name):
     user_role_api = UserRoleAPI()
-    role = user_role_api.role_by_name(name)
+    role = _lookup('user_role', (name,), lambda: user_role_api.role_by_name(name))
     if role == None:
         raise ApiDataError(_("Cannot find user role [ %s ]") % (name))
     return role
@@ -235,7 +297,8 @@ def get_permission(role_name, permission_name):
 def get_system_group(org_name, system_group_name):
     system_group_api = SystemGroupAPI()
 
-    system_group = system_group_api.system_group_by_name(org_name, system_group_name)
+    system_group = _lookup('system_group', (org_name, system_group_name),
+        lambda: system_group_api.system_group_by_name(org_name, system_group_name))
     if system_group == None:
         raise ApiDataError(_("Could not find system group [ %(system_group_name)s ] " \
             "within organization [ %(org_name)s ]") \
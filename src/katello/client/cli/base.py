@@ -21,12 +21,20 @@ from traceback import format_exc
 from optparse import OptionGroup, SUPPRESS_HELP
 from katello.client.i18n_optparse import OptionParserExitError
 from katello.client.lib.utils.encoding import u_str
+from katello.client.lib.utils.io import read_private_secret
 from katello.client.core.base import Command
 from katello.client.config import Config
 from katello.client.logutil import getLogger, logfile
 from katello.client import server
+from katello.client.api import utils
+from katello.client.api.task_status import TaskStatusAPI
+from katello.client.lib.lookup_cache import LookupCache
+from katello.client.lib import task_journal
+from katello.client.lib.task_journal import TaskJournal
+from katello.client.lib.ui import progress
 
-from katello.client.server import BasicAuthentication, SSLAuthentication, NoAuthentication
+from katello.client.server import BasicAuthentication, SSLAuthentication, NoAuthentication, CookieJar, \
+    HttpCache
 
 
 _log = getLogger(__name__)
@@ -114,6 +122,7 @@ class KatelloCLI(Command):
         self._password = None
         self._certfile = None
         self._keyfile = None
+        self.__credentials_secret = None
 
     def setup_parser(self, parser):
         """
@@ -124,6 +133,9 @@ class KatelloCLI(Command):
                                 dest="version",  help=_('prints version information'))
         parser.add_option("-d", "--debug", action="store_true", default=False,
                                 dest="debug",  help=_('send debug information into logs'))
+        parser.add_option("--async", action="store_true", default=False,
+                                dest="async",  help=_("don't wait for long running tasks, print options "
+                                    "of 'task wait' that select them and exit"))
 
         credentials = OptionGroup(parser, _('Katello User Account Credentials'))
         credentials.add_option('-u', '--username', dest='username',
@@ -162,9 +174,103 @@ class KatelloCLI(Command):
         scheme = self.opts.scheme
         path = self.opts.path
 
-        self._server = server.KatelloServer(host, int(port), scheme, path, self.__server_locale())
+        self.__credentials_secret = self.__read_credentials_secret()
+        if self._server is not None:
+            # the shell sets up a new server for every command
+            self._server.shutdown()
+        self._server = server.KatelloServer(host, int(port), scheme, path, self.__server_locale(),
+            self.__cookie_jar())
+        self._server.compress_requests = Config.parser.has_option('server', 'compress_requests') \
+            and Config.parser.get('server', 'compress_requests').lower() == 'true'
+        TaskStatusAPI.batch_supported = not Config.parser.has_option('server', 'batch_task_status') \
+            or Config.parser.get('server', 'batch_task_status').lower() == 'true'
+        TaskStatusAPI.unsupported_servers_path = os.path.join(Config.USER_DIR, 'batch_task_status')
+        self._server.cache = self.__http_cache()
         server.set_active_server(self._server)
 
+    def setup_lookup_cache(self):
+        """
+        Setup the cache of records found by their names.
+        The cache is shared with later invocations in ~/.katello/lookups
+        when enabled in the configuration.
+        """
+        Config()
+        if Config.parser.has_option('cache', 'lookups') \
+            and Config.parser.get('cache', 'lookups').lower() != 'true':
+            utils.set_lookup_cache(None)
+            return
+        path = None
+        if Config.parser.has_option('cache', 'persist_lookups') \
+            and Config.parser.get('cache', 'persist_lookups').lower() == 'true':
+            path = os.path.join(Config.USER_DIR, 'lookups')
+        # pylint: disable=W0212
+        namespace = ':'.join([str(k) for k in self._server._connection_key()])
+        cache = LookupCache(path, namespace)
+        self._server.change_listeners.append(cache.request_sent)
+        utils.set_lookup_cache(cache)
+
+    def setup_task_journal(self):
+        """
+        Setup the journal of started tasks in ~/.katello/tasks
+        """
+        target = []
+        for arg in self.args or []:
+            # don't store passwords given to the command
+            if target and target[-1].startswith('--') and 'password' in target[-1] and '=' not in target[-1]:
+                arg = '***'
+            elif arg.startswith('--') and 'password' in arg.split('=')[0] and '=' in arg:
+                arg = arg.split('=')[0] + '=***'
+            target.append(arg)
+        task_journal.set_active_journal(TaskJournal(os.path.join(Config.USER_DIR, 'tasks'), ' '.join(target)))
+
+    @classmethod
+    def __http_cache(cls):
+        """
+        Responses are cached in ~/.katello/cache when enabled in the configuration
+        """
+        Config()
+        if not Config.parser.has_option('cache', 'enabled') \
+            or Config.parser.get('cache', 'enabled').lower() != 'true':
+            return None
+        max_size = 50
+        if Config.parser.has_option('cache', 'max_size'):
+            max_size = Config.parser.getint('cache', 'max_size')
+        return HttpCache(os.path.join(Config.USER_DIR, 'cache'), max_size * 1048576)
+
+    @classmethod
+    def __read_credentials_secret(cls):
+        """
+        Read the random secret in ~/.katello/secret the connection keys of
+        basic authentication are made with. Sessions and caches saved before
+        the secret existed are keyed by plain hashes of the passwords, they
+        are removed when the secret is created.
+        """
+        Config()
+        try:
+            secret, created = read_private_secret(os.path.join(Config.USER_DIR, 'secret'))
+        except (IOError, OSError), e:
+            _log.warning("can't read the credentials secret, saved sessions won't be reused: %s" % e)
+            return None
+        if created:
+            for name in ('cookies', 'lookups'):
+                path = os.path.join(Config.USER_DIR, name)
+                if os.path.exists(path):
+                    os.remove(path)
+            HttpCache(os.path.join(Config.USER_DIR, 'cache')).clear()
+        return secret
+
+    @classmethod
+    def __cookie_jar(cls):
+        """
+        Session cookies are saved for later invocations when enabled
+        in the configuration
+        """
+        Config()
+        if Config.parser.has_option('server', 'persist_session') \
+            and Config.parser.get('server', 'persist_session').lower() == 'true':
+            return CookieJar(os.path.join(Config.USER_DIR, 'cookies'))
+        return CookieJar()
+
     @classmethod
     def __server_locale(cls):
         """
@@ -189,7 +295,8 @@ class KatelloCLI(Command):
         self._keyfile = self._keyfile or self.opts.keyfile
 
         if None not in (self._username, self._password):
-            self._server.set_auth_method(BasicAuthentication(self._username, self._password))
+            self._server.set_auth_method(BasicAuthentication(self._username, self._password,
+                self.__credentials_secret))
         elif None not in (self._certfile, self._keyfile):
             self._server.set_auth_method(SSLAuthentication(self._certfile, self._keyfile))
         else:
@@ -205,6 +312,9 @@ class KatelloCLI(Command):
     def run(self):
         self.setup_server()
         self.setup_credentials()
+        self.setup_lookup_cache()
+        self.setup_task_journal()
+        progress.set_detached(self.get_option('async'))
         if self.get_option('version'):
             self.args = ["version"]
         if self.get_option('debug'):
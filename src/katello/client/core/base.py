@@ -23,7 +23,8 @@ from urlparse import urlparse
 from katello.client.config import Config
 from katello.client.api.utils import ApiDataError
 from katello.client.lib.control import parse_tokens, SystemExitRequest
-from katello.client.lib.ui.printer import Printer, GrepStrategy, VerboseStrategy
+from katello.client.lib.ui.printer import Printer, GrepStrategy, VerboseStrategy, JsonStrategy, \
+    JsonLinesStrategy, CsvStrategy
 from katello.client.lib.utils.option_validator import OptionValidator
 from katello.client.lib.utils.encoding import u_str, u_obj
 from katello.client.logutil import getLogger
@@ -323,6 +324,13 @@ class BaseAction(Action):
     :ivar Printer: printer.Printer instance
     """
 
+    # strategies selectable with --output or output_format in the configuration
+    OUTPUT_STRATEGIES = {
+        'json': JsonStrategy,
+        'jsonl': JsonLinesStrategy,
+        'csv': CsvStrategy,
+    }
+
     def __init__(self):
         super(BaseAction, self).__init__()
         self.printer = None
@@ -342,6 +350,9 @@ class BaseAction(Action):
         parser.add_option('--noheading', dest='noheading',
                         action="store_true", default=False,
                         help=_("Suppress any heading output. Useful if grepping the output."))
+        parser.add_option('--output', dest='output_format',
+                        type="choice", choices=sorted(self.OUTPUT_STRATEGIES.keys()),
+                        help=_("machine readable output format: json, jsonl (one JSON object per line) or csv"))
         return parser
 
     def create_printer(self, strategy):
@@ -349,12 +360,17 @@ class BaseAction(Action):
 
     def __print_strategy(self):
         Config()
-        if (self.has_option('grep') or (Config.parser.has_option('interface', 'force_grep_friendly') \
+        if self.has_option('output_format'):
+            return self.OUTPUT_STRATEGIES[self.get_option('output_format')]()
+        elif (self.has_option('grep') or (Config.parser.has_option('interface', 'force_grep_friendly') \
             and Config.parser.get('interface', 'force_grep_friendly').lower() == 'true')):
             return GrepStrategy(delimiter=self.get_option('delimiter'))
         elif (self.has_option('verbose') or (Config.parser.has_option('interface', 'force_verbose') \
             and Config.parser.get('interface', 'force_verbose').lower() == 'true')):
             return VerboseStrategy()
+        elif Config.parser.has_option('interface', 'output_format') \
+            and Config.parser.get('interface', 'output_format').lower() in self.OUTPUT_STRATEGIES:
+            return self.OUTPUT_STRATEGIES[Config.parser.get('interface', 'output_format').lower()]()
         else:
             return None
 
@@ -400,25 +416,7 @@ class BaseAction(Action):
             sys.exit(1)
 
         except ServerRequestError, re:
-            try:
-                if "displayMessage" in re.args[1]:
-                    msg = re.args[1]["displayMessage"]
-                elif re.args[0] == 401:
-                    msg = _("Invalid credentials or unable to authenticate")
-                elif re.args[0] == 500:
-                    msg = _("Server is returning 500 - try later")
-                elif "errors" in re.args[1]:
-                    msg = ", ".join(re.args[1]["errors"])
-                elif "message" in re.args[1]:
-                    msg = re.args[1]["message"]
-                else:
-                    msg = str(re.args[1])
-            except IndexError:
-                msg = re.args[1]
-            except:  # pylint: disable=W0702
-                msg = _("Unknown error: ") + str(re)
-
-            self.error(msg)
+            self.error(server_error_message(re))
             return re.args[0]
 
         except SocketError, se:
@@ -454,6 +452,32 @@ class BaseAction(Action):
 
 
 
+def server_error_message(re):
+    """
+    Get a message describing the error the server responded with
+    @type re: ServerRequestError
+    @rtype: string
+    """
+    try:
+        if "displayMessage" in re.args[1]:
+            msg = re.args[1]["displayMessage"]
+        elif re.args[0] == 401:
+            msg = _("Invalid credentials or unable to authenticate")
+        elif re.args[0] == 500:
+            msg = _("Server is returning 500 - try later")
+        elif "errors" in re.args[1]:
+            msg = ", ".join(re.args[1]["errors"])
+        elif "message" in re.args[1]:
+            msg = re.args[1]["message"]
+        else:
+            msg = str(re.args[1])
+    except IndexError:
+        msg = re.args[1]
+    except:  # pylint: disable=W0702
+        msg = _("Unknown error: ") + str(re)
+    return msg
+
+
 # optparse type extenstions --------------------------------------------------
 
 
@@ -15,15 +15,16 @@
 #
 
 import os
+import sys
 from optparse import OptionValueError
 
 from katello.client import constants
 from katello.client.api.changeset import ChangesetAPI
 from katello.client.cli.base import opt_parser_add_org, opt_parser_add_environment
-from katello.client.core.base import BaseAction, Command
+from katello.client.core.base import BaseAction, Command, server_error_message
 
 from katello.client.api.utils import get_environment, get_changeset, get_repo, get_product, \
-    get_content_view
+    get_content_view, find_concurrently
 from katello.client.lib.async import AsyncTask, evaluate_task_status
 from katello.client.lib.ui.progress import run_spinner_in_bg, wait_for_async_task
 from katello.client.lib.utils.data import test_record
@@ -31,6 +32,7 @@ from katello.client.lib.ui.formatters import format_date
 from katello.client.lib.ui import printer
 from katello.client.lib.utils.encoding import u_str
 from katello.client.lib.ui.printer import batch_add_columns
+from katello.client.server import ServerRequestError
 
 # base changeset action ========================================================
 class ChangesetAction(BaseAction):
@@ -198,8 +200,47 @@ class UpdateContent(ChangesetAction):
             patch['distributions'] = [itemBuilder.distro(i) for i in items[action + "_distribution"]]
             return patch
 
+        @classmethod
+        def build_changes(cls, action, itemBuilder, items):
+            """
+            Build list of single content changes
+            @rtype: list of tuples (action, content type, item name, item attributes)
+            """
+            productItems = []
+            for ct in UpdateContent.productDependentContent + ['product', 'product_label', 'product_id']:
+                productItems += items[action + "_" + ct]
+            itemBuilder.resolve_products(productItems)
+            patch = cls.build_patch(action, itemBuilder, items)
+            names = {
+                'packages': items[action + "_package"],
+                'errata': items[action + "_erratum"],
+                'repositories': items[action + "_repo"],
+                'products': items[action + "_product"] + items[action + "_product_label"] +
+                    items[action + "_product_id"],
+                'content_views': items[action + "_content_view"] + items[action + "_content_view_label"] +
+                    items[action + "_content_view_id"],
+                'distributions': items[action + "_distribution"]
+            }
+            changes = []
+            for contentType in sorted(patch.keys()):
+                for options, attrs in zip(names[contentType], patch[contentType]):
+                    changes.append((action, contentType, cls.item_name(options), attrs))
+            return changes
+
+        @staticmethod
+        def item_name(options):
+            for key in ('name', 'product_label', 'product_id', 'view_name', 'view_label', 'view_id'):
+                if key in options:
+                    return options[key]
+            return None
+
     class PatchItemBuilder(object):
-        def __init__(self, org_name, env_name, type_in):
+        """
+        Builds attributes of changeset content items. Products, repositories
+        and content views are resolved only once, however many items refer
+        to them. Builders given the same resolved dict share the results.
+        """
+        def __init__(self, org_name, env_name, type_in, resolved=None):
             self.org_name = org_name
             self.env_name = env_name
             self.type = type_in
@@ -208,6 +249,11 @@ class UpdateContent(ChangesetAction):
                 self.env_name = get_environment(org_name, env_name)['name']
             else:
                 self.env_name = get_environment(org_name, env_name)['prior']
+            if resolved is None:
+                resolved = {}
+            self.__product_ids = resolved.setdefault('products', {})
+            self.__repo_ids = resolved.setdefault('repos', {})
+            self.__view_ids = resolved.setdefault('views', {})
 
         @classmethod
         def product_options(cls, options):
@@ -222,26 +268,48 @@ class UpdateContent(ChangesetAction):
 
             return product
 
-        def product_id(self, options):
+        def product_key(self, options):
             prod_opts = self.product_options(options)
 
             # if the product name/label/id are all none...
             if (all(opt is None for opt in prod_opts.itervalues())):
                 prod_opts['name'] = options['name']
 
-            prod = get_product(self.org_name, prod_opts['name'], prod_opts['label'], prod_opts['id'])
+            return (prod_opts['name'], prod_opts['label'], prod_opts['id'])
 
-            return prod['id']
+        def product_id(self, options):
+            key = self.product_key(options)
+            if key not in self.__product_ids:
+                prod = get_product(self.org_name, *key)
+                self.__product_ids[key] = prod['id']
+            return self.__product_ids[key]
+
+        def resolve_products(self, items):
+            """
+            Resolve the distinct products the items refer to, concurrently
+            @type items: list of dicts
+            @param items: options of the items
+            """
+            keys = list(set([self.product_key(i) for i in items]) - set(self.__product_ids.keys()))
+            products = find_concurrently(*[(get_product, self.org_name) + key for key in keys])
+            for key, prod in zip(keys, products):
+                self.__product_ids[key] = prod['id']
 
         def repo_id(self, options):
             prod_opts = self.product_options(options)
-            repo = get_repo(self.org_name, options['name'], prod_opts['name'],
-                prod_opts['label'], prod_opts['id'], self.env_name)
-            return repo['id']
+            key = (options['name'], prod_opts['name'], prod_opts['label'], prod_opts['id'])
+            if key not in self.__repo_ids:
+                repo = get_repo(self.org_name, options['name'], prod_opts['name'],
+                    prod_opts['label'], prod_opts['id'], self.env_name, fields=('id',))
+                self.__repo_ids[key] = repo['id']
+            return self.__repo_ids[key]
 
         def content_view_id(self, options):
-            view = get_content_view(self.org_name, **options)
-            return view['id']
+            key = tuple(sorted(options.items()))
+            if key not in self.__view_ids:
+                view = get_content_view(self.org_name, **options)
+                self.__view_ids[key] = view['id']
+            return self.__view_ids[key]
 
     class AddPatchItemBuilder(PatchItemBuilder):
         def package(self, options):
@@ -321,6 +389,38 @@ class UpdateContent(ChangesetAction):
 
     description = _('updates content of a changeset')
 
+    # maximal number of content changes sent in one request
+    PATCH_SIZE = 200
+
+    # attributes of additions that identify the item
+    CONTENT_ID_ATTRS = {
+        'packages': 'name',
+        'errata': 'erratum_id',
+        'repositories': 'repository_id',
+        'products': 'product_id',
+        'content_views': 'content_view_id',
+        'distributions': 'distribution_id'
+    }
+
+    # where the items are listed in a changeset and their fields an item id can match
+    CHANGESET_CONTENT = {
+        'packages': ('packages', ('name', 'display_name')),
+        'errata': ('errata', ('errata_id', 'display_name')),
+        'repositories': ('repos', ('id',)),
+        'products': ('products', ('id',)),
+        'content_views': ('content_views', ('id',)),
+        'distributions': ('distributions', ('distribution_id',))
+    }
+
+    CONTENT_NAMES = {
+        'packages': _('package'),
+        'errata': _('erratum'),
+        'repositories': _('repository'),
+        'products': _('product'),
+        'content_views': _('content view'),
+        'distributions': _('distribution')
+    }
+
     def __init__(self):
         self.current_product = None
         self.current_product_option = None
@@ -462,17 +562,25 @@ class UpdateContent(ChangesetAction):
         csNewName = self.get_option('new_name')
         csDescription = self.get_option('description')
 
-        cset = get_changeset(orgName, envName, csName)
+        cset = get_changeset(orgName, envName, csName, fields=('id', 'action_type'))
         csType = cset['action_type']
 
         self.update(cset["id"], csNewName, csDescription)
-        addPatch = self.PatchBuilder.build_patch('add',
-            self.AddPatchItemBuilder(orgName, envName, csType), items)
-        removePatch = self.PatchBuilder.build_patch('remove',
-            self.RemovePatchItemBuilder(orgName, envName, csType), items)
-
-        self.update_content(cset["id"], addPatch, self.api.add_content)
-        self.update_content(cset["id"], removePatch, self.api.remove_content)
+        resolved = {}
+        # removals go first, so that an item both removed and added ends up in the changeset
+        changes = self.PatchBuilder.build_changes('remove',
+            self.RemovePatchItemBuilder(orgName, envName, csType, resolved), items)
+        changes += self.PatchBuilder.build_changes('add',
+            self.AddPatchItemBuilder(orgName, envName, csType, resolved), items)
+
+        failures = self.update_content(cset["id"], changes)
+        if failures:
+            for (action, contentType, name, dummy), message in failures:
+                print >> sys.stderr, _("Failed to %(action)s %(type)s [ %(name)s ]: %(message)s") \
+                    % {'action': action, 'type': self.CONTENT_NAMES[contentType], 'name': name, 'message': message}
+            print >> sys.stderr, _("Changeset [ %(cset)s ] updated, %(failed)d of %(total)d content changes failed") \
+                % {'cset': csName, 'failed': len(failures), 'total': len(changes)}
+            return os.EX_DATAERR
 
         print _("Successfully updated changeset [ %s ]") % csName
         return os.EX_OK
@@ -482,11 +590,83 @@ class UpdateContent(ChangesetAction):
         self.api.update(csId, newName, description)
 
 
-    # pylint: disable=R0201
-    def update_content(self, csId, patch, updateMethod):
-        for contentType, items in patch.iteritems():
-            for i in items:
-                updateMethod(csId, contentType, i)
+    def update_content(self, csId, changes):
+        """
+        Send the content changes in patches of at most PATCH_SIZE changes.
+        When the server refuses a patch, its changes are sent one by one
+        to find out which of them failed.
+
+        @type changes: list of tuples
+        @param changes: changes built by L{PatchBuilder.build_changes}
+        @rtype: list of tuples (change, error message)
+        @return: changes that failed
+        """
+        failures = []
+        for start in range(0, len(changes), self.PATCH_SIZE):
+            chunk = changes[start:start + self.PATCH_SIZE]
+            patch = {}
+            for action, contentType, dummy, attrs in chunk:
+                sign = '+' if action == 'add' else '-'
+                patch.setdefault(sign + contentType, []).append(attrs)
+            try:
+                self.api.update_content(csId, patch)
+            except ServerRequestError:
+                failures += self.update_content_items(csId, chunk)
+        return failures
+
+    def update_content_items(self, csId, changes):
+        """
+        Send the content changes one by one. A change the server refuses
+        is not a failure when the changeset is already in the state
+        the change asks for, ie. the item is already added or removed.
+
+        @rtype: list of tuples (change, error message)
+        @return: changes that failed
+        """
+        failures = []
+        cset = None
+        for change in changes:
+            action, contentType, dummy, attrs = change
+            if action == 'add':
+                updateMethod = self.api.add_content
+            else:
+                updateMethod = self.api.remove_content
+            try:
+                updateMethod(csId, contentType, attrs)
+            except ServerRequestError, re:
+                if cset is None:
+                    cset = self.api.changeset(csId)
+                if not self.change_is_applied(cset, change):
+                    failures.append((change, server_error_message(re)))
+        return failures
+
+    @classmethod
+    def change_is_applied(cls, cset, change):
+        """
+        @type cset: dict
+        @param cset: changeset with its content
+        @rtype: bool
+        @return: True when the item is in the changeset for an addition
+        or is missing from it for a removal
+        """
+        action, contentType, dummy, attrs = change
+        key, fields = cls.CHANGESET_CONTENT[contentType]
+        if not isinstance(cset.get(key), list):
+            # the content is not known, the change can't be confirmed
+            return False
+        if 'content_id' in attrs:
+            item_id = attrs['content_id']
+        else:
+            item_id = attrs[cls.CONTENT_ID_ATTRS[contentType]]
+        present = False
+        for item in cset[key]:
+            if 'product_id' in attrs and 'product_id' in item \
+                and u_str(item['product_id']) != u_str(attrs['product_id']):
+                continue
+            if u_str(item_id) in [u_str(item[field]) for field in fields if field in item]:
+                present = True
+                break
+        return present == (action == 'add')
 
 
 # ==============================================================================
@@ -507,7 +687,7 @@ class Delete(ChangesetAction):
         orgName = self.get_option('org')
         envName = self.get_option('environment')
 
-        cset = get_changeset(orgName, envName, csName)
+        cset = get_changeset(orgName, envName, csName, fields=('id',))
 
         msg = self.api.delete(cset["id"])
         print msg
@@ -532,7 +712,7 @@ class Apply(ChangesetAction):
         orgName = self.get_option('org')
         envName = self.get_option('environment')
 
-        cset = get_changeset(orgName, envName, csName)
+        cset = get_changeset(orgName, envName, csName, fields=('id',))
 
         task = self.api.apply(cset["id"])
         task = AsyncTask(task)
@@ -358,7 +358,7 @@ class AddRemoveRepo(ContentViewDefinitionAction):
         product_id     = self.get_option('product_id')
 
         view = get_cv_definition(org_name, def_label, def_name, def_id)
-        repo = get_repo(org_name, repo_name, product, product_label, product_id)
+        repo = get_repo(org_name, repo_name, product, product_label, product_id, fields=('id', 'name'))
 
         repos = self.api.repos(org_name, view['id'])
         repos = [f['id'] for f in repos]
@@ -59,10 +59,10 @@ class List(DistributorAction):
     def get_distributors(self, org_name, env_name, pool_id):
         query = {'pool_id': pool_id} if pool_id else {}
         if env_name is None:
-            return self.api.distributors_by_org(org_name, query)
+            return self.api.iter_distributors_by_org(org_name, query)
         else:
             environment = get_environment(org_name, env_name)
-            return self.api.distributors_by_env(environment["id"], query)
+            return self.api.iter_distributors_by_env(environment["id"], query)
 
     def run(self):
         org_name = self.get_option('org')
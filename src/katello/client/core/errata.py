@@ -88,7 +88,7 @@ class List(ErrataAction):
         if not repo_id:
             if repo_name:
                 repo = get_repo(org_name, repo_name, prod_name, prod_label, prod_id, env_name, False,
-                                viewName, viewLabel, viewId)
+                                viewName, viewLabel, viewId, fields=('id',))
                 repo_id = repo["id"]
             else:
                 env = get_environment(org_name, env_name)
@@ -199,7 +199,7 @@ class Info(ErrataAction):
         prodId   = self.get_option('product_id')
 
         if not repoId:
-            repo = get_repo(orgName, repoName, prodName, prodLabel, prodId, envName)
+            repo = get_repo(orgName, repoName, prodName, prodLabel, prodId, envName, fields=('id',))
             repoId = repo["id"]
 
         pack = self.api.errata(errId, repoId)
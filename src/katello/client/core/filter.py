@@ -330,7 +330,7 @@ class AddRemoveRepo(FilterAction):
 
         cvd_filter = get_filter(org_name, definition["id"], filter_name, filter_id)
 
-        repo = get_repo(org_name, repo_name, product, product_label, product_id)
+        repo = get_repo(org_name, repo_name, product, product_label, product_id, fields=('id', 'name'))
         repos = self.api.repos(cvd_filter["id"], definition["id"], org_name)
         repos = [f['id'] for f in repos]
 
@@ -69,7 +69,7 @@ class Info(PackageAction):
         prodId   = self.get_option('product_id')
 
         if not repoId:
-            repo = get_repo(orgName, repoName, prodName, prodLabel, prodId, envName)
+            repo = get_repo(orgName, repoName, prodName, prodLabel, prodId, envName, fields=('id',))
             repoId = repo["id"]
 
         pack = self.api.package(packId, repoId)
@@ -115,7 +115,7 @@ class List(PackageAction):
 
         self.printer.set_header(_("Package List For Repo %s") % repoId)
 
-        packages = self.api.packages_by_repo(repoId)
+        packages = self.api.iter_packages_by_repo(repoId)
         self.print_packages(packages)
 
         return os.EX_OK
@@ -134,7 +134,7 @@ class List(PackageAction):
 
         if not repoId:
             repo = get_repo(orgName, repoName, prodName, prodLabel, prodId, envName, False,
-                            viewName, viewLabel, viewId)
+                            viewName, viewLabel, viewId, fields=('id',))
             if repo != None:
                 repoId = repo["id"]
 
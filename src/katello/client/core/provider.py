@@ -289,7 +289,13 @@ class ImportManifest(SingleProviderAction):
 
         prov = get_provider(orgName, provName)
 
-        task = ImportManifestAsyncTask(self.api.import_manifest(prov["id"], f, force))
+        print _("Uploading manifest...")
+        progress_bar = ProgressBar()
+        try:
+            task = ImportManifestAsyncTask(self.api.import_manifest(prov["id"], f, force,
+                progress=progress_bar.update_transfer))
+        finally:
+            progress_bar.done()
         run_spinner_in_bg(wait_for_async_task, [task], message=_("Importing manifest, please wait... "))
 
         return ImportManifestAsyncTask.evaluate_task_status(task,
@@ -200,7 +200,8 @@ class Discovery(RepoAction):  # pylint: disable=R0904
         print(_("Discovering repository urls, this could take some time..."))
         task = self.provider_api.repo_discovery(provider_id, url)
 
-        run_spinner_in_bg(wait_for_async_task, [task])
+        # the discovered urls are needed to continue, wait even in detached mode
+        run_spinner_in_bg(wait_for_async_task, [task, None, False])
         repourls = self.provider_api.provider(provider_id)['discovered_repos']
 
         if not len(repourls):
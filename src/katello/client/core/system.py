@@ -28,13 +28,13 @@ from katello.client.core.base import BaseAction, Command
 from katello.client.server import ServerRequestError
 
 from katello.client.lib.control import get_katello_mode
-from katello.client.lib.utils.io import convert_to_mime_type, attachment_file_name, save_report
+from katello.client.lib.utils.io import convert_to_mime_type, report_file_opener
 from katello.client.lib.utils.data import test_record, update_dict_unless_none
-from katello.client.lib.utils.encoding import u_str
+from katello.client.lib.utils.encoding import u_str, stdout_origin
 from katello.client.lib.async import SystemAsyncTask, evaluate_remote_action
 from katello.client.lib.ui import printer
 from katello.client.lib.ui.printer import VerboseStrategy, batch_add_columns
-from katello.client.lib.ui.progress import run_spinner_in_bg, wait_for_async_task
+from katello.client.lib.ui.progress import run_spinner_in_bg, wait_for_async_task, ProgressBar
 from katello.client.lib.ui.formatters import format_date, stringify_custom_info
 
 
@@ -66,10 +66,10 @@ class List(SystemAction):
     def get_systems(self, org_name, env_name, pool_id):
         query = {'pool_id': pool_id} if pool_id else {}
         if env_name is None:
-            return self.api.systems_by_org(org_name, query)
+            return self.api.iter_systems_by_org(org_name, query)
         else:
             environment = get_environment(org_name, env_name)
-            return self.api.systems_by_env(environment["id"], query)
+            return self.api.iter_systems_by_env(environment["id"], query)
 
     def run(self):
         org_name = self.get_option('org')
@@ -798,16 +798,24 @@ class Report(SystemAction):
         envName = self.get_option('environment')
         format_in = self.get_option('format')
 
-        if envName is None:
-            report = self.api.report_by_org(orgId, convert_to_mime_type(format_in, 'text'))
-        else:
-            environment = get_environment(orgId, envName)
-            report = self.api.report_by_env(environment['id'], convert_to_mime_type(format_in, 'text'))
-
+        # the report is streamed to the file or stdout, it's never held in memory
         if format_in == 'pdf':
-            save_report(report[0], attachment_file_name(report[1], "%s_systems_report.pdf" % get_katello_mode()))
+            output = report_file_opener("%s_systems_report.pdf" % get_katello_mode())
+            progress_bar = ProgressBar()
+            progress = progress_bar.update_transfer
         else:
-            print report[0]
+            output = stdout_origin
+            progress_bar = progress = None
+
+        try:
+            if envName is None:
+                self.api.report_by_org(orgId, convert_to_mime_type(format_in, 'text'), output, progress)
+            else:
+                environment = get_environment(orgId, envName)
+                self.api.report_by_env(environment['id'], convert_to_mime_type(format_in, 'text'), output, progress)
+        finally:
+            if progress_bar:
+                progress_bar.done()
 
         return os.EX_OK
 
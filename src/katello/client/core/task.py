@@ -15,10 +15,19 @@
 #
 
 import os
+import time
 
-from katello.client.api.task_status import TaskStatusAPI
+from katello.client.api.job import SystemGroupJobStatusAPI
+from katello.client.api.task_status import TaskStatusAPI, SystemTaskStatusAPI
+from katello.client.cli.base import opt_parser_add_org
 from katello.client.core.base import BaseAction, Command
-from katello.client.api.utils import ApiDataError
+from katello.client.api.utils import ApiDataError, find_concurrently, get_system_group
+from katello.client.lib import task_journal
+from katello.client.lib.async import AsyncTask, SystemAsyncTask, SystemGroupAsyncJob, progress
+from katello.client.lib.task_journal import TaskJournal
+from katello.client.server import ServerRequestError
+from katello.client.lib.ui.progress import ProgressBar, PollScheduler, TaskDashboard, \
+    run_async_task_with_status
 
 # base task action ----------------------------------------------------------------
 
@@ -27,6 +36,89 @@ class TaskAction(BaseAction):
     def __init__(self):
         super(TaskAction, self).__init__()
         self.api = TaskStatusAPI()
+        self.system_api = SystemTaskStatusAPI()
+
+    @classmethod
+    def add_job_options(cls, parser):
+        parser.add_option("--job", dest='jobs', action='append',
+                          help=_("system group job id, can be specified multiple times"))
+        opt_parser_add_org(parser)
+        parser.add_option("--system_group", dest='system_group',
+                          help=_("name of the system group the jobs belong to"))
+        parser.add_option("--system_group_id", dest='system_group_id',
+                          help=_("id of the system group the jobs belong to"))
+
+    @classmethod
+    def check_job_options(cls, validator):
+        if validator.exists('jobs'):
+            validator.require('org')
+            validator.require_one_of(('system_group', 'system_group_id'))
+
+    def fetch_statuses(self, uuids):
+        """
+        Fetch statuses of the tasks, in one request if the server supports it
+        @rtype: dict
+        @return: statuses by uuid, None for tasks that were not found
+        """
+        statuses = self.api.statuses(uuids) if len(uuids) > 1 else None
+        if statuses is None:
+            statuses = dict(zip(uuids, find_concurrently(*[(self.api.status, uuid) for uuid in uuids])))
+        return statuses
+
+    def get_statuses(self, uuids):
+        """
+        Fetch statuses of the tasks, in one request if the server supports it
+        @rtype: list of dicts
+        @raise ApiDataError: when any of the tasks is not found
+        """
+        statuses = self.fetch_statuses(uuids)
+        self.check_found(uuids, statuses)
+        return [statuses[uuid] for uuid in uuids]
+
+    def find_tasks(self, uuids):
+        """
+        Fetch statuses of the tasks. Uuids that are not known as tasks
+        are looked up among tasks running on systems.
+        @rtype: list of AsyncTask
+        @raise ApiDataError: when any of the tasks is not found
+        """
+        statuses = self.fetch_statuses(uuids)
+        unknown = [uuid for uuid in uuids if statuses.get(uuid) is None]
+        system_statuses = dict(zip(unknown, find_concurrently(*[(self.system_status, uuid) for uuid in unknown])))
+        self.check_found(unknown, system_statuses)
+
+        found = []
+        tasks = [statuses[uuid] for uuid in uuids if uuid not in unknown]
+        if tasks:
+            found.append(AsyncTask(tasks))
+        if unknown:
+            found.append(SystemAsyncTask([system_statuses[uuid] for uuid in unknown]))
+        return found
+
+    def system_status(self, uuid):
+        try:
+            return self.system_api.status(uuid)
+        except ServerRequestError:
+            return None
+
+    def find_jobs(self):
+        """
+        Fetch statuses of the system group jobs selected by the options
+        @rtype: SystemGroupAsyncJob
+        """
+        org_name = self.get_option('org')
+        system_group_id = self.get_option('system_group_id')
+        if system_group_id is None:
+            system_group_id = get_system_group(org_name, self.get_option('system_group'))['id']
+        job_api = SystemGroupJobStatusAPI(org_name, system_group_id)
+        jobs = find_concurrently(*[(job_api.status, job_id) for job_id in self.get_option('jobs')])
+        return SystemGroupAsyncJob(org_name, system_group_id, jobs)
+
+    @classmethod
+    def check_found(cls, uuids, statuses):
+        missing = [uuid for uuid in uuids if statuses.get(uuid) is None]
+        if missing:
+            raise ApiDataError(_("Could not find task [ %s ].") % ", ".join(missing))
 
 # task actions --------------------------------------------------------------------
 
@@ -57,6 +149,206 @@ class Status(TaskAction):
         self.printer.print_item(task)
         return os.EX_OK
 
+
+class Wait(TaskAction):
+
+    description = _("wait for tasks and system group jobs to finish")
+
+    def setup_parser(self, parser):
+        parser.add_option("--uuid", dest='uuids', action='append',
+                          help=_("task uuid eg: c9668eda-096b-445d-b96d, can be specified multiple times"))
+        self.add_job_options(parser)
+
+    def check_options(self, validator):
+        validator.require_at_least_one_of(('uuids', 'jobs'))
+        self.check_job_options(validator)
+
+    def run(self):
+        uuids = self.get_option('uuids')
+
+        waited = self.find_tasks(uuids) if uuids else []
+        if self.get_option('jobs'):
+            waited.append(self.find_jobs())
+        for task in waited:
+            run_async_task_with_status(task, ProgressBar(), detachable=False)
+
+        self.printer.add_column('uuid', _("UUID"))
+        self.printer.add_column('state', _("State"))
+        self.printer.add_column('start_time', _("Start Time"))
+        self.printer.add_column('finish_time', _("Finish Time"))
+        self.printer.set_header(_("Task Status"))
+        self.printer.print_items(self.status_rows(waited))
+        return os.EX_OK if all([task.succeeded() for task in waited]) else os.EX_DATAERR
+
+    @classmethod
+    def status_rows(cls, waited):
+        rows = []
+        for task in waited:
+            if isinstance(task, SystemGroupAsyncJob):
+                rows.extend([{'uuid': str(job['id']), 'state': job['state'], 'start_time': job.get('created_at'),
+                    'finish_time': job.get('finish_time')} for job in task.get_hashes()])
+            else:
+                rows.extend(task.get_hashes())
+        return rows
+
+
+class Watch(TaskAction):
+
+    description = _("watch tasks and system group jobs until they finish")
+
+    def setup_parser(self, parser):
+        parser.add_option("--uuid", dest='uuids', action='append',
+                          help=_("task uuid, can be specified multiple times"))
+        self.add_job_options(parser)
+
+    def check_options(self, validator):
+        validator.require_at_least_one_of(('uuids', 'jobs'))
+        self.check_job_options(validator)
+
+    def run(self):
+        uuids = self.get_option('uuids')
+
+        watched = self.find_tasks(uuids) if uuids else []
+        if self.get_option('jobs'):
+            watched.append(self.find_jobs())
+        return self.watch(watched)
+
+    def watch(self, watched):
+        """
+        Poll the tasks until all of them finish, showing their progress in a dashboard
+        @type watched: list of AsyncTask
+        @return: EX_OK when all the tasks finished, EX_DATAERR when any failed or was canceled
+        """
+        dashboard = TaskDashboard()
+        scheduler = PollScheduler.from_config()
+        dashboard.update(self.dashboard_rows(watched))
+        while [w for w in watched if w.is_running()]:
+            time.sleep(scheduler.next_delay([w.get_hashes() for w in watched]))
+            for w in watched:
+                w.update()
+                task_journal.update(w)
+            dashboard.update(self.dashboard_rows(watched))
+        dashboard.update(self.dashboard_rows(watched), final=True)
+
+        failed = sum([w.failed() for w in watched])
+        canceled = sum([w.canceled() for w in watched])
+        print _("%(finished)d finished, %(failed)d failed, %(canceled)d canceled") % \
+            {'finished': sum([w.subtask_count() for w in watched]) - failed - canceled,
+             'failed': failed, 'canceled': canceled}
+        return os.EX_DATAERR if failed or canceled else os.EX_OK
+
+    @classmethod
+    def dashboard_rows(cls, watched):
+        rows = []
+        for w in watched:
+            for status in w.get_hashes():
+                if isinstance(w, SystemGroupAsyncJob):
+                    rows.append(cls.job_row(status))
+                else:
+                    rows.append(cls.task_row(status))
+        return rows
+
+    @classmethod
+    def task_row(cls, task):
+        details = task.get('progress')
+        row = {'id': task['uuid'], 'state': task['state'], 'progress': None, 'size_done': None,
+               'start_time': task.get('start_time'), 'finish_time': task.get('finish_time')}
+        if isinstance(details, dict) and 'total_count' in details and 'items_left' in details:
+            row['progress'] = progress(details['items_left'], details['total_count'])
+        if isinstance(details, dict) and 'total_size' in details and 'size_left' in details:
+            row['size_done'] = details['total_size'] - details['size_left']
+        return row
+
+    @classmethod
+    def job_row(cls, job):
+        tasks = job.get('tasks') or []
+        left = len([t for t in tasks if AsyncTask._subtask_is_running(t)]) # pylint: disable=W0212
+        return {'id': str(job['id']), 'state': job['state'], 'progress': progress(left, len(tasks)),
+                'size_done': None, 'start_time': job.get('created_at'), 'finish_time': job.get('finish_time')}
+
+
+class List(TaskAction):
+
+    description = _("list tasks started by this client")
+
+    def setup_parser(self, parser):
+        parser.add_option("--local", dest='local', action='store_true',
+                          help=_("list tasks from the local journal of tasks started by this client (required)"))
+
+    def check_options(self, validator):
+        validator.require('local')
+
+    def run(self):
+        journal = task_journal.active_journal
+        entries = journal.entries() if journal else []
+
+        self.printer.add_column('id', _("ID"))
+        self.printer.add_column('type', _("Type"))
+        self.printer.add_column('state', _("Last Known State"))
+        self.printer.add_column('started', _("Started"),
+            formatter=lambda t: time.strftime('%Y/%m/%d %H:%M:%S', time.localtime(t)))
+        self.printer.add_column('target', _("Command"))
+        self.printer.set_header(_("Local Task List"))
+        self.printer.print_items(entries)
+        return os.EX_OK
+
+
+class Resume(Watch):
+
+    description = _("resume waiting for tasks started by this client")
+
+    def setup_parser(self, parser):
+        parser.add_option("--uuid", dest='uuids', action='append',
+                          help=_("task uuid or system group job id, can be specified multiple times "
+                                 "(default: all the tasks that were running when last seen)"))
+
+    def check_options(self, validator):
+        pass
+
+    def run(self):
+        journal = task_journal.active_journal
+        ids = self.get_option('uuids')
+        if ids:
+            entries = dict((e['id'], e) for e in (journal.entries() if journal else []))
+            missing = [task_id for task_id in ids if task_id not in entries]
+            if missing:
+                raise ApiDataError(_("Task [ %s ] is not in the local journal.") % ", ".join(missing))
+            entries = [entries[task_id] for task_id in ids]
+        else:
+            entries = journal.running_entries() if journal else []
+            if not entries:
+                print _("There are no unfinished tasks in the local journal.")
+                return os.EX_OK
+
+        return self.watch(self.reattach(entries))
+
+    def reattach(self, entries):
+        """
+        Fetch current statuses of the tasks in the journal entries
+        @rtype: list of AsyncTask
+        """
+        watched = []
+        uuids = [e['id'] for e in entries if e['type'] == TaskJournal.TASK]
+        if uuids:
+            watched.append(AsyncTask(self.get_statuses(uuids)))
+
+        uuids = [e['id'] for e in entries if e['type'] == TaskJournal.SYSTEM_TASK]
+        if uuids:
+            watched.append(SystemAsyncTask(find_concurrently(*[(self.system_api.status, uuid) for uuid in uuids])))
+
+        groups = []
+        for entry in entries:
+            group = (entry.get('org'), entry.get('system_group_id'))
+            if entry['type'] == TaskJournal.JOB and group not in groups:
+                groups.append(group)
+        for org_name, system_group_id in groups:
+            job_ids = [e['id'] for e in entries if e['type'] == TaskJournal.JOB
+                and (e.get('org'), e.get('system_group_id')) == (org_name, system_group_id)]
+            job_api = SystemGroupJobStatusAPI(org_name, system_group_id)
+            jobs = find_concurrently(*[(job_api.status, job_id) for job_id in job_ids])
+            watched.append(SystemGroupAsyncJob(org_name, system_group_id, jobs))
+        return watched
+
 # task command --------------------------------------------------------------------
 
 class Task(Command):
@@ -20,9 +20,11 @@ from katello.client.api.user import UserAPI
 from katello.client.api.user_role import UserRoleAPI
 from katello.client.api.utils import get_user, get_environment
 from katello.client.core.base import BaseAction, Command
-from katello.client.lib.utils.io import convert_to_mime_type, attachment_file_name, save_report
+from katello.client.lib.utils.io import convert_to_mime_type, report_file_opener
+from katello.client.lib.utils.encoding import stdout_origin
 from katello.client.lib.utils.data import test_record
 from katello.client.lib.ui.printer import batch_add_columns
+from katello.client.lib.ui.progress import ProgressBar
 
 
 # base user action -----------------------------------------------------
@@ -299,12 +301,17 @@ class Report(UserAction):
 
     def run(self):
         format_in = self.get_option('format')
-        report = self.api.report(convert_to_mime_type(format_in, 'text'))
 
+        # the report is streamed to the file or stdout, it's never held in memory
         if format_in == 'pdf':
-            save_report(report[0], attachment_file_name(report[1], 'katello_users_report.pdf'))
+            progress_bar = ProgressBar()
+            try:
+                self.api.report(convert_to_mime_type(format_in, 'text'),
+                    report_file_opener('katello_users_report.pdf'), progress_bar.update_transfer)
+            finally:
+                progress_bar.done()
         else:
-            print report[0]
+            self.api.report(convert_to_mime_type(format_in, 'text'), stdout_origin)
 
         return os.EX_OK
 
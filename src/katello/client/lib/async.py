@@ -26,6 +26,7 @@ except ImportError:
 from katello.client.lib.ui.formatters import format_sync_errors, format_sync_status
 from katello.client.api.task_status import TaskStatusAPI, SystemTaskStatusAPI
 from katello.client.api.job import SystemGroupJobStatusAPI
+from katello.client.lib.executor import wait_all
 
 
 # Envelope around task status structure
@@ -45,18 +46,65 @@ from katello.client.api.job import SystemGroupJobStatusAPI
 # 'uuid': '52456711-cd67-11e0-af50-f0def13c24e5'}
 class AsyncTask():
 
+    # number of polls in a row a running subtask may miss its status before
+    # it's considered failed, eg. because it was deleted on the server
+    MAX_MISSED_POLLS = 3
+
     def __init__(self, task):
         if not isinstance(task, list):
             self._tasks = [task]
         else:
             self._tasks = task
+        self._missed_polls = {}
 
     @classmethod
     def status_api(cls):
         return TaskStatusAPI()
 
     def update(self):
-        self._tasks = [self.status_api().status(t['uuid']) for t in self._tasks]
+        self._tasks = self._poll('uuid')
+
+    def _poll(self, id_key):
+        """
+        Fetch current statuses of the subtasks that are still running.
+        The statuses are fetched in one request when the status api supports
+        it, concurrently otherwise. Subtasks in a terminal state keep their
+        last status. Running subtasks whose status couldn't be fetched keep
+        it too, until they miss MAX_MISSED_POLLS polls in a row and are
+        marked failed.
+
+        @type id_key: str
+        @param id_key: key of the subtask identifier
+        @return: list of updated subtasks
+        """
+        status_api = self.status_api()
+        ids = [t[id_key] for t in self._tasks if self._subtask_is_running(t)]
+        if not ids:
+            return self._tasks
+
+        statuses = None
+        if len(ids) > 1 and hasattr(status_api, 'statuses'):
+            statuses = status_api.statuses(ids)
+        if statuses is None:
+            executor = status_api.server.executor
+            statuses = dict(zip(ids, wait_all([executor.submit(status_api.status, i) for i in ids])))
+
+        updated = []
+        for task in self._tasks:
+            if self._subtask_is_running(task):
+                task = self._polled_status(task, task[id_key], statuses.get(task[id_key]))
+            updated.append(task)
+        return updated
+
+    def _polled_status(self, task, task_id, status):
+        if status is not None:
+            self._missed_polls.pop(task_id, None)
+            return status
+        self._missed_polls[task_id] = self._missed_polls.get(task_id, 0) + 1
+        if self._missed_polls[task_id] < self.MAX_MISSED_POLLS:
+            return task
+        error = _("Status of the task %s is not available") % task_id
+        return dict(task, state='failed', result={'errors': [[error, None]]})
 
     def get_progress(self):
         """
@@ -227,7 +275,7 @@ class AsyncJob(AsyncTask):
         return SystemGroupJobStatusAPI()
 
     def update(self):
-        self._tasks = [self.status_api().status(j['id']) for j in self._tasks]
+        self._tasks = self._poll('id')
 
 
 
@@ -235,11 +283,11 @@ class AsyncJob(AsyncTask):
 class SystemGroupAsyncJob(AsyncJob):
     def __init__(self, org_id, system_group_id, job):
         AsyncJob.__init__(self, job)
-        self.__org_id = org_id
-        self.__system_group_id = system_group_id
+        self.org_id = org_id
+        self.system_group_id = system_group_id
 
     def status_api(self):
-        return SystemGroupJobStatusAPI(self.__org_id, self.__system_group_id)
+        return SystemGroupJobStatusAPI(self.org_id, self.system_group_id)
 
     def status_messages(self):
         return [job["status_message"] for job in self._tasks]
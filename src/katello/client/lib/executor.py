@@ -0,0 +1,163 @@
+#
+# Copyright 2013 Red Hat, Inc.
+#
+# This software is licensed to you under the GNU General Public License,
+# version 2 (GPLv2). There is NO WARRANTY for this software, express or
+# implied, including the implied warranties of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE. You should have received a copy of GPLv2
+# along with this software; if not, see
+# http://www.gnu.org/licenses/old-licenses/gpl-2.0.txt.
+#
+# Red Hat trademarks are not licensed under GPLv2. No permission is
+# granted to use or replicate Red Hat trademarks that are incorporated
+# in this software or its documentation.
+#
+
+import sys
+import threading
+from Queue import Queue
+
+
+class Future(object):
+    """
+    Result of a call running in an L{Executor}.
+    Exceptions raised by the call are captured and re-raised by L{result}.
+    """
+
+    def __init__(self):
+        self.__finished = threading.Event()
+        self.__result = None
+        self.__exc_info = None
+
+    def set_result(self, result):
+        self.__result = result
+        self.__finished.set()
+
+    def set_exc_info(self, exc_info):
+        self.__exc_info = exc_info
+        self.__finished.set()
+
+    def done(self):
+        """
+        @rtype: boolean
+        @return: True if the call has finished
+        """
+        return self.__finished.isSet()
+
+    def wait(self):
+        """
+        Block until the call finishes
+        """
+        # wait with a timeout so that KeyboardInterrupt gets through
+        while not self.__finished.isSet():
+            self.__finished.wait(0.5)
+
+    def exception(self):
+        """
+        Wait for the call and return the exception it raised
+        @return: exception instance or None if the call succeeded
+        """
+        self.wait()
+        if self.__exc_info:
+            return self.__exc_info[1]
+        return None
+
+    def result(self):
+        """
+        Wait for the call and return its return value
+        @raise Exception: the exception raised by the call
+        """
+        self.wait()
+        if self.__exc_info:
+            raise self.__exc_info[0], self.__exc_info[1], self.__exc_info[2]
+        return self.__result
+
+
+def run_call(future, function, args, kwargs):
+    try:
+        future.set_result(function(*args, **kwargs))
+    except:  # pylint: disable=W0702
+        future.set_exc_info(sys.exc_info())
+
+
+class Executor(object):
+    """
+    Bounded pool of worker threads running submitted calls.
+
+    Worker threads are started on demand, up to max_workers, and run
+    as daemons so they never block the exit of the cli. Calls submitted
+    from one of the executor's own workers run synchronously, so nested
+    submissions can't exhaust the pool and deadlock.
+
+    Typical usage:
+
+    executor = Executor(4)
+    futures = [executor.submit(api.system, uuid) for uuid in uuids]
+    systems = [f.result() for f in futures]
+    """
+
+    def __init__(self, max_workers=4):
+        self.max_workers = max_workers
+        self.__queue = Queue()
+        self.__workers = []
+        self.__lock = threading.Lock()
+
+    def __in_worker(self):
+        return threading.currentThread() in self.__workers
+
+    def __start_worker(self):
+        with self.__lock:
+            if len(self.__workers) < self.max_workers and self.__queue.qsize() > 0:
+                worker = threading.Thread(target=self.__work)
+                worker.setDaemon(True)
+                self.__workers.append(worker)
+                worker.start()
+
+    def __work(self):
+        while True:
+            item = self.__queue.get()
+            if item is None:
+                return
+            run_call(*item)
+
+    def submit(self, function, *args, **kwargs):
+        """
+        Schedule function(*args, **kwargs) to run in a worker thread
+        @rtype: Future
+        """
+        future = Future()
+        if self.max_workers <= 1 or self.__in_worker():
+            run_call(future, function, args, kwargs)
+        else:
+            self.__queue.put((future, function, args, kwargs))
+            self.__start_worker()
+        return future
+
+    def map(self, function, *iterables):
+        """
+        Run the function for every set of arguments concurrently
+        @rtype: [Future]
+        @return: futures of the calls in the order of arguments
+        """
+        return [self.submit(function, *args) for args in zip(*iterables)]
+
+    def shutdown(self):
+        """
+        Stop the workers once they finish the calls already submitted
+        """
+        with self.__lock:
+            for dummy in self.__workers:
+                self.__queue.put(None)
+            self.__workers = []
+
+
+def wait_all(futures):
+    """
+    Wait for all the futures and return their results
+    @type futures: [Future]
+    @rtype: list
+    @raise Exception: the first exception raised by any of the calls
+    """
+    for future in futures:
+        future.wait()
+    return [future.result() for future in futures]
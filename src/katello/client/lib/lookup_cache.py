@@ -0,0 +1,163 @@
+#
+# Copyright 2013 Red Hat, Inc.
+#
+# This software is licensed to you under the GNU General Public License,
+# version 2 (GPLv2). There is NO WARRANTY for this software, express or
+# implied, including the implied warranties of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE. You should have received a copy of GPLv2
+# along with this software; if not, see
+# http://www.gnu.org/licenses/old-licenses/gpl-2.0.txt.
+#
+# Red Hat trademarks are not licensed under GPLv2. No permission is
+# granted to use or replicate Red Hat trademarks that are incorporated
+# in this software or its documentation.
+#
+
+import copy
+import os
+import threading
+import time
+
+try:
+    import json
+except ImportError:
+    import simplejson as json
+
+from katello.client.lib.utils.io import write_private_file
+
+
+class LookupCache(object):
+    """
+    Records found by their names, kept for a limited time so that the same
+    organization, environment or product isn't looked up again and again.
+
+    Entries are stored per entity type and expire after the entity's ttl.
+    Any create, update or delete of an entity type drops the cached records
+    of that type (and of everything, when an organization changes).
+    When a path is given, the cache is also saved to that file (readable
+    by the owner only) and shared by later invocations. The namespace
+    separates records of different servers and users in the file.
+    """
+
+    # seconds for which records of the entity type are considered valid
+    DEFAULT_TTLS = {
+        'organization': 3600,
+        'environment': 600,
+        'provider': 600,
+        'product': 300,
+        'content_view': 300,
+        'system_group': 300,
+        'user_role': 300,
+    }
+
+    # path segments of api resources that change records of the entity type
+    COLLECTIONS = {
+        'organizations': 'organization',
+        'environments': 'environment',
+        'providers': 'provider',
+        'products': 'product',
+        'content_views': 'content_view',
+        'content_view_definitions': 'content_view',
+        'system_groups': 'system_group',
+        'roles': 'user_role',
+    }
+
+    def __init__(self, path=None, namespace='', ttls=None):
+        self.path = path
+        self.namespace = namespace
+        self.ttls = dict(self.DEFAULT_TTLS)
+        self.ttls.update(ttls or {})
+        self.__entries = {}
+        self.__lock = threading.RLock()
+        self.__load()
+
+    def __entry_key(self, entity, key):
+        return ' '.join([self.namespace, entity, json.dumps(list(key))])
+
+    def get(self, entity, key):
+        """
+        @type entity: str
+        @param entity: entity type, eg. 'product'
+        @type key: tuple
+        @param key: values the record was looked up by
+        @return: copy of the cached record or None when it's not cached or has expired
+        """
+        with self.__lock:
+            entry = self.__entries.get(self.__entry_key(entity, key))
+        if entry is None or entry[0] + self.ttls.get(entity, 0) <= time.time():
+            return None
+        return copy.deepcopy(entry[1])
+
+    def set(self, entity, key, record):
+        """
+        Store the record found by the key
+        """
+        # records that weren't found are not cached, they may be created anytime
+        if not self.ttls.get(entity, 0) or not record:
+            return
+        with self.__lock:
+            self.__entries[self.__entry_key(entity, key)] = (time.time(), copy.deepcopy(record))
+            self.__save()
+
+    def lookup(self, entity, key, find):
+        """
+        Return the cached record or find it and cache it
+        @type find: function
+        @param find: function without arguments returning the record
+        """
+        record = self.get(entity, key)
+        if record is None:
+            record = find()
+            self.set(entity, key, record)
+        return record
+
+    def invalidate(self, entity=None):
+        """
+        Drop cached records of the entity type or all records when no type is given
+        """
+        with self.__lock:
+            prefix = ' '.join([self.namespace, entity or '']).rstrip() + ' '
+            stale = [k for k in self.__entries.keys() if k.startswith(prefix)]
+            for entry_key in stale:
+                del self.__entries[entry_key]
+            if stale:
+                self.__save()
+
+    def request_sent(self, method, path):
+        """
+        Invalidate the records a request to the server could have changed.
+        Meant to be registered as a change listener of L{KatelloServer}.
+        """
+        if method == 'GET':
+            return
+        segments = [s for s in path.split('?')[0].split('/') if s]
+        if segments[-1:] == ['organizations'] or segments[-2:-1] == ['organizations']:
+            # records of all entities belong to organizations
+            self.invalidate()
+            return
+        entities = [self.COLLECTIONS[s] for s in segments if s in self.COLLECTIONS]
+        if not entities or entities[-1] == 'organization':
+            # other resources of the organization, eg. its systems
+            return
+        self.invalidate(entities[-1])
+        if entities[-1] == 'provider':
+            # providers create products, eg. when a manifest is imported
+            self.invalidate('product')
+
+    def __load(self):
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            stored = json.load(open(self.path))
+            # entries older than any ttl are never used, don't keep them in the file
+            oldest = time.time() - max(self.ttls.values() + [0])
+            for entry_key, (stored_at, record) in stored.items():
+                if stored_at > oldest:
+                    self.__entries[entry_key] = (stored_at, record)
+        except (IOError, ValueError, TypeError, AttributeError):
+            self.__entries = {}
+
+    def __save(self):
+        if not self.path:
+            return
+        write_private_file(self.path, json.dumps(self.__entries))
@@ -0,0 +1,224 @@
+#
+# Copyright 2013 Red Hat, Inc.
+#
+# This software is licensed to you under the GNU General Public License,
+# version 2 (GPLv2). There is NO WARRANTY for this software, express or
+# implied, including the implied warranties of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE. You should have received a copy of GPLv2
+# along with this software; if not, see
+# http://www.gnu.org/licenses/old-licenses/gpl-2.0.txt.
+#
+# Red Hat trademarks are not licensed under GPLv2. No permission is
+# granted to use or replicate Red Hat trademarks that are incorporated
+# in this software or its documentation.
+#
+
+import fcntl
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+try:
+    import json
+except ImportError:
+    import simplejson as json
+
+from katello.client.lib.async import AsyncTask, SystemAsyncTask, SystemGroupAsyncJob
+from katello.client.lib.utils.io import write_private_file
+from katello.client.logutil import getLogger
+
+_log = getLogger(__name__)
+
+
+class TaskJournal(object):
+    """
+    Local record of the tasks and jobs the cli started, so that they can
+    be found and waited for again when the command that started them was
+    interrupted.
+
+    Every entry keeps the id and type of the task, the command that started
+    it, the start time and the last known state. The journal is saved to
+    a file readable by the owner only. Every change re-reads the file and
+    saves it under an exclusive lock, so that cli processes running at the
+    same time don't drop each other's entries. A journal that can't be read
+    is moved aside to <path>.corrupt rather than overwritten.
+    Only the newest max_entries entries are kept.
+    """
+
+    TASK = 'task'
+    SYSTEM_TASK = 'system_task'
+    JOB = 'job'
+
+    def __init__(self, path, target='', max_entries=200):
+        self.path = path
+        self.target = target
+        self.max_entries = max_entries
+        self.__entries = {}
+        self.__readable = True
+        self.__lock = threading.RLock()
+
+    @classmethod
+    def task_type(cls, task):
+        """
+        @type task: AsyncTask
+        @return: type of the task's entries
+        """
+        if isinstance(task, SystemGroupAsyncJob):
+            return cls.JOB
+        if isinstance(task, SystemAsyncTask):
+            return cls.SYSTEM_TASK
+        return cls.TASK
+
+    @classmethod
+    def task_id(cls, task_type, subtask):
+        if task_type == cls.JOB:
+            return str(subtask['id'])
+        return subtask['uuid']
+
+    def record(self, task):
+        """
+        Add the subtasks of the task to the journal, entries of subtasks
+        already recorded only get their state updated
+        @type task: AsyncTask
+        """
+        task_type = self.task_type(task)
+        with self.__locked():
+            self.__load()
+            now = time.time()
+            for subtask in task.get_hashes():
+                task_id = self.task_id(task_type, subtask)
+                entry = self.__entries.get(task_id)
+                if entry is None:
+                    entry = {'id': task_id, 'type': task_type, 'target': self.target, 'started': now}
+                    if task_type == self.JOB:
+                        entry['org'] = task.org_id
+                        entry['system_group_id'] = task.system_group_id
+                    self.__entries[task_id] = entry
+                entry['state'] = subtask.get('state')
+                entry['updated'] = now
+            self.__prune()
+            self.__save()
+
+    def update(self, task):
+        """
+        Update last known states of the task's subtasks that are in the journal
+        @type task: AsyncTask
+        """
+        task_type = self.task_type(task)
+        with self.__locked():
+            self.__load()
+            changed = False
+            for subtask in task.get_hashes():
+                entry = self.__entries.get(self.task_id(task_type, subtask))
+                if entry is not None and entry.get('state') != subtask.get('state'):
+                    entry['state'] = subtask.get('state')
+                    entry['updated'] = time.time()
+                    changed = True
+            if changed:
+                self.__save()
+
+    def entries(self):
+        """
+        @rtype: list of dicts
+        @return: entries, the most recently started first
+        """
+        with self.__locked():
+            self.__load()
+            return sorted([dict(e) for e in self.__entries.values()], key=lambda e: e['started'], reverse=True)
+
+    def running_entries(self):
+        """
+        @return: entries of the tasks that were running when last seen
+        """
+        return [e for e in self.entries() if AsyncTask._subtask_is_running(e)] # pylint: disable=W0212
+
+    def __prune(self):
+        if len(self.__entries) <= self.max_entries:
+            return
+        oldest = sorted(self.__entries.values(), key=lambda e: e['started'])
+        for entry in oldest[:len(self.__entries) - self.max_entries]:
+            del self.__entries[entry['id']]
+
+    @contextmanager
+    def __locked(self):
+        """
+        Hold the journal locked for this thread and other processes
+        """
+        with self.__lock:
+            lock_fd = None
+            if self.path:
+                try:
+                    self.__make_directory()
+                    lock_fd = os.open(self.path + '.lock', os.O_WRONLY | os.O_CREAT, 0600)
+                    fcntl.flock(lock_fd, fcntl.LOCK_EX)
+                except (IOError, OSError), e:
+                    _log.warning("can't lock the task journal: %s" % e)
+            try:
+                yield
+            finally:
+                if lock_fd is not None:
+                    # closing the descriptor releases the lock
+                    os.close(lock_fd)
+
+    def __make_directory(self):
+        directory = os.path.dirname(self.path)
+        if not os.path.exists(directory):
+            os.makedirs(directory, 0700)
+
+    def __load(self):
+        if not self.path:
+            return
+        self.__entries = {}
+        self.__readable = True
+        if not os.path.exists(self.path):
+            return
+        try:
+            stored = json.load(open(self.path))
+            self.__entries = dict((e['id'], e) for e in stored)
+        except IOError, e:
+            # saving now would replace entries that couldn't be read
+            self.__readable = False
+            _log.warning("can't read the task journal: %s" % e)
+        except (ValueError, TypeError, KeyError), e:
+            # keep the damaged journal for inspection, the next save starts a new one
+            _log.warning("task journal %s is damaged (%s), moving it to %s.corrupt" % (self.path, e, self.path))
+            try:
+                os.rename(self.path, self.path + '.corrupt')
+            except OSError:
+                pass
+
+    def __save(self):
+        if not self.path or not self.__readable:
+            return
+        # the journal is only a convenience, failing to write it must not fail the command
+        try:
+            write_private_file(self.path, json.dumps(self.__entries.values()))
+        except (IOError, OSError), e:
+            _log.warning("can't save the task journal: %s" % e)
+
+
+active_journal = None
+
+
+def set_active_journal(journal):
+    global active_journal
+    active_journal = journal
+
+
+def record(task):
+    """
+    Record the task in the active journal, if there is one
+    @type task: AsyncTask
+    """
+    if active_journal is not None:
+        active_journal.record(task)
+
+
+def update(task):
+    """
+    Update states of the task in the active journal, if there is one
+    @type task: AsyncTask
+    """
+    if active_journal is not None:
+        active_journal.update(task)
@@ -13,11 +13,19 @@
 # granted to use or replicate Red Hat trademarks that are incorporated
 # in this software or its documentation.
 
+import csv
 import fcntl
+import itertools
 import termios
 import struct
 import sys
 import unicodedata
+from cStringIO import StringIO
+
+try:
+    import json
+except ImportError:
+    import simplejson as json
 
 
 from math import floor
@@ -109,6 +117,9 @@ class PrinterStrategy(object):
 
 class VerboseStrategy(PrinterStrategy):
 
+    # maximal label widths of column sets {labels -> width}
+    _label_widths = {}
+
     def print_items(self, heading, columns, items):
         """
         Print list of items
@@ -122,9 +133,9 @@ class VerboseStrategy(PrinterStrategy):
         """
         if heading is not None:
             self._print_header(heading)
+        layout = self._layout(columns)
         for item in items:
-            self._print_item(item, columns)
-            self._println()
+            self._print_item(item, layout)
 
     def _print_header(self, heading):
         """
@@ -138,31 +149,51 @@ class VerboseStrategy(PrinterStrategy):
         print_line(output=self._output)
 
 
-    def _print_item(self, item, columns):
+    def _layout(self, columns):
         """
-        Print one record.
+        Prepare labels of the columns, aligned to the longest one, so that
+        they're computed once for all the printed items.
 
-        :type item: hash
-        :param item: data to print
         :type columns: list of dicts
         :param columns: columns definition
+        :rtype: list of tuples
+        :return: (column, label) pairs, labels of multiline columns are not aligned
         """
-        self._println()
+        template = u"{0:<" + u_str(self._max_label_width(columns)) + "} : "
+        layout = []
         for column in columns:
+            if column.get('multiline', False):
+                layout.append((column, column['name'] + ":"))
+            else:
+                layout.append((column, template.format(u_str(column['name']))))
+        return layout
+
+    def _print_item(self, item, layout):
+        """
+        Print one record with a single write.
+
+        :type item: hash
+        :param item: data to print
+        :type layout: list of tuples
+        :param layout: columns with their labels as returned by _layout
+        """
+        lines = [u""]
+        for column, label in layout:
             if not self._column_has_value(column, item):
                 continue
 
             value = self._get_column_value(column, item)
 
             if not column.get('multiline', False):
-                col_width = self._max_label_width(columns)
                 if not isinstance(value, (list, tuple)):
                     value = [value]
                 for v in value:
-                    self._println(("{0:<" + u_str(col_width) + "} : {1}").format(u_str(column['name']), u_str(v)))
+                    lines.append(label + u_str(v))
             else:
-                self._println(column['name'] + ":")
-                self._println(indent_text(value, "    "))
+                lines.append(label)
+                lines.append(indent_text(value, "    "))
+        lines.append(u"\n")
+        self._print(u"\n".join(lines))
 
 
     @classmethod
@@ -174,11 +205,11 @@ class VerboseStrategy(PrinterStrategy):
         :param columns: columns definition
         :rtype: int
         """
-        width = 0
-        for column in columns:
-            current_width = unicode_len(_(column['name']))
-            if (current_width > width):
-                width = current_width
+        labels = tuple([_(column['name']) for column in columns])
+        width = cls._label_widths.get(labels)
+        if width is None:
+            width = max([unicode_len(label) for label in labels] + [0])
+            cls._label_widths[labels] = width
         return width
 
 
@@ -186,17 +217,25 @@ class GrepStrategy(PrinterStrategy):
     """
     Prints data into a grid that can be grepped easily.
     String to divide the columns can be set optionally.
+
+    Lists of items are printed in two passes, so that every column is as wide
+    as its widest value. Other iterables (eg. generators fetching the items page
+    by page) are streamed: column widths are fixed from the first sample_size
+    items and the rest is printed as it comes, without keeping it in memory.
+    Values wider than their column then shift the rest of their line.
     """
 
-    def __init__(self, delimiter=None, output=sys.stdout):
+    def __init__(self, delimiter=None, output=sys.stdout, sample_size=100):
         """
         :type delimiter: string
         :param delimiter: delimiter for dividing the grid columns
-        :type noheading: boolean
-        :param noheading: to suppress headings in the output
+        :type sample_size: int
+        :param sample_size: number of items used to compute column widths when streaming,
+            None to always compute them from all the items
         """
         super(GrepStrategy, self).__init__(output)
         self.__delim = delimiter if delimiter else ""
+        self.sample_size = sample_size
 
     def print_items(self, heading, columns, items):
         """
@@ -209,11 +248,16 @@ class GrepStrategy(PrinterStrategy):
         :type items: list of dicts
         :param items: data to be printed, list of items
         """
-        column_widths = self._calc_column_widths(items, columns)
+        rest = []
+        if self.sample_size and not isinstance(items, (list, tuple)):
+            rest = iter(items)
+            items = itertools.islice(rest, self.sample_size)
+        rows, column_widths = self._format_rows(items, columns)
+
         if heading is not None:
             self._print_header(heading, columns, column_widths)
-        for item in items:
-            self._print_item(item, columns, column_widths)
+        for row in itertools.chain(rows, (self._format_row(item, columns)[0] for item in rest)):
+            self._print_row(row, columns, column_widths)
             self._println()
 
     def _print_header(self, heading, columns, column_widths):
@@ -242,72 +286,193 @@ class GrepStrategy(PrinterStrategy):
         print_line(output=self._output)
 
 
-    def _print_item(self, item, columns, column_widths):
+    def _print_row(self, row, columns, column_widths):
         """
-        Print item of a list on single line
+        Print formatted row of a list on single line
 
-        :type item: hash
-        :param item: data to print
+        :type row: tuple
+        :param row: cells of the row as returned by _format_rows
         :type columns: list of dicts
         :param columns: columns definition
-        :type column_widths:
-        :param column_widths:
+        :type column_widths: dict
+        :param column_widths: dictionary that holds maximal widths of columns {attr_name -> width}
         """
-        for column in columns:
+        for column, cell in zip(columns, row):
             #get defined width
             width = column_widths.get(column['attr_name'], 0)
 
             #skip missing attributes
-            if not self._column_has_value(column, item):
+            if cell is None:
                 if self.__delim:
                     self._print(" " * width)
                 else:
                     self._print(self.__delim)
                 continue
-            value = self._get_column_value(column, item)
-
-            if column.get('multiline', False):
-                value = text_to_line(value)
-            value = u_str(value)
+            value, value_width = cell
 
             if self.__delim:
                 self._print('%s' % (value) + self.__delim)
             else:
-                self._print('%s%s' % (value, ' '*(width-unicode_len((value)))))
+                # streamed values can be wider than the column, keep them separated at least
+                self._print('%s%s' % (value, ' '*max(width-value_width, 1)))
 
-
-    def _column_width(self, items, column):
+    def _format_rows(self, items, columns):
         """
-        Returns maximum width for the column to ensure that all the data
-        and the label fits in.
+        Format all the cells, each of them exactly once, and count maximal
+        widths of the columns to ensure that all the data and the labels fit in.
 
+        :type items: list of dicts
+        :param items: data to be printed
         :type columns: list of dicts
         :param columns: columns definition
-        :type column: dict
-        :param column: column definition
-        :rtype: int
+        :rtype: (list of tuples, dict)
+        :return: rows with a (text, display width) pair for every cell, or None for cells
+            without a value, and dictionary that holds maximal widths of all columns {attr_name -> width}
         """
-        width = unicode_len(column['name'])+1
-        for column_value in [u_str(self._get_column_value(column, item)) for item in items]:
-            new_width = unicode_len(column_value)
-            if width <= new_width:
-                width = new_width+1
-        return width
+        widths = {}
+        for column in columns:
+            widths[column['attr_name']] = unicode_len(column['name'])+1
+
+        rows = []
+        for item in items:
+            row, value_widths = self._format_row(item, columns)
+            for column, value_width in zip(columns, value_widths):
+                if widths[column['attr_name']] <= value_width:
+                    widths[column['attr_name']] = value_width+1
+            rows.append(row)
+        return rows, widths
 
-    def _calc_column_widths(self, items, columns):
+    def _format_row(self, item, columns):
         """
-        Counts and returns dictionary that holds maximal widths of all columns {attr_name -> width}
+        Format cells of one item
 
-        :type items: list of dicts
-        :param items: data to be printed
+        :type item: dict
+        :param item: data to be printed
         :type columns: list of dicts
         :param columns: columns definition
+        :rtype: (tuple, list of ints)
+        :return: row with a (text, display width) pair for every cell, or None for cells
+            without a value, and widths of the values the columns have to fit
+        """
+        row = []
+        value_widths = []
+        for column in columns:
+            value = self._get_column_value(column, item)
+            text = u_str(value)
+            text_width = unicode_len(text)
+            value_widths.append(text_width)
+
+            if not self._column_has_value(column, item):
+                row.append(None)
+                continue
+            if column.get('multiline', False):
+                text = u_str(text_to_line(value))
+                text_width = unicode_len(text)
+            row.append((text, text_width))
+        return tuple(row), value_widths
+
+
+class MachineReadableStrategy(PrinterStrategy):
+    """
+    Base of strategies producing output for other programs. They print
+    the complete data, so they show all the columns the verbose output does.
+    """
+    pass
+
+
+class JsonLinesStrategy(MachineReadableStrategy):
+    """
+    Prints every item as a JSON object on a separate line.
+    Objects are keyed by attribute names of the columns and hold values
+    after formatting. Headings are not printed.
+    """
+
+    def print_items(self, heading, columns, items):
+        """
+        Print list of items
+
+        :type heading: string
+        :param heading: Title for the list of items, ignored
+        :type columns: list of dicts
+        :param columns: definition of columns
+        :type items: list of dicts
+        :param items: data to be printed, list of items
+        """
+        for item in items:
+            self._println(self._dump(self._to_object(item, columns)))
+
+    @classmethod
+    def _to_object(cls, item, columns):
+        """
+        Values of the columns, columns without value are left out
+
         :rtype: dict
         """
-        widths = {}
+        obj = {}
         for column in columns:
-            widths[column['attr_name']] = self._column_width(items, column)
-        return widths
+            if cls._column_has_value(column, item):
+                obj[column['attr_name']] = cls._get_column_value(column, item)
+        return obj
+
+    @classmethod
+    def _dump(cls, obj):
+        return json.dumps(obj, default=u_str)
+
+
+class JsonStrategy(JsonLinesStrategy):
+    """
+    Prints items as a JSON array, one object per item is written at a time.
+    Single item is printed as a JSON object.
+    """
+
+    def print_item(self, heading, columns, item):
+        self._println(self._dump(self._to_object(item, columns)))
+
+    def print_items(self, heading, columns, items):
+        separator = "\n"
+        self._print("[")
+        for item in items:
+            self._print(separator + self._dump(self._to_object(item, columns)))
+            separator = ",\n"
+        self._println("\n]")
+
+
+class CsvStrategy(MachineReadableStrategy):
+    """
+    Prints items as comma separated values, with a line of column names first
+    unless headings are suppressed. Lists are joined with commas.
+    """
+
+    def print_items(self, heading, columns, items):
+        """
+        Print list of items
+
+        :type heading: string
+        :param heading: Title for the list of items, column names are not printed when it's None
+        :type columns: list of dicts
+        :param columns: definition of columns
+        :type items: list of dicts
+        :param items: data to be printed, list of items
+        """
+        if heading is not None:
+            self._print_row([column['name'] for column in columns])
+        for item in items:
+            row = []
+            for column in columns:
+                if not self._column_has_value(column, item):
+                    row.append("")
+                    continue
+                value = self._get_column_value(column, item)
+                if isinstance(value, (list, tuple)):
+                    value = ", ".join([u_str(v) for v in value])
+                row.append("" if value is None else value)
+            self._print_row(row)
+
+    def _print_row(self, values):
+        # csv module of python 2 can't handle unicode, the row is encoded and written back as unicode
+        buf = StringIO()
+        csv.writer(buf, lineterminator="\n").writerow([u_str(v).encode('utf-8') for v in values])
+        self._print(buf.getvalue().decode('utf-8'))
 
 
 class Printer:
@@ -410,6 +575,10 @@ class Printer:
         filtered = []
         for column in self.__columns:
             allowed_strategies = column.get('show_with', (object))
+            if not isinstance(allowed_strategies, tuple):
+                allowed_strategies = (allowed_strategies,)
+            if VerboseStrategy in allowed_strategies:
+                allowed_strategies += (MachineReadableStrategy,)
             if isinstance(self.__printer_strategy, allowed_strategies):
                 filtered.append(column)
         return filtered
@@ -507,9 +676,25 @@ def get_term_width():
     return 80 if w == 0 else w
 
 
+# display widths of recently measured non-ascii strings
+_unicode_widths = {}
+UNICODE_WIDTHS_CACHE_SIZE = 4096
+
 def unicode_len(text):
-    """ return byte lenght of unicode character """
-    return sum(1+(unicodedata.east_asian_width(c) in "WF") for c in u_str(text))
+    """ return display width of the text, wide east asian characters take two columns """
+    text = u_str(text)
+    try:
+        text.encode('ascii')
+        return len(text)
+    except UnicodeError:
+        pass
+    width = _unicode_widths.get(text)
+    if width is None:
+        width = sum(1+(unicodedata.east_asian_width(c) in "WF") for c in text)
+        if len(_unicode_widths) >= UNICODE_WIDTHS_CACHE_SIZE:
+            _unicode_widths.clear()
+        _unicode_widths[text] = width
+    return width
 
 def batch_add_columns(printer, *cols, **kwargs):
     for c in cols:
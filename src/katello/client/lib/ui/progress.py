@@ -15,22 +15,249 @@
 # in this software or its documentation.
 #
 
+import calendar
+import os
+import pipes
+import random
 import sys
 import time
 import threading
-from katello.client.lib.async import AsyncTask
+import dateutil.parser
+from katello.client.config import Config
+from katello.client.lib.async import AsyncTask, progress
+from katello.client.lib import task_journal
+from katello.client.lib.control import system_exit
+from katello.client.lib.ui.printer import get_term_width
+
+
+# current detached mode ------------------------------------------------------
+
+# when set, commands don't wait for the tasks they start
+detached = False
+
+
+def set_detached(value):
+    global detached
+    detached = bool(value)
+
+
+def detach(task):
+    """
+    Exit the command without waiting for the task when in detached mode.
+    Every subtask is printed on its own line as options of 'task wait'
+    that select it, so the output can be passed to 'task wait' as it is.
+    @type task: AsyncTask
+    """
+    if detached:
+        system_exit(os.EX_OK, [detached_options(task, t) for t in task.get_hashes()])
+
+
+def detached_options(task, subtask):
+    if 'uuid' in subtask:
+        return "--uuid %s" % subtask['uuid']
+    # system group jobs can be found only through their organization and group
+    return "--org %s --system_group_id %s --job %s" % (pipes.quote(task.org_id), task.system_group_id, subtask['id'])
+
+
+class ProgressRate(object):
+    """
+    Rolling window of progress samples of a task, used to compute its
+    throughput and to estimate the time it needs to finish.
+
+    Rates are computed from the oldest and newest sample in the window,
+    so short stalls and bursts are averaged out. The estimate of remaining
+    time is exponentially smoothed, to keep it from jumping with every sample.
+    """
+
+    def __init__(self, window=30.0, smoothing=0.3):
+        self.window = window
+        self.smoothing = smoothing
+        self.__samples = []
+        self.__eta = None
+
+    def add_sample(self, size_done, items_done, timestamp=None):
+        """
+        @type size_done: int
+        @param size_done: bytes transferred so far
+        @type items_done: int
+        @param items_done: items (eg. packages) processed so far
+        """
+        timestamp = time.time() if timestamp is None else timestamp
+        self.__samples.append((timestamp, size_done, items_done))
+        while len(self.__samples) > 2 and self.__samples[1][0] <= timestamp - self.window:
+            self.__samples.pop(0)
+
+    def __rate(self, index):
+        if len(self.__samples) < 2:
+            return None
+        first, last = self.__samples[0], self.__samples[-1]
+        if last[0] <= first[0]:
+            return None
+        return max(last[index] - first[index], 0) / float(last[0] - first[0])
+
+    def size_rate(self):
+        """
+        @return: bytes per second or None when there are not enough samples
+        """
+        return self.__rate(1)
+
+    def items_rate(self):
+        """
+        @return: items per second or None when there are not enough samples
+        """
+        return self.__rate(2)
+
+    def eta(self, size_left, items_left):
+        """
+        Estimate seconds remaining, from the transfer rate, or from the rate
+        of processed items when nothing is transferred
+        @return: seconds or None when it can't be estimated
+        """
+        size_rate, items_rate = self.size_rate(), self.items_rate()
+        if size_rate:
+            estimate = size_left / size_rate
+        elif items_rate:
+            estimate = items_left / items_rate
+        else:
+            return self.__eta and self.__eta[0]
+
+        now = self.__samples[-1][0]
+        if self.__eta is not None:
+            previous, estimated_at = self.__eta
+            previous = max(previous - (now - estimated_at), 0)
+            estimate = self.smoothing * estimate + (1 - self.smoothing) * previous
+        self.__eta = (estimate, now)
+        return estimate
+
+
+def format_eta(seconds):
+    """
+    @rtype: string
+    @return: seconds formatted as H:MM:SS
+    """
+    seconds = int(round(seconds))
+    return "%d:%02d:%02d" % (seconds // 3600, seconds // 60 % 60, seconds % 60)
 
 
 class ProgressBar(object):
 
+    def __init__(self):
+        self.rate = ProgressRate()
+
     @classmethod
     def update_progress(cls, progress_in):
         sys.stdout.write("\rProgress: [{0:50s}] {1:.1f}%".format('#' * int(progress_in * 50), progress_in * 100))
         sys.stdout.flush()
 
+    def update_task(self, task):
+        """
+        Show progress of the task together with its throughput and estimated remaining time
+        @type task: AsyncTask
+        """
+        try:
+            size_left, items_left = task.size_left(), task.items_left()
+            self.rate.add_sample(task.total_size() - size_left, task.total_count() - items_left)
+        except (KeyError, TypeError):
+            # tasks without transfer details (or not started yet) show the share of finished subtasks
+            self.update_progress(progress(task.subtask_left(), task.subtask_count()))
+            return
+
+        progress_in = task.get_progress()
+        line = "\rProgress: [{0:20s}] {1:5.1f}%".format('#' * int(progress_in * 20), progress_in * 100)
+        size_rate, items_rate = self.rate.size_rate(), self.rate.items_rate()
+        if size_rate is not None:
+            line += "  {0:.2f} MB/s  {1:.1f} pkg/s".format(size_rate / 1048576.0, items_rate)
+        eta = self.rate.eta(size_left, items_left)
+        if eta is not None and task.is_running():
+            line += "  " + _("ETA %s") % format_eta(eta)
+        width = get_term_width() - 1
+        sys.stdout.write(line[:width + 1].ljust(width + 1))
+        sys.stdout.flush()
+
+    @classmethod
+    def update_transfer(cls, transferred, total):
+        """
+        Show progress of a transfer of total bytes, or just the amount
+        transferred when the total size is not known
+        """
+        if total:
+            cls.update_progress(float(transferred) / total)
+        else:
+            sys.stdout.write("\rTransferred: {0:.1f} MB".format(transferred / 1048576.0))
+            sys.stdout.flush()
+
     @classmethod
     def done(cls):
-        sys.stdout.write("\r{0:60s}\r".format(' '*70))
+        sys.stdout.write("\r%s\r" % (' ' * (get_term_width() - 1)))
+
+
+class TaskDashboard(object):
+    """
+    Compact table with state, progress, throughput and elapsed time of many
+    tasks, redrawn in place on every update. When the output is not a terminal,
+    only the final table is printed.
+    """
+
+    def __init__(self, output=None):
+        self.output = output or sys.stdout
+        self.__rates = {}
+        self.__lines = 0
+
+    def update(self, rows, final=False):
+        """
+        @type rows: list of dicts
+        @param rows: rows with keys 'id', 'state', 'progress' (fraction or None),
+        'size_done' (bytes or None), 'start_time' and 'finish_time'
+        @type final: bool
+        @param final: True for the last update, after all the tasks finished
+        """
+        for row in rows:
+            if row['size_done'] is not None:
+                self.__rates.setdefault(row['id'], ProgressRate()).add_sample(row['size_done'], 0)
+        if not (final or self.output.isatty()):
+            return
+
+        width = get_term_width() - 1
+        lines = ["%-36s %-12s %8s %10s %9s" % (_("ID"), _("State"), _("Progress"), _("MB/s"), _("Elapsed"))]
+        lines += [self.__format_row(row) for row in rows]
+        if self.__lines:
+            self.output.write('\033[%dA' % self.__lines) # pylint: disable=E0012,W1401
+        for line in lines:
+            self.output.write(line[:width].ljust(width) + '\n')
+        self.output.flush()
+        self.__lines = len(lines)
+
+    def __format_row(self, row):
+        progress_in = "-" if row['progress'] is None else "%.1f%%" % (row['progress'] * 100)
+        rate = self.__rates.get(row['id'])
+        size_rate = rate and rate.size_rate()
+        size_rate = "-" if size_rate is None else "%.2f" % (size_rate / 1048576.0)
+        elapsed = elapsed_time(row['start_time'], row['finish_time'])
+        elapsed = "-" if elapsed is None else format_eta(elapsed)
+        return "%-36s %-12s %8s %10s %9s" % (row['id'], row['state'], progress_in, size_rate, elapsed)
+
+
+def elapsed_time(start_time, finish_time=None):
+    """
+    @type start_time: string
+    @param start_time: rails timestamp of the start of a task
+    @type finish_time: string
+    @param finish_time: rails timestamp of the finish, now is used when not set
+    @return: seconds or None when the task hasn't started
+    """
+    def timestamp(value):
+        parsed = dateutil.parser.parse(value)
+        if parsed.utcoffset() is not None:
+            parsed = parsed - parsed.utcoffset()
+        return calendar.timegm(parsed.timetuple())
+
+    if not start_time:
+        return None
+    try:
+        finish = timestamp(finish_time) if finish_time else time.time()
+        return max(finish - timestamp(start_time), 0)
+    except (ValueError, TypeError):
+        return None
 
 
 class Spinner(threading.Thread):
@@ -116,24 +343,120 @@ def run_spinner_in_bg(function, arguments=(), message=""):
     return result
 
 
-def wait_for_async_task(task, delay=1):
+class PollScheduler(object):
+    """
+    Delays between polls of a running task.
+
+    Polling starts fast, so that short tasks finish without a noticeable
+    wait, and slows down exponentially up to max_delay while the task makes
+    no progress. Whenever the task moves, the delay drops to the initial
+    value again. Every delay is randomly shortened or prolonged by up to
+    jitter (a fraction of the delay), so that many clients started at once
+    don't poll the server in lockstep.
+    """
+
+    def __init__(self, initial_delay=0.5, max_delay=10.0, backoff=1.5, jitter=0.2):
+        self.initial_delay = initial_delay
+        self.max_delay = max(max_delay, initial_delay)
+        self.backoff = backoff
+        self.jitter = jitter
+        self.__delay = None
+        self.__last_state = None
+
+    @classmethod
+    def from_config(cls):
+        """
+        Create scheduler with the settings from the [polling] section of the configuration
+        """
+        Config()
+        settings = {}
+        for option in ('initial_delay', 'max_delay', 'backoff', 'jitter'):
+            if Config.parser.has_option('polling', option):
+                settings[option] = Config.parser.getfloat('polling', option)
+        return cls(**settings)
+
+    @classmethod
+    def fixed(cls, delay):
+        """
+        Create scheduler that always waits the same time
+        """
+        return cls(delay, delay, 1, 0)
+
+    def next_delay(self, state=None):
+        """
+        @param state: anything describing the progress of the task,
+        the delay is reset when it differs from the previous one
+        @rtype: float
+        @return: seconds to wait before the next poll
+        """
+        if self.__delay is None or state != self.__last_state:
+            self.__delay = self.initial_delay
+        else:
+            self.__delay = min(self.__delay * self.backoff, self.max_delay)
+        self.__last_state = state
+        return self.__delay * random.uniform(1 - self.jitter, 1 + self.jitter)
+
+    def wait(self, task):
+        """
+        Sleep before the next poll of the task
+        @type task: AsyncTask
+        """
+        state = [(t.get('state'), t.get('progress')) for t in task.get_hashes()]
+        time.sleep(self.next_delay(state))
+
+
+def _poll_scheduler(delay):
+    if delay is None:
+        return PollScheduler.from_config()
+    return PollScheduler.fixed(delay)
+
+
+def wait_for_async_task(task, delay=None, detachable=True):
+    """
+    Wait until the task finishes
+    @type delay: float
+    @param delay: fixed delay between polls, adaptive polling is used when not set
+    @type detachable: bool
+    @param detachable: False when the command can't continue without the task's result,
+    so that it waits even in detached mode
+    @return: final status of the task
+    """
     if not isinstance(task, AsyncTask):
         task = AsyncTask(task)
 
+    task_journal.record(task)
+    if detachable:
+        detach(task)
+    scheduler = _poll_scheduler(delay)
     while task.is_running():
-        time.sleep(delay)
+        scheduler.wait(task)
         task.update()
+        task_journal.update(task)
     return task.get_hashes()
 
 
-def run_async_task_with_status(task, progress_bar, delay=1):
+def run_async_task_with_status(task, progress_bar, delay=None, detachable=True):
+    """
+    Wait until the task finishes and show its progress
+    @type delay: float
+    @param delay: fixed delay between polls, adaptive polling is used when not set
+    @type detachable: bool
+    @param detachable: False when the command can't continue without the task's result,
+    so that it waits even in detached mode
+    @return: final status of the task
+    """
     if not isinstance(task, AsyncTask):
         task = AsyncTask(task)
 
+    task_journal.record(task)
+    if detachable:
+        detach(task)
+    scheduler = _poll_scheduler(delay)
     while task.is_running():
-        time.sleep(delay)
+        scheduler.wait(task)
         task.update()
-        progress_bar.update_progress(task.get_progress())
+        task_journal.update(task)
+        progress_bar.update_task(task)
 
     progress_bar.done()
     return task.get_hashes()
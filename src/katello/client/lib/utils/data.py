@@ -108,6 +108,14 @@ def update_dict_unless_none(d, key, value):
     return d
 
 
+def has_fields(record, fields):
+    """
+    @type fields: list of str or None
+    @return: True when fields are given and the record contains all of them
+    """
+    return fields is not None and all([field in record for field in fields])
+
+
 def slice_dict(orig_dict, *key_list, **kw_args):
     if kw_args.get('allow_none', True):
         return dict((key, orig_dict[key]) for key in key_list if key in orig_dict)
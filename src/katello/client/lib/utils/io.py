@@ -15,7 +15,10 @@
 # in this software or its documentation.
 #
 
+import binascii
+import errno
 import os
+import tempfile
 
 
 def get_abs_path(path):
@@ -29,6 +32,67 @@ def get_abs_path(path):
     return path
 
 
+def write_private_file(path, data):
+    """
+    Replace content of the file atomically, the file is readable by the owner only.
+    The data are written to a unique temporary file in the same directory first,
+    so processes writing the same file at once never mix their content.
+    @type path: string
+    @param path: path of the file, missing directories are created
+    @type data: string
+    @param data: new content of the file
+    """
+    directory = os.path.dirname(path)
+    if not os.path.exists(directory):
+        os.makedirs(directory, 0700)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.' + os.path.basename(path))
+    try:
+        try:
+            os.fchmod(fd, 0600)
+            os.write(fd, data)
+        finally:
+            os.close(fd)
+        os.rename(tmp_path, path)
+    except:
+        os.unlink(tmp_path)
+        raise
+
+
+def read_private_secret(path, size=32):
+    """
+    Read a random secret from the file. When the file doesn't exist yet,
+    it is created with a new secret, readable by the owner only; of several
+    processes creating it at once, all read the secret of the first one.
+    @type path: string
+    @param path: path of the file, missing directories are created
+    @type size: int
+    @param size: number of random bytes of a new secret
+    @rtype: (string, bool)
+    @return: the secret and whether the file was created by this call
+    """
+    created = False
+    if not os.path.exists(path):
+        directory = os.path.dirname(path)
+        if not os.path.exists(directory):
+            os.makedirs(directory, 0700)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.' + os.path.basename(path))
+        try:
+            try:
+                os.fchmod(fd, 0600)
+                os.write(fd, binascii.hexlify(os.urandom(size)))
+            finally:
+                os.close(fd)
+            # unlike rename, link never replaces a secret another process has created
+            os.link(tmp_path, path)
+            created = True
+        except OSError, e:
+            if e.errno != errno.EEXIST:
+                os.unlink(tmp_path)
+                raise
+        os.unlink(tmp_path)
+    return open(path).read().strip(), created
+
+
 def convert_to_mime_type(type_in, default=None):
     available_mime_types = {
         'text': 'text/plain',
@@ -49,12 +113,19 @@ def attachment_file_name(headers, default):
             return default
         if filename[1][0] == '"' or filename[1][0] == "'":
             return filename[1][1:-1]
-        return filename
+        return filename[1]
 
     return default
 
 
-def save_report(report, filename):
-    f = open(filename, 'w')
-    f.write(report)
-    f.close()
+def report_file_opener(default_filename):
+    """
+    Get a function that opens a file for a report being downloaded.
+    The file is named after the response's content disposition header.
+    @type default_filename: string
+    @param default_filename: name used when the response doesn't suggest one
+    @rtype: function
+    """
+    def open_report(headers):
+        return open(attachment_file_name(headers, default_filename), 'wb')
+    return open_report
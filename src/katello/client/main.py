@@ -337,6 +337,10 @@ def setup_admin(katello_cmd, mode=get_katello_mode()):
     if mode == 'katello':
         task_cmd = task.Task()
         task_cmd.add_command('status', task.Status())
+        task_cmd.add_command('wait', task.Wait())
+        task_cmd.add_command('watch', task.Watch())
+        task_cmd.add_command('list', task.List())
+        task_cmd.add_command('resume', task.Resume())
         katello_cmd.add_command('task', task_cmd)
 
     client_cmd = client.Client()
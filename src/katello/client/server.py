@@ -14,24 +14,36 @@
 # in this software or its documentation.
 
 import base64
+import calendar
+import errno
+import hashlib
+import hmac
 import kerberos
 from kerberos import GSSError
 import httplib
 import logging
 import os
+import select
+import socket
+import time
+from Cookie import SimpleCookie, CookieError
 import urllib
+import zlib
 import mimetypes
 import sys
+import threading
 
 try:
     import json
 except ImportError:
     import simplejson as json
 
-from M2Crypto import SSL, httpslib
+from M2Crypto import SSL, httpslib, m2
 
 from katello.client.logutil import getLogger
+from katello.client.lib.executor import Executor
 from katello.client.lib.utils.encoding import u_str
+from katello.client.lib.utils.io import write_private_file
 
 # current active server -------------------------------------------------------
 
@@ -63,6 +75,14 @@ class AuthenticationStrategy(object):
     def connect(self, host, port, protocol):
         return self._get_connection(host, port, protocol)
 
+    def connection_key(self):
+        """
+        Identify connections made by this strategy. Connections are shared
+        only between strategies with equal keys.
+        @rtype: tuple
+        """
+        return (self.__class__.__name__,)
+
 class NoAuthentication(AuthenticationStrategy):
 
     def connect(self, host, port, protocol):
@@ -70,11 +90,23 @@ class NoAuthentication(AuthenticationStrategy):
         return self._get_connection(host, port, protocol)
 
 class BasicAuthentication(AuthenticationStrategy):
+    """
+    @cvar process_secret: key of the connection keys when no secret is given,
+    sessions of such credentials are never recognized by other processes
+    """
+
+    process_secret = base64.b16encode(os.urandom(32))
 
-    def __init__(self, username, password):
+    def __init__(self, username, password, secret=None):
+        """
+        @type secret: string
+        @param secret: random secret of the user the connection key is made with,
+        so that keys saved to disk can't be used to guess the password
+        """
         super(BasicAuthentication, self).__init__()
         self.__username = username
         self.__password = password
+        self.__secret = secret or self.process_secret
 
     def set_headers(self, headers):
         raw = ':'.join((self.__username, self.__password))
@@ -86,9 +118,38 @@ class BasicAuthentication(AuthenticationStrategy):
         self._log.debug('making basic %s connection with: %s, %s' % (protocol, self.__username, self.__password))
         return self._get_connection(host, port, protocol)
 
+    def connection_key(self):
+        # sessions made with other passwords must not be reused, the password itself isn't kept in the key
+        credentials = u_str(':'.join((self.__username, self.__password))).encode('utf-8')
+        digest = hmac.new(self.__secret, credentials, hashlib.sha256)
+        return (self.__class__.__name__, self.__username, digest.hexdigest())
+
+
+class ResumableHTTPSConnection(httpslib.HTTPSConnection):
+    """
+    HTTPS connection that resumes the TLS session of the previous connection
+    made to the same server with the same ssl context, which saves a full
+    handshake.
+    """
+
+    _sessions = {}
+
+    def _session_key(self):
+        return (self.host, self.port, id(self.ssl_ctx))
+
+    def connect(self):
+        self.session = self._sessions.get(self._session_key())
+        httpslib.HTTPSConnection.connect(self)
+        self._sessions[self._session_key()] = self.sock.get_session()
+
 
 class SSLAuthentication(AuthenticationStrategy):
 
+    # TLS 1.0 and newer are negotiated, SSLv2 and SSLv3 are disabled
+    ssl_protocol = 'sslv23'
+
+    __contexts = {}
+
     def __init__(self, certfile, keyfile):
         super(SSLAuthentication, self).__init__()
         self.__certfile = certfile
@@ -103,13 +164,26 @@ class SSLAuthentication(AuthenticationStrategy):
             raise RuntimeError(_('key file %s does not exist or cannot be read')
                                % self.__keyfile)
 
+    def _get_ssl_context(self):
+        # the context is built once per process, with the pem files parsed just once
+        key = (self.__certfile, self.__keyfile)
+        if key not in self.__contexts:
+            ssl_context = SSL.Context(self.ssl_protocol)
+            ssl_context.set_options(m2.SSL_OP_NO_SSLv2 | m2.SSL_OP_NO_SSLv3)
+            ssl_context.set_session_cache_mode(m2.SSL_SESS_CACHE_CLIENT)
+            ssl_context.load_cert(self.__certfile, self.__keyfile)
+            self.__contexts[key] = ssl_context
+        return self.__contexts[key]
+
     def connect(self, host, port, protocol):
         if protocol != "https":
             raise RuntimeError(_("can't authenticate via certificate when not using https connection"))
-        ssl_context = SSL.Context('sslv3')
-        ssl_context.load_cert(self.__certfile, self.__keyfile)
+        ssl_context = self._get_ssl_context()
         self._log.debug('making SSL connection with: %s, %s' % (self.__certfile, self.__keyfile))
-        return httpslib.HTTPSConnection(host, port, ssl_context=ssl_context)
+        return ResumableHTTPSConnection(host, port, ssl_context=ssl_context)
+
+    def connection_key(self):
+        return (self.__class__.__name__, self.__certfile, self.__keyfile)
 
 
 class KerberosAuthentication(AuthenticationStrategy):
@@ -117,11 +191,16 @@ class KerberosAuthentication(AuthenticationStrategy):
     def __init__(self, host):
         super(KerberosAuthentication, self).__init__()
         self.__host = host
+        self.__principal = None
 
-    def set_headers(self, headers):
+    def __client_context(self):
         ctx = kerberos.authGSSClientInit("HTTP@" + self.__host, \
             gssflags=kerberos.GSS_C_DELEG_FLAG|kerberos.GSS_C_MUTUAL_FLAG|kerberos.GSS_C_SEQUENCE_FLAG)[1]
         kerberos.authGSSClientStep(ctx, '')
+        return ctx
+
+    def set_headers(self, headers):
+        ctx = self.__client_context()
         tgt = kerberos.authGSSClientResponse(ctx)
 
         if tgt:
@@ -133,7 +212,553 @@ class KerberosAuthentication(AuthenticationStrategy):
 
     def connect(self, host, port, protocol):
         self._log.debug('making %s https connection with' % protocol)
-        self._get_connection(host, port, protocol)
+        return self._get_connection(host, port, protocol)
+
+    def connection_key(self):
+        # sessions belong to the principal, another one obtained with kinit must not reuse them
+        if self.__principal is None:
+            try:
+                self.__principal = kerberos.authGSSClientUserName(self.__client_context())
+            except GSSError:
+                # without a known principal the key is unique to this instance and no session is shared
+                self.__principal = 'unknown %s' % base64.b16encode(os.urandom(8))
+        return (self.__class__.__name__, self.__principal)
+
+
+# session cookies -------------------------------------------------------------
+
+class CookieJar(object):
+    """
+    Cookies set by the server, replayed in later requests so that the
+    server recognizes the session and the credentials don't have to be
+    verified again.
+
+    Cookies are kept separately for every connection key, so a session
+    is never reused by another user or another server. When a path is
+    given, the cookies are also saved to that file (readable by the owner
+    only) and loaded by later instances.
+
+    Servers that refuse the cookies they have just set don't accept them
+    in place of the credentials. Such servers are remembered for
+    REJECTED_FOR seconds, no cookies are kept for their connection keys
+    meanwhile.
+    """
+
+    # entry recording refusals of the cookies, it's never a valid cookie name
+    REFUSAL = ''
+    REJECTED_FOR = 86400
+
+    def __init__(self, path=None):
+        self.path = path
+        self.__cookies = {}
+        self.__lock = threading.RLock()
+        self.__load()
+
+    @classmethod
+    def __jar_key(cls, key):
+        return ' '.join([str(k) for k in key])
+
+    def header(self, key):
+        """
+        @type key: tuple
+        @param key: connection key
+        @rtype: string
+        @return: value for the Cookie header or None if there are no cookies
+        """
+        if self.rejected(key):
+            return None
+        with self.__lock:
+            cookies = self.__cookies.get(self.__jar_key(key), {}).items()
+        now = time.time()
+        values = ['%s=%s' % (name, value) for name, (value, expires) in sorted(cookies)
+            if name != self.REFUSAL and (expires is None or expires > now)]
+        return '; '.join(values) or None
+
+    def __refusal(self, key):
+        return self.__cookies.get(self.__jar_key(key), {}).get(self.REFUSAL)
+
+    def rejected(self, key):
+        """
+        @rtype: boolean
+        @return: True when the server recently refused cookies of the connection key repeatedly
+        """
+        with self.__lock:
+            refusal = self.__refusal(key)
+        return refusal is not None and refusal[0] == 'rejected' and refusal[1] > time.time()
+
+    def refuse(self, key):
+        """
+        Forget cookies of the connection key the server has refused, eg. because
+        the session has expired. When the server refuses the cookies it sets next
+        as well, it doesn't take cookies in place of the credentials and no cookies
+        are kept for the key for REJECTED_FOR seconds.
+        """
+        with self.__lock:
+            refusal = self.__refusal(key)
+            if refusal is not None and refusal[0] == 'refused':
+                refusal = ('rejected', time.time() + self.REJECTED_FOR)
+            else:
+                refusal = ('refused', None)
+            self.__cookies[self.__jar_key(key)] = {self.REFUSAL: refusal}
+            self.__save()
+
+    def accept(self, key):
+        """
+        Forget refusals of the connection key, the server has accepted its cookies
+        """
+        with self.__lock:
+            if self.__cookies.get(self.__jar_key(key), {}).pop(self.REFUSAL, None) is not None:
+                self.__save()
+
+    def update(self, key, response):
+        """
+        Store cookies the response sets
+        @type key: tuple
+        @param key: connection key
+        @type response: HTTPResponse
+        @param response: http response
+        """
+        headers = response.msg.getallmatchingheaders('set-cookie')
+        if not headers or self.rejected(key):
+            return
+        with self.__lock:
+            cookies = self.__cookies.setdefault(self.__jar_key(key), {})
+            changed = False
+            for header in headers:
+                parsed = SimpleCookie()
+                try:
+                    parsed.load(header.split(':', 1)[1].strip())
+                except CookieError:
+                    continue
+                for name, morsel in parsed.items():
+                    expires = self.__expiration(morsel)
+                    if not morsel.value or (expires is not None and expires <= time.time()):
+                        changed = cookies.pop(name, None) is not None or changed
+                    elif cookies.get(name) != (morsel.value, expires):
+                        cookies[name] = (morsel.value, expires)
+                        changed = True
+            if changed:
+                self.__save()
+
+    def clear(self, key):
+        """
+        Forget cookies stored for the connection key
+        """
+        with self.__lock:
+            if self.__cookies.pop(self.__jar_key(key), None) is not None:
+                self.__save()
+
+    @classmethod
+    def __expiration(cls, morsel):
+        if morsel['max-age']:
+            try:
+                return time.time() + int(morsel['max-age'])
+            except ValueError:
+                return None
+        if morsel['expires']:
+            try:
+                return calendar.timegm(time.strptime(morsel['expires'], '%a, %d-%b-%Y %H:%M:%S GMT'))
+            except ValueError:
+                try:
+                    return calendar.timegm(time.strptime(morsel['expires'], '%a, %d %b %Y %H:%M:%S GMT'))
+                except ValueError:
+                    return None
+        return None
+
+    def __load(self):
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            stored = json.load(open(self.path))
+            for jar_key, cookies in stored.items():
+                self.__cookies[jar_key] = dict((name, tuple(cookie)) for name, cookie in cookies.items())
+        except (IOError, ValueError, TypeError, AttributeError):
+            self.__cookies = {}
+
+    def __save(self):
+        if not self.path:
+            return
+        write_private_file(self.path, json.dumps(self.__cookies))
+
+
+# response cache --------------------------------------------------------------
+
+class CacheEntry(object):
+    """
+    Response stored in the L{HttpCache}
+    @ivar key: cache key of the request
+    @ivar etag: value of the ETag header
+    @ivar last_modified: value of the Last-Modified header
+    @ivar headers: list of the response headers
+    @ivar body: raw response body
+    """
+
+    def __init__(self, key, etag=None, last_modified=None, headers=None, body=None):
+        self.key = key
+        self.etag = etag
+        self.last_modified = last_modified
+        self.headers = headers or []
+        self.body = body
+
+    def conditional_headers(self):
+        """
+        @rtype: dict
+        @return: headers asking the server to send the resource only if it
+        has changed since the entry was stored
+        """
+        headers = {}
+        if self.etag:
+            headers['If-None-Match'] = self.etag
+        if self.last_modified:
+            headers['If-Modified-Since'] = self.last_modified
+        return headers
+
+
+class HttpCache(object):
+    """
+    On-disk cache of GET responses that carry an ETag or Last-Modified
+    validator. Cached responses are always revalidated with a conditional
+    request; the body is only reused when the server answers 304.
+
+    Every entry is kept in two files, the metadata and the body. The least
+    recently used entries are removed once the cache grows over max_size
+    bytes.
+    """
+
+    def __init__(self, path, max_size=50 * 1048576):
+        self.path = path
+        self.max_size = max_size
+        self.__lock = threading.Lock()
+
+    @classmethod
+    def key(cls, url, headers, user_key):
+        """
+        @type url: string
+        @param url: request url including the query
+        @type headers: dict
+        @param headers: request headers
+        @type user_key: tuple
+        @param user_key: connection key identifying the server and the user
+        @rtype: string
+        """
+        parts = [str(k) for k in user_key] + [url, headers.get('Accept', ''), headers.get('Accept-Language', '')]
+        return hashlib.sha1('\n'.join([u_str(part).encode('utf-8') for part in parts])).hexdigest()
+
+    def __file(self, key, suffix):
+        return os.path.join(self.path, key + suffix)
+
+    def lookup(self, key):
+        """
+        @rtype: CacheEntry
+        @return: the stored entry or None when there is no entry for the key
+        """
+        try:
+            meta = json.load(open(self.__file(key, '.meta')))
+            body = open(self.__file(key, '.body'), 'rb').read()
+            # mark the entry as recently used
+            os.utime(self.__file(key, '.meta'), None)
+        except (IOError, OSError, ValueError):
+            return None
+        return CacheEntry(key, meta.get('etag'), meta.get('last_modified'),
+            [tuple(header) for header in meta.get('headers', [])], body)
+
+    def store(self, key, headers, body):
+        """
+        Store the response, when it has a validator
+        @type headers: [(string, string)]
+        @param headers: response headers
+        @type body: string
+        @param body: raw response body
+        """
+        header_dict = dict(headers)
+        etag = header_dict.get('etag')
+        last_modified = header_dict.get('last-modified')
+        if not (etag or last_modified) or len(body) > self.max_size \
+            or 'no-store' in header_dict.get('cache-control', ''):
+            return
+        meta = {
+            'etag': etag,
+            'last_modified': last_modified,
+            'headers': [(name, value) for name, value in headers
+                if name not in ('content-encoding', 'content-length', 'transfer-encoding', 'set-cookie')]
+        }
+        with self.__lock:
+            try:
+                write_private_file(self.__file(key, '.body'), body)
+                write_private_file(self.__file(key, '.meta'), json.dumps(meta))
+                self.__evict()
+            except (IOError, OSError), e:
+                getLogger('katello').debug("can't store response in the cache: %s" % e)
+
+    def __evict(self):
+        entries = []
+        total = 0
+        for name in os.listdir(self.path):
+            if not name.endswith('.meta'):
+                continue
+            key = name[:-len('.meta')]
+            try:
+                used = os.stat(self.__file(key, '.meta')).st_mtime
+                size = os.stat(self.__file(key, '.body')).st_size
+            except OSError:
+                continue
+            entries.append((used, size, key))
+            total += size
+
+        entries.sort()
+        for used, size, key in entries:
+            if total <= self.max_size:
+                break
+            for suffix in ('.meta', '.body'):
+                try:
+                    os.remove(self.__file(key, suffix))
+                except OSError, e:
+                    if e.errno != errno.ENOENT:
+                        raise
+            total -= size
+
+    def clear(self):
+        """
+        Remove all cached responses
+        """
+        with self.__lock:
+            if not os.path.exists(self.path):
+                return
+            for name in os.listdir(self.path):
+                if name.endswith('.meta') or name.endswith('.body'):
+                    os.remove(os.path.join(self.path, name))
+
+
+# connection pooling ----------------------------------------------------------
+
+class ConnectionPool(object):
+    """
+    Keeps idle HTTP/1.1 connections open so that subsequent requests
+    to the same server skip the TCP and TLS handshakes.
+
+    Connections are keyed by (host, port, protocol, authentication key).
+    The pool is thread safe, every thread works with its own connection.
+    A connection is checked out with L{acquire} and must be handed back
+    with L{release} once its response has been read completely, or
+    thrown away with L{discard} when it can't be reused.
+    """
+
+    def __init__(self, max_idle=4):
+        self.max_idle = max_idle
+        self.__idle = {}
+        self.__lock = threading.Lock()
+
+    def acquire(self, key, factory):
+        """
+        Get an idle connection for the key or create a new one
+        @type key: tuple
+        @param key: connection key
+        @type factory: callable
+        @param factory: function creating a new connection
+        @rtype: (HTTPConnection, boolean)
+        @return: tuple of the connection and a flag telling whether the
+        connection was reused
+        """
+        while True:
+            with self.__lock:
+                idle = self.__idle.get(key)
+                connection = idle.pop() if idle else None
+            if connection is None:
+                return (factory(), False)
+            if self.is_open(connection):
+                return (connection, True)
+            self.discard(connection)
+
+    @classmethod
+    def is_open(cls, connection):
+        """
+        Check that the server hasn't closed the idle connection. A closed
+        connection becomes readable, it would return the end of the stream.
+        @rtype: boolean
+        """
+        sock = getattr(connection, 'sock', None)
+        if sock is None:
+            return True
+        try:
+            return not select.select([sock], [], [], 0)[0]
+        except (select.error, socket.error, ValueError, TypeError):
+            return False
+
+    def release(self, key, connection):
+        """
+        Return a connection to the pool for later reuse
+        """
+        with self.__lock:
+            idle = self.__idle.setdefault(key, [])
+            if len(idle) < self.max_idle:
+                idle.append(connection)
+                return
+        self.discard(connection)
+
+    @classmethod
+    def discard(cls, connection):
+        """
+        Close a connection that can't be reused
+        """
+        try:
+            connection.close()
+            # M2Crypto's HTTPSConnection.close() leaves the socket open
+            if getattr(connection, 'sock', None) is not None:
+                connection.sock.close()
+        except (socket.error, httplib.HTTPException, SSL.SSLError):
+            pass
+
+    def clear(self):
+        """
+        Close all idle connections
+        """
+        with self.__lock:
+            connections = sum(self.__idle.values(), [])
+            self.__idle.clear()
+        for connection in connections:
+            self.discard(connection)
+
+
+# response compression --------------------------------------------------------
+
+class ContentDecoder(object):
+    """
+    Incremental decoder of gzip or deflate encoded response bodies
+    """
+
+    def __init__(self, encoding):
+        self.__decompressor = None
+        # deflate data come with or without the zlib header, the first
+        # two bytes decide which decompressor reads them
+        self.__head = None
+        if encoding in ('gzip', 'x-gzip'):
+            self.__decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+        else:
+            self.__head = ''
+
+    @classmethod
+    def _has_zlib_header(cls, data):
+        cmf, flg = ord(data[0]), ord(data[1])
+        return cmf & 0x0f == zlib.DEFLATED and (cmf * 256 + flg) % 31 == 0
+
+    def __start(self, data):
+        if len(data) >= 2 and self._has_zlib_header(data):
+            self.__decompressor = zlib.decompressobj()
+        else:
+            # some servers send deflate data without the zlib header
+            self.__decompressor = zlib.decompressobj(-zlib.MAX_WBITS)
+        self.__head = None
+
+    def decompress(self, data):
+        if self.__head is not None:
+            data = self.__head + data
+            if len(data) < 2:
+                self.__head = data
+                return ''
+            self.__start(data)
+        return self.__decompressor.decompress(data)
+
+    def flush(self):
+        if self.__head is not None:
+            data = self.__head
+            self.__start(data)
+            return self.__decompressor.decompress(data) + self.__decompressor.flush()
+        return self.__decompressor.flush()
+
+
+def gzip_compress(data):
+    """
+    @type data: string
+    @rtype: string
+    @return: data in the gzip format
+    """
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    return compressor.compress(data) + compressor.flush()
+
+
+# multipart requests ----------------------------------------------------------
+
+class MultipartBody(object):
+    """
+    File-like multipart/form-data request body. Parts are produced as
+    httplib reads the body, so files are sent to the socket in chunks
+    and never loaded into memory as a whole. The length is known up
+    front, so the Content-Length header can be set.
+
+    @ivar progress: optional callback called with the number of bytes
+    sent so far and the total size after every chunk
+    """
+
+    def __init__(self, parts, progress=None):
+        """
+        @type parts: list of strings and files
+        @param parts: parts of the body in the order they are sent
+        """
+        self.progress = progress
+        self.__parts = []
+        self.__size = 0
+        for part in parts:
+            if isinstance(part, file):
+                offset = part.tell()
+                size = os.fstat(part.fileno()).st_size - offset
+            else:
+                offset = 0
+                size = len(part)
+            self.__parts.append((part, offset))
+            self.__size += size
+        self.__index = 0
+        self.__position = 0
+        self.__sent = 0
+
+    def __len__(self):
+        return self.__size
+
+    def __str__(self):
+        return '<multipart body of %d bytes>' % self.__size
+
+    def seek(self, position):
+        """
+        Rewind the body, only seeking to the beginning is supported
+        """
+        assert position == 0
+        self.__index = 0
+        self.__position = 0
+        self.__sent = 0
+
+    def read(self, size=-1):
+        chunks = []
+        while self.__index < len(self.__parts) and size != 0:
+            part, offset = self.__parts[self.__index]
+            if isinstance(part, file):
+                part.seek(offset + self.__position)
+                chunk = part.read(size) if size > 0 else part.read()
+            elif size > 0:
+                chunk = part[self.__position:self.__position + size]
+            else:
+                chunk = part[self.__position:]
+
+            if not chunk:
+                self.__index += 1
+                self.__position = 0
+                continue
+            self.__position += len(chunk)
+            if size > 0:
+                size -= len(chunk)
+            chunks.append(chunk)
+
+        data = ''.join(chunks)
+        self.__sent += len(data)
+        if data and self.progress:
+            self.progress(self.__sent, self.__size)
+        return data
+
+
+# errors of reused connections the server has closed in the meantime
+STALE_CONNECTION_ERRORS = (socket.error, httplib.BadStatusLine, httplib.CannotSendRequest,
+    httplib.ResponseNotReady, SSL.SSLError)
+
+# requests that can be sent again when the response was lost, without repeating their effect
+IDEMPOTENT_METHODS = ('GET', 'HEAD')
 
 
 # base server class -----------------------------------------------------------
@@ -158,11 +783,25 @@ class KatelloServer(object):
     @ivar protocol: protocol the katello server is using (http, https)
     @ivar path_prefix: mount point of the katello api (/katello/api)
     @ivar headers: dictionary of http headers to send in requests
+    @ivar cookies: L{CookieJar} with the session cookies
+    @ivar executor: L{Executor} running requests passed to L{submit} and L{map}
+    @ivar compress_requests: gzip json bodies larger than L{COMPRESS_MIN_SIZE} bytes;
+    the server has to accept gzip encoded requests
+    @ivar cache: optional L{HttpCache} of GET responses
+    @cvar pool: L{ConnectionPool} shared by all server instances
+
+    Requests don't modify the server's state, so one instance can be used
+    from several threads at once.
     """
     auth_method = NoAuthentication()
+    pool = ConnectionPool()
+
+    READ_CHUNK_SIZE = 65536
+    COMPRESS_MIN_SIZE = 16384
 
     #---------------------------------------------------------------------------
-    def __init__(self, host, port=443, protocol='https', path_prefix='', accept_lang=None):
+    def __init__(self, host, port=443, protocol='https', path_prefix='', accept_lang=None, cookies=None,
+        max_workers=4):
         assert protocol in ('http', 'https')
 
         self.host = host
@@ -170,9 +809,17 @@ class KatelloServer(object):
         self.protocol = protocol
         self.path_prefix = path_prefix
         self.headers = {}
+        self.cookies = cookies or CookieJar()
+        self.executor = Executor(max_workers)
+        self.compress_requests = False
+        self.cache = None
+        # functions called with method and path after every request that can change data
+        self.change_listeners = []
 
         default_headers = {'Accept': 'application/json',
+                           'Accept-Encoding': 'gzip, deflate',
                            'content-type': 'application/json',
+                           'Connection': 'keep-alive',
                            'User-Agent': 'katello-cli/0.1'}
         self.headers.update(default_headers)
 
@@ -188,12 +835,37 @@ class KatelloServer(object):
     # protected server connection methods -------------------------------------
 
     def _connect(self):
-        # make an appropriate connection to the server and cache it
+        # make an appropriate connection to the server
         return self.auth_method.connect(self.host, self.port, self.protocol)
 
-    def _set_auth_headers(self):
+    def _connection_key(self):
+        return (self.host, self.port, self.protocol) + self.auth_method.connection_key()
+
+    def close(self):
+        """
+        Close all idle connections kept open for reuse.
+        """
+        self.pool.clear()
+
+    def shutdown(self):
+        """
+        Stop the worker threads of the executor once they finish the requests
+        already submitted and close the idle connections. Meant for servers
+        that are being replaced, eg. by the next command of the shell.
+        """
+        self.executor.shutdown()
+        self.close()
+
+    def _set_auth_headers(self, headers):
+        session = self.cookies.header(self._connection_key())
+        if session:
+            # the server knows us from an earlier request, skip the authentication
+            headers.pop('Authorization', None)
+            headers['Cookie'] = session
+            return
+        headers.pop('Cookie', None)
         try:
-            self.auth_method.set_headers(self.headers)
+            self.auth_method.set_headers(headers)
         except GSSError, e:
             #TODO
             raise Exception(_("Missing credentials and unable to authenticate using Kerberos"), e), \
@@ -225,87 +897,257 @@ class KatelloServer(object):
         return path
 
 
-    def _request(self, method, path, queries=None, body=None, multipart=False, custom_headers=None):
+    def _request(self, method, path, queries=None, body=None, multipart=False, custom_headers=None,
+        progress=None, output=None):
         if queries is None:
             queries = {}
         if custom_headers is None:
             custom_headers = {}
         # make a request to the server and return the response
-        connection = self._connect()
         url = self._build_url(path, queries)
 
-        content_type, body = self._prepare_body(body, multipart)
+        content_type, body = self._prepare_body(body, multipart, None if output else progress)
+        response_options = {'output': output, 'progress': progress}
 
-        self.headers['content-type']   = content_type
-        self.headers['content-length'] = str(len(body) if body else 0)
-        self._set_auth_headers()
+        headers = dict(self.headers)
+        headers['content-type']   = content_type
+        self._set_auth_headers(headers)
 
         if body:
             self._log.debug("sending %s request to %s\n%s" % (method, url, body))
         else:
             self._log.debug("sending empty %s request to %s" % (method, url))
 
-        connection.request(method, url, body=body, headers=dict(self.headers.items() + custom_headers.items()))
-        return self._process_response(connection.getresponse())
+        if self.compress_requests and not multipart and isinstance(body, str) \
+            and len(body) > self.COMPRESS_MIN_SIZE:
+            body = gzip_compress(body)
+            headers['Content-Encoding'] = 'gzip'
+        headers['content-length'] = str(len(body) if body else 0)
+
+        if self.cache and method == 'GET' and output is None:
+            cache_key = HttpCache.key(url, dict(headers.items() + custom_headers.items()), self._connection_key())
+            cache_entry = self.cache.lookup(cache_key) or CacheEntry(cache_key)
+            response_options['cache_entry'] = cache_entry
+            custom_headers = dict(custom_headers.items() + cache_entry.conditional_headers().items())
+
+        try:
+            try:
+                result = self._send_request(method, url, body, dict(headers.items() + custom_headers.items()),
+                    response_options)
+                if 'Cookie' in headers:
+                    self.cookies.accept(self._connection_key())
+                return result
+            except ServerRequestError, e:
+                if e.args[0] != 401 or 'Cookie' not in headers:
+                    raise
+                # the session has expired, authenticate again
+                self._log.debug("session is no longer valid, sending credentials")
+                self.cookies.refuse(self._connection_key())
+                self._set_auth_headers(headers)
+                return self._send_request(method, url, body, dict(headers.items() + custom_headers.items()),
+                    response_options)
+        finally:
+            if method != 'GET':
+                for listener in self.change_listeners:
+                    listener(method, path)
+
+    def _send_request(self, method, url, body, headers, response_options=None):
+        key = self._connection_key()
+        connection, reused = self.pool.acquire(key, self._connect)
+        sent = False
+        try:
+            self._write(connection, method, url, body, headers)
+            sent = True
+            response = connection.getresponse()
+        except STALE_CONNECTION_ERRORS:
+            self.pool.discard(connection)
+            # the server may have processed a request it has received completely,
+            # only reads are repeated then
+            if not reused or (sent and method not in IDEMPOTENT_METHODS):
+                raise
+            # the server has closed the idle connection, try once more over a fresh one
+            self._log.debug("reconnecting, kept-alive connection is no longer usable")
+            connection = self._connect()
+            try:
+                response = self._send(connection, method, url, body, headers)
+            except:  # pylint: disable=W0702
+                self.pool.discard(connection)
+                raise
+
+        try:
+            if response.status < 300:
+                self.cookies.update(key, response)
+            return self._process_response(response, **(response_options or {}))
+        finally:
+            if response.will_close or not response.isclosed():
+                self.pool.discard(connection)
+            else:
+                self.pool.release(key, connection)
+
+    @classmethod
+    def _write(cls, connection, method, url, body, headers):
+        if hasattr(body, 'seek'):
+            body.seek(0)
+        connection.request(method, url, body=body, headers=headers)
 
+    @classmethod
+    def _send(cls, connection, method, url, body, headers):
+        cls._write(connection, method, url, body, headers)
+        return connection.getresponse()
 
 
-    def _prepare_body(self, body, multipart):
+    def _prepare_body(self, body, multipart, progress=None):
         """
         Encode body according to needs as json or multipart
         @type body: any
         @param body: data to encode
         @type multipart: boolean
         @param multipart: set True for multipart requests
-        @rtype: (string, string)
+        @type progress: callable
+        @param progress: upload progress callback for multipart requests
+        @rtype: (string, string or MultipartBody)
         @return: tuple of the content type and the encoded body
         """
         content_type = 'application/json'
 
         if multipart:
             content_type, body = self._encode_multipart_formdata(body)
+            body.progress = progress
         elif not isinstance(body, (type(None), file)):
             body = json.dumps(body)
 
         return (content_type, body)
 
 
-    def _process_response(self, response):
+    def _process_response(self, response, output=None, progress=None, cache_entry=None):
         """
         Try to parse the response
         @type response: HTTPResponse
         @param response: http response
-        @rtype: (int, string)
-        @return: tuple of the response status and response body
+        @type output: file or callable
+        @param output: when set, a successful response body is copied to this file
+        instead of being parsed, see L{GET}
+        @type progress: callable
+        @param progress: download progress callback used with output
+        @type cache_entry: CacheEntry
+        @param cache_entry: cached response the request was made conditional on,
+        the response is stored under its key
+        @rtype: (int, dict or None or str, [(string, string)])
+        @return: tuple of the response status, the parsed response body
+        and the response headers
         """
-        response_body = response.read()
+        if output is not None and response.status < 300:
+            self._copy_body(response, output, progress)
+            self._log.debug("processing response %s of %s, body written to a file"
+                % (response.status, response.getheader('content-type')))
+            return (response.status, None, response.getheaders())
+
+        status = response.status
+        headers = response.getheaders()
+        if cache_entry is not None and cache_entry.body is not None and status == httplib.NOT_MODIFIED:
+            response.read()
+            self._log.debug("resource not modified, using the cached response")
+            status, headers, response_body = httplib.OK, cache_entry.headers, cache_entry.body
+        else:
+            response_body = self._read_body(response)
+            if cache_entry is not None and status == httplib.OK:
+                self.cache.store(cache_entry.key, headers, response_body)
+
+        content_type = dict(headers).get('content-type')
         try:
             response_body = json.loads(response_body, encoding='utf-8')
         except ValueError:
-            content_type = response.getheader('content-type')
             if content_type and (content_type.startswith('text/') or content_type.startswith('application/json')):
                 response_body = u_str(response_body)
             else:
                 pass
 
         if response_body and self._log.isEnabledFor(logging.DEBUG):
-            content_type = response.getheader('content-type')
             if content_type and (content_type.startswith('text/') or content_type.startswith('application/json')):
-                self._log.debug("processing response %s\n%s" % (response.status, u_str(response_body)))
+                self._log.debug("processing response %s\n%s" % (status, u_str(response_body)))
             else:
-                self._log.debug("processing response %s of %s" % (response.status, content_type))
+                self._log.debug("processing response %s of %s" % (status, content_type))
         else:
-            self._log.debug("processing empty response %s" % (response.status))
+            self._log.debug("processing empty response %s" % (status))
 
-        if response.status >= 300:
+        if status >= 300:
             # if the server has responded with a python traceback
             # try to split it out
             if isinstance(response_body, basestring) and not response_body.startswith('<html'): # pylint: disable=E1103
                 response_body += "\n"
                 message, traceback = response_body.split('\n', 1)
-                raise ServerRequestError(response.status, message.strip(), traceback.strip())
-            raise ServerRequestError(response.status, response_body, None)
-        return (response.status, response_body, response.getheaders())
+                raise ServerRequestError(status, message.strip(), traceback.strip())
+            raise ServerRequestError(status, response_body, None)
+        return (status, response_body, headers)
+
+
+    def _iter_body(self, response, progress=None):
+        """
+        Read the response body in chunks, decompressing it when it's encoded
+        @type response: HTTPResponse
+        @param response: http response
+        @type progress: callable
+        @param progress: called with the number of bytes received and the
+        content length (None when unknown) after every chunk
+        @rtype: generator of strings
+        """
+        encoding = (response.getheader('content-encoding') or '').strip().lower()
+        decoder = None
+        if encoding in ('gzip', 'x-gzip', 'deflate'):
+            decoder = ContentDecoder(encoding)
+        try:
+            total = int(response.getheader('content-length'))
+        except (TypeError, ValueError):
+            total = None
+
+        received = 0
+        while True:
+            chunk = response.read(self.READ_CHUNK_SIZE)
+            if not chunk:
+                break
+            received += len(chunk)
+            if progress:
+                progress(received, total)
+            if decoder:
+                chunk = decoder.decompress(chunk)
+            yield chunk
+        if decoder:
+            yield decoder.flush()
+
+    def _read_body(self, response):
+        """
+        Read the whole response body, decompressing it when it's encoded
+        @type response: HTTPResponse
+        @param response: http response
+        @rtype: string
+        """
+        encoding = (response.getheader('content-encoding') or '').strip().lower()
+        if encoding not in ('gzip', 'x-gzip', 'deflate'):
+            return response.read()
+        return ''.join(self._iter_body(response))
+
+    def _copy_body(self, response, output, progress=None):
+        """
+        Copy the response body to a file in chunks
+        @type response: HTTPResponse
+        @param response: http response
+        @type output: file or callable
+        @param output: file to write to or a function returning a file
+        for the list of response headers, such file is closed afterwards
+        @type progress: callable
+        @param progress: download progress callback
+        """
+        if callable(output):
+            output_file = output(response.getheaders())
+        else:
+            output_file = output
+        try:
+            for chunk in self._iter_body(response, progress):
+                output_file.write(chunk)
+            output_file.flush()
+        finally:
+            if output_file is not output:
+                output_file.close()
 
 
     def _flatten_to_multipart(self, key, data):
@@ -352,35 +1194,35 @@ class KatelloServer(object):
         Encode data for httplib request
         @type data: any
         @param data: data to encode for the request
-        @rtype: (string, string)
+        @rtype: (string, MultipartBody)
         @return: tuple of the content type and encoded data
         """
         fields = self._flatten_to_multipart(None, data)
 
         boundary = '----------BOUNDARY_$'
-        lines = []
+        parts = []
 
         for (key, value) in fields:
             if isinstance(value, (file)):
                 filename = value.name
-                content  = value.read()
 
-                lines.append('--' + boundary)
-                lines.append('Content-Disposition: form-data; name="%s"; filename="%s"' % (str(key), str(filename)))
-                lines.append('Content-Type: %s' % self._get_content_type(filename))
-                lines.append('')
-                lines.append(content)
+                parts.append('--' + boundary + '\r\n')
+                parts.append('Content-Disposition: form-data; name="%s"; filename="%s"\r\n' % (str(key), str(filename)))
+                parts.append('Content-Type: %s\r\n' % self._get_content_type(filename))
+                parts.append('\r\n')
+                parts.append(value)
+                parts.append('\r\n')
             else:
-                lines.append('--' + boundary)
-                lines.append('Content-Disposition: form-data; name="%s"' % str(key))
-                lines.append('')
-                lines.append(value)
-        lines.append('--' + boundary + '--')
-        lines.append('')
-
-        body = '\r\n'.join(lines)
+                if isinstance(value, unicode):
+                    value = value.encode('utf-8')
+                parts.append('--' + boundary + '\r\n')
+                parts.append('Content-Disposition: form-data; name="%s"\r\n' % str(key))
+                parts.append('\r\n')
+                parts.append(str(value) + '\r\n')
+        parts.append('--' + boundary + '--\r\n')
+
         content_type = 'multipart/form-data; boundary=%s' % boundary
-        return content_type, body
+        return content_type, MultipartBody(parts)
 
 
     @classmethod
@@ -402,13 +1244,14 @@ class KatelloServer(object):
         Send a DELETE request to the katello server.
         @type path: str
         @param path: path of the resource to delete
-        @rtype: (int, dict or None or str)
-        @return: tuple of the http response status and the response body
+        @rtype: (int, dict or None or str, [(string, string)])
+        @return: tuple of the http response status, the response body
+        and the response headers
         @raise ServerRequestError: if the request fails
         """
         return self._request('DELETE', path, body=body)
 
-    def GET(self, path, queries=None, custom_headers=None):
+    def GET(self, path, queries=None, custom_headers=None, output=None, progress=None):
         """
         Send a GET request to the katello server.
         @type path: str
@@ -418,24 +1261,35 @@ class KatelloServer(object):
                         query parameters in the request
         @type custom_headers: dict or iterable of tuple pairs
         @param custom_headers: custom headers
-        @rtype: (int, dict or None or str)
-        @return: tuple of the http response status and the response body
+        @type output: file or callable
+        @param output: (optional) file the response body is copied to in chunks,
+                       or a function returning such file for the list of
+                       response headers; the body is not kept in memory then
+                       and None is returned in its place
+        @type progress: callable
+        @param progress: (optional) called with the number of bytes received and
+                         the content length (None if unknown) while copying to output
+        @rtype: (int, dict or None or str, [(string, string)])
+        @return: tuple of the http response status, the response body
+        and the response headers
         @raise ServerRequestError: if the request fails
         """
-        return self._request('GET', path, queries, custom_headers=custom_headers)
+        return self._request('GET', path, queries, custom_headers=custom_headers, output=output,
+            progress=progress)
 
     def HEAD(self, path):
         """
         Send a HEAD request to the katello server.
         @type path: str
         @param path: path of the resource to check
-        @rtype: (int, dict or None or str)
-        @return: tuple of the http response status and the response body
+        @rtype: (int, dict or None or str, [(string, string)])
+        @return: tuple of the http response status, the response body
+        and the response headers
         @raise ServerRequestError: if the request fails
         """
         return self._request('HEAD', path)
 
-    def POST(self, path, body=None, multipart=False, custom_headers=None):
+    def POST(self, path, body=None, multipart=False, custom_headers=None, progress=None):
         """
         Send a POST request to the katello server.
         @type path: str
@@ -446,13 +1300,18 @@ class KatelloServer(object):
         @param multipart: set True for multipart posts
         @type custom_headers: dict or iterable of tuple pairs
         @param custom_headers: custom headers
-        @rtype: (int, dict or None or str)
-        @return: tuple of the http response status and the response body
+        @type progress: callable
+        @param progress: (optional) called with the number of bytes sent and
+                         the total size while uploading a multipart body
+        @rtype: (int, dict or None or str, [(string, string)])
+        @return: tuple of the http response status, the response body
+        and the response headers
         @raise ServerRequestError: if the request fails
         """
-        return self._request('POST', path, body=body, multipart=multipart, custom_headers=custom_headers)
+        return self._request('POST', path, body=body, multipart=multipart, custom_headers=custom_headers,
+            progress=progress)
 
-    def PUT(self, path, body, multipart=False, custom_headers=None):
+    def PUT(self, path, body, multipart=False, custom_headers=None, progress=None):
         """
         Send a PUT request to the katello server.
         @type path: str
@@ -463,8 +1322,47 @@ class KatelloServer(object):
         @param multipart: set True for multipart puts
         @type custom_headers: dict or iterable of tuple pairs
         @param custom_headers: custom headers
-        @rtype: (int, dict or None or str)
-        @return: tuple of the http response status and the response body
+        @type progress: callable
+        @param progress: (optional) called with the number of bytes sent and
+                         the total size while uploading a multipart body
+        @rtype: (int, dict or None or str, [(string, string)])
+        @return: tuple of the http response status, the response body
+        and the response headers
         @raise ServerRequestError: if the request fails
         """
-        return self._request('PUT', path, body=body, multipart=multipart, custom_headers=custom_headers)
+        return self._request('PUT', path, body=body, multipart=multipart, custom_headers=custom_headers,
+            progress=progress)
+
+    # concurrent requests -----------------------------------------------------
+
+    def submit(self, method, path, **kwargs):
+        """
+        Send a request in a worker thread of the server's executor.
+        @type method: str
+        @param method: name of the request method (GET, POST, PUT, DELETE, HEAD)
+        @type path: str
+        @param path: path of the resource
+        @param kwargs: other arguments of the request method
+        @rtype: Future
+        @return: future of the tuple of the http response status, the response body
+        and the response headers
+        """
+        return self.executor.submit(getattr(self, method.upper()), path, **kwargs)
+
+    def map(self, requests):
+        """
+        Send independent requests concurrently and wait for all of them.
+        Errors are captured for each request separately.
+        @type requests: iterable of (method, path) or (method, path, kwargs) tuples
+        @param requests: requests to send
+        @rtype: [Future]
+        @return: finished futures in the order of the requests
+        """
+        futures = []
+        for request in requests:
+            method, path = request[:2]
+            kwargs = request[2] if len(request) > 2 else {}
+            futures.append(self.submit(method, path, **kwargs))
+        for future in futures:
+            future.wait()
+        return futures
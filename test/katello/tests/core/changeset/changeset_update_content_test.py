@@ -0,0 +1,99 @@
+import os
+
+from katello.tests.core.action_test_utils import CLIActionTestCase
+from katello.tests.core.organization.organization_data import ENVS
+
+import katello.client.core.changeset
+from katello.client.core.changeset import UpdateContent
+from katello.client.server import ServerRequestError
+
+
+class ChangesetUpdateContentTest(CLIActionTestCase):
+
+    CSET = {'id': 1, 'action_type': 'promotion'}
+    PRODUCT = {'id': 10, 'name': 'product'}
+
+    OPTIONS = {
+        'org': 'org',
+        'name': 'changeset1',
+        'environment': ENVS[1]['name']
+    }
+
+    def setUp(self):
+        self.set_action(UpdateContent())
+        self.set_module(katello.client.core.changeset)
+        self.mock_printer()
+        self.mock_options(self.OPTIONS)
+
+        self.mock(self.module, 'get_changeset', self.CSET)
+        self.mock(self.module, 'get_environment', ENVS[1])
+        self.mock(self.module, 'get_product', self.PRODUCT)
+        self.mock(self.action.api, 'update')
+        self.mock(self.action.api, 'update_content')
+        self.mock(self.action.api, 'add_content')
+        self.mock(self.action.api, 'remove_content')
+        self.mock(self.action.api, 'changeset', {'id': 1, 'errata': [],
+            'packages': [{'name': 'pkg', 'display_name': 'pkg-1.0-1.noarch', 'product_id': 10}]})
+
+        self.action.reset_items()
+        for i in range(5):
+            self.action.items['add_erratum'].append({'name': 'RHSA-%d' % i, 'product': 'product'})
+        self.action.items['remove_package'].append({'name': 'pkg', 'product': 'product'})
+
+    def tearDown(self):
+        self.restore_mocks()
+
+    def test_it_sends_all_changes_in_one_request(self):
+        self.run_action(os.EX_OK)
+        patch = self.action.api.update_content.call_args[0][1]
+        self.assertEqual(5, len(patch['+errata']))
+        self.assertEqual([{'content_id': 'pkg', 'product_id': 10}], patch['-packages'])
+        self.assertFalse(self.action.api.add_content.called)
+
+    def test_it_sends_changes_in_chunks(self):
+        self.action.PATCH_SIZE = 2
+        self.run_action(os.EX_OK)
+        self.assertEqual(3, self.action.api.update_content.call_count)
+
+    def test_it_reports_failed_items_when_patch_is_refused(self):
+        self.action.api.update_content.side_effect = ServerRequestError(400, {})
+        self.action.api.add_content.side_effect = \
+            lambda cs_id, content_type, attrs: attrs['erratum_id'] == 'RHSA-3' and \
+                self.fail_request()
+        self.run_action(os.EX_DATAERR)
+        self.assertEqual(5, self.action.api.add_content.call_count)
+        self.assertEqual(1, self.action.api.remove_content.call_count)
+
+    def test_it_sends_removals_first(self):
+        self.action.PATCH_SIZE = 1
+        self.run_action(os.EX_OK)
+        self.assertEqual(['-packages'], self.action.api.update_content.call_args_list[0][0][1].keys())
+
+    def test_it_accepts_refused_additions_of_items_already_in_changeset(self):
+        self.action.api.update_content.side_effect = ServerRequestError(400, {})
+        self.action.api.add_content.side_effect = \
+            lambda cs_id, content_type, attrs: attrs['erratum_id'] == 'RHSA-3' and \
+                self.fail_request()
+        self.action.api.changeset.return_value = {'id': 1, 'packages': [],
+            'errata': [{'errata_id': 'RHSA-3', 'display_name': 'RHSA-3', 'product_id': 10}]}
+        self.run_action(os.EX_OK)
+        self.assertEqual(1, self.action.api.changeset.call_count)
+
+    def test_it_accepts_refused_removals_of_items_not_in_changeset(self):
+        self.action.api.update_content.side_effect = ServerRequestError(400, {})
+        self.action.api.remove_content.side_effect = ServerRequestError(404, {})
+        self.action.api.changeset.return_value = {'id': 1, 'errata': [], 'packages': []}
+        self.run_action(os.EX_OK)
+
+    def test_it_reports_refused_removals_of_items_in_changeset(self):
+        self.action.api.update_content.side_effect = ServerRequestError(400, {})
+        self.action.api.remove_content.side_effect = ServerRequestError(422, {})
+        self.run_action(os.EX_DATAERR)
+
+    def test_it_resolves_each_product_once(self):
+        self.action.items['add_erratum'].append({'name': 'RHSA-9', 'product_label': 'other'})
+        self.run_action(os.EX_OK)
+        self.assertEqual(2, self.module.get_product.call_count)
+
+    def fail_request(self):
+        raise ServerRequestError(422, {'displayMessage': 'no such erratum'})
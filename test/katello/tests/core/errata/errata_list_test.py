@@ -121,7 +121,7 @@ class ErrataListTest(CLIActionTestCase):
         self.module.get_repo.assert_called_once_with(self.ORG['name'], self.REPO['name'],
                                                      self.PRODUCT['name'], None, None,
                                                      None, False, self.VIEW,
-                                                     None, None)
+                                                     None, None, fields=('id',))
 
     def test_it_supports_filtering_by_type(self):
         self.mock_options(self.OPTIONS_BY_TYPE)
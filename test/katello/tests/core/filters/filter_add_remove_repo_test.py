@@ -81,7 +81,7 @@ class FilterAddRemoveRepoTest(object):
         self.action.api.repos.assert_called_once_with(self.FILTER['id'],
                                  self.DEFINITION['id'], self.ORG['name'])
         self.module.get_repo.assert_called_once_with(self.ORG['name'],
-                self.REPO['name'], self.PRODUCT['label'], None, None)
+                self.REPO['name'], self.PRODUCT['label'], None, None, fields=('id', 'name'))
 
 class FilterAddRepoTest(FilterAddRemoveRepoTest, CLIActionTestCase):
     addition = True
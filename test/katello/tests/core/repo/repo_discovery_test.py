@@ -52,7 +52,8 @@ class RepoDiscoveryTest(CLIActionTestCase):
 
     def test_polls_pulp(self):
         self.action.discover_repositories(self.PROVIDER, self.URL)
-        self.module.run_spinner_in_bg.assert_called_once_with(self.module.wait_for_async_task, [self.DISCOVERY_TASK])
+        self.module.run_spinner_in_bg.assert_called_once_with(self.module.wait_for_async_task,
+            [self.DISCOVERY_TASK, None, False])
 
     def test_exit_when_no_repos_were_discovered(self):
         self.module.run_spinner_in_bg.return_value = [self.RESULT]
@@ -1,5 +1,6 @@
 import unittest
 import os
+from mock import Mock
 
 from katello.tests.core.action_test_utils import CLIOptionTestCase, CLIActionTestCase
 from katello.tests.core.organization import organization_data
@@ -7,6 +8,7 @@ from katello.tests.core.organization import organization_data
 import katello.client.core.system
 from katello.client.core.system import Report
 from katello.client.lib.utils.io import convert_to_mime_type
+from katello.client.lib.utils.encoding import stdout_origin
 
 class RequiredCLIOptionsTests(CLIOptionTestCase):
     #requires: organization
@@ -35,7 +37,8 @@ class SystemReportTest(CLIActionTestCase):
         self.set_module(katello.client.core.system)
         self.mock(self.action.api, 'report_by_org', ('', ''))
         self.mock(self.action.api, 'report_by_env', ('', ''))
-        self.mock(self.module, 'save_report')
+        self.mock(self.module, 'report_file_opener')
+        self.mock(self.module, 'ProgressBar').return_value = Mock()
         self.mock(self.module, 'get_katello_mode', 'katello')
         self.mock(self.module, 'get_environment', self.ENV)
 
@@ -43,19 +46,20 @@ class SystemReportTest(CLIActionTestCase):
     def test_it_calls_report_api_with_default_format(self):
         self.mock_options({'org': self.ORG_ID})
         self.run_action()
-        self.action.api.report_by_org.assert_called_once_with(self.ORG_ID, 'text/plain')
+        self.action.api.report_by_org.assert_called_once_with(self.ORG_ID, 'text/plain', stdout_origin, None)
 
     def test_it_uses_format_parameter(self):
         self.mock_options({'org': self.ORG_ID, 'format': 'pdf'})
         self.run_action()
-        self.action.api.report_by_org.assert_called_once_with(self.ORG_ID, convert_to_mime_type('pdf'))
+        self.assertEqual((self.ORG_ID, convert_to_mime_type('pdf')), self.action.api.report_by_org.call_args[0][:2])
 
-    def test_it_saves_pdf_report(self):
+    def test_it_streams_pdf_report_to_file(self):
         self.mock_options({'org': self.ORG_ID, 'format': 'pdf'})
         self.run_action()
-        self.module.save_report.assert_called_once()
+        self.module.report_file_opener.assert_called_once_with('katello_systems_report.pdf')
+        self.assertEqual(self.module.report_file_opener.return_value, self.action.api.report_by_org.call_args[0][2])
 
     def test_it_calls_report_by_env_api(self):
         self.mock_options({'org': self.ORG_ID, 'environment': self.ENV_NAME})
         self.run_action()
-        self.action.api.report_by_env.assert_called_once_with(self.ENV_ID, 'text/plain')
+        self.action.api.report_by_env.assert_called_once_with(self.ENV_ID, 'text/plain', stdout_origin, None)
@@ -0,0 +1,52 @@
+import os
+from mock import Mock
+
+from katello.tests.core.action_test_utils import CLIActionTestCase
+
+import katello.client.core.task
+from katello.client.core.task import Resume
+from katello.client.lib import task_journal
+from katello.client.lib.async import AsyncTask
+from katello.client.lib.task_journal import TaskJournal
+
+
+class TaskResumeTest(CLIActionTestCase):
+
+    def setUp(self):
+        self.set_action(Resume())
+        self.set_module(katello.client.core.task)
+        self.mock_printer()
+        self.mock_options({'uuids': None})
+        self.mock(self.action, 'watch', os.EX_OK)
+        self.mock(self.action.api, 'statuses', None)
+        self.mock(self.action.api, 'status').side_effect = lambda uuid: {'uuid': uuid, 'state': 'running'}
+        self.journal = TaskJournal(None)
+        self.journal.record(AsyncTask([{'uuid': 'a', 'state': 'running'}, {'uuid': 'b', 'state': 'finished'}]))
+        task_journal.set_active_journal(self.journal)
+
+    def tearDown(self):
+        task_journal.set_active_journal(None)
+        self.restore_mocks()
+
+    def watched_ids(self):
+        watched = self.action.watch.call_args[0][0]
+        return [t['uuid'] for w in watched for t in w.get_hashes()]
+
+    def test_it_resumes_unfinished_tasks(self):
+        self.run_action(os.EX_OK)
+        self.assertEqual(['a'], self.watched_ids())
+
+    def test_it_resumes_given_tasks(self):
+        self.mock_options({'uuids': ['b']})
+        self.run_action(os.EX_OK)
+        self.assertEqual(['b'], self.watched_ids())
+
+    def test_it_fails_for_tasks_not_in_journal(self):
+        self.mock_options({'uuids': ['c']})
+        self.run_action(os.EX_DATAERR)
+        self.assertFalse(self.action.watch.called)
+
+    def test_it_does_nothing_when_nothing_is_running(self):
+        self.journal.update(AsyncTask([{'uuid': 'a', 'state': 'finished'}]))
+        self.run_action(os.EX_OK)
+        self.assertFalse(self.action.watch.called)
@@ -0,0 +1,131 @@
+import os
+import shlex
+from optparse import OptionParser
+from mock import Mock
+
+from katello.tests.core.action_test_utils import CLIOptionTestCase, CLIActionTestCase
+
+import katello.client.core.task
+from katello.client.core.task import Wait
+from katello.client.lib.async import AsyncTask, SystemAsyncTask, SystemGroupAsyncJob
+from katello.client.lib.control import SystemExitRequest
+from katello.client.lib.ui import progress
+from katello.client.server import ServerRequestError
+
+
+class RequiredCLIOptionsTests(CLIOptionTestCase):
+
+    action = Wait()
+
+    disallowed_options = [
+        (),
+        ('--job=1', ),
+        ('--job=1', '--org=ACME'),
+        ('--job=1', '--org=ACME', '--system_group=servers', '--system_group_id=3'),
+    ]
+
+    allowed_options = [
+        ('--uuid=a', ),
+        ('--uuid=a', '--uuid=b'),
+        ('--job=1', '--org=ACME', '--system_group=servers'),
+        ('--job=1', '--org=ACME', '--system_group_id=3'),
+    ]
+
+
+class TaskWaitTest(CLIActionTestCase):
+
+    UUIDS = ['a', 'b']
+
+    def setUp(self):
+        self.set_action(Wait())
+        self.set_module(katello.client.core.task)
+        self.mock_printer()
+        self.mock_options({'uuids': self.UUIDS})
+        self.mock(self.module, 'run_async_task_with_status')
+        self.states = {'a': 'finished', 'b': 'finished'}
+        self.mock(self.action.api, 'statuses', None)
+        self.mock(self.action.api, 'status').side_effect = \
+            lambda uuid: {'uuid': uuid, 'state': self.states[uuid]} if uuid in self.states else None
+        self.system_states = {}
+        self.mock(self.action.system_api, 'status').side_effect = self.system_status
+
+    def system_status(self, uuid):
+        if uuid not in self.system_states:
+            raise ServerRequestError(404, {'displayMessage': 'not found'}, None)
+        return {'uuid': uuid, 'state': self.system_states[uuid]}
+
+    def tearDown(self):
+        self.restore_mocks()
+
+    def test_it_waits_for_all_tasks(self):
+        self.run_action(os.EX_OK)
+        task = self.module.run_async_task_with_status.call_args[0][0]
+        self.assertEqual(self.UUIDS, [t['uuid'] for t in task.get_hashes()])
+
+    def test_it_fails_when_a_task_failed(self):
+        self.states['b'] = 'failed'
+        self.run_action(os.EX_DATAERR)
+
+    def test_it_fails_when_a_task_is_not_found(self):
+        del self.states['b']
+        self.run_action(os.EX_DATAERR)
+        self.assertFalse(self.module.run_async_task_with_status.called)
+
+    def test_it_finds_tasks_running_on_systems(self):
+        self.system_states['c'] = 'finished'
+        self.mock_options({'uuids': ['a', 'c']})
+        self.run_action(os.EX_OK)
+        waited = [call[0][0] for call in self.module.run_async_task_with_status.call_args_list]
+        self.assertEqual([AsyncTask, SystemAsyncTask], [w.__class__ for w in waited])
+        self.assertEqual([['a'], ['c']], [[t['uuid'] for t in w.get_hashes()] for w in waited])
+
+
+class DetachedSystemGroupJobWaitTest(CLIActionTestCase):
+
+    def setUp(self):
+        self.set_action(Wait())
+        self.set_module(katello.client.core.task)
+        self.mock_printer()
+        self.mock(self.module, 'run_async_task_with_status')
+        self.job_api = Mock()
+        self.job_api.status.side_effect = lambda job_id: {'id': int(job_id), 'state': 'finished'}
+        self.mock(self.module, 'SystemGroupJobStatusAPI').return_value = self.job_api
+        self.mock(self.module, 'get_system_group')
+        progress.set_detached(True)
+
+    def tearDown(self):
+        progress.set_detached(False)
+        self.restore_mocks()
+
+    def detached_output(self, task):
+        try:
+            progress.detach(task)
+        except SystemExitRequest, ex:
+            return ex.args[1]
+        self.fail("detach didn't exit")
+
+    def parse_options(self, line):
+        parser = OptionParser()
+        self.action.setup_parser(parser)
+        options = parser.parse_args(shlex.split(line))[0]
+        return dict((dest, value) for dest, value in vars(options).items() if value is not None)
+
+    def test_it_waits_for_jobs_printed_by_detach(self):
+        job = SystemGroupAsyncJob('ACME Corp', 3, [{'id': 7, 'state': 'running'}, {'id': 8, 'state': 'running'}])
+        lines = self.detached_output(job)
+        self.assertEqual(2, len(lines))
+
+        options = self.parse_options(" ".join(lines))
+        self.mock_options(options)
+        self.run_action(os.EX_OK)
+
+        self.module.SystemGroupJobStatusAPI.assert_called_once_with('ACME Corp', '3')
+        self.assertFalse(self.module.get_system_group.called)
+        waited = self.module.run_async_task_with_status.call_args[0][0]
+        self.assertEqual([7, 8], [j['id'] for j in waited.get_hashes()])
+        printed = self.action.printer.print_items.call_args[0][0]
+        self.assertEqual(['7', '8'], [row['uuid'] for row in printed])
+
+    def test_it_waits_for_tasks_printed_by_detach(self):
+        lines = self.detached_output(AsyncTask([{'uuid': 'a', 'state': 'running'}]))
+        self.assertEqual({'uuids': ['a']}, self.parse_options(lines[0]))
@@ -0,0 +1,94 @@
+import os
+from mock import Mock
+
+from katello.tests.core.action_test_utils import CLIOptionTestCase, CLIActionTestCase
+
+import katello.client.core.task
+from katello.client.core.task import Watch
+from katello.client.lib.executor import Executor
+from katello.client.lib.ui.progress import PollScheduler
+from katello.client.server import ServerRequestError
+
+
+class RequiredCLIOptionsTests(CLIOptionTestCase):
+
+    action = Watch()
+
+    disallowed_options = [
+        (),
+        ('--job=1', ),
+        ('--job=1', '--org=ACME'),
+        ('--job=1', '--org=ACME', '--system_group=servers', '--system_group_id=3'),
+    ]
+
+    allowed_options = [
+        ('--uuid=a', ),
+        ('--uuid=a', '--uuid=b'),
+        ('--job=1', '--org=ACME', '--system_group=servers'),
+        ('--uuid=a', '--job=1', '--org=ACME', '--system_group=servers'),
+        ('--job=1', '--org=ACME', '--system_group_id=3'),
+    ]
+
+
+class TaskWatchTest(CLIActionTestCase):
+
+    UUIDS = ['a', 'b']
+
+    def setUp(self):
+        self.set_action(Watch())
+        self.set_module(katello.client.core.task)
+        self.mock_printer()
+        self.mock_options({'uuids': self.UUIDS})
+        self.mock(self.module, 'TaskDashboard').return_value = Mock()
+        self.mock(self.module.PollScheduler, 'from_config', PollScheduler())
+        self.mock(self.module.time, 'sleep')
+        self.states = {'a': ['running', 'finished'], 'b': ['finished']}
+        self.mock(self.action.api, 'statuses', None)
+        self.mock(self.action.api, 'status').side_effect = self.status
+        self.mock(self.action.system_api, 'status').side_effect = ServerRequestError(404, {}, None)
+        status_api = Mock()
+        status_api.statuses.return_value = None
+        status_api.status.side_effect = self.status
+        status_api.server.executor = Executor(1)
+        self.mock(self.module.AsyncTask, 'status_api').return_value = status_api
+
+    def tearDown(self):
+        self.restore_mocks()
+
+    def status(self, uuid):
+        if uuid not in self.states:
+            return None
+        states = self.states[uuid]
+        state = states.pop(0) if len(states) > 1 else states[0]
+        return {'uuid': uuid, 'state': state, 'progress': None}
+
+    def test_it_polls_until_all_tasks_finish(self):
+        self.run_action(os.EX_OK)
+        self.assertEqual(1, self.module.time.sleep.call_count)
+        dashboard = self.module.TaskDashboard.return_value
+        rows = dashboard.update.call_args[0][0]
+        self.assertEqual([('a', 'finished'), ('b', 'finished')], [(r['id'], r['state']) for r in rows])
+
+    def test_it_fails_when_a_task_failed(self):
+        self.states['a'] = ['running', 'failed']
+        self.run_action(os.EX_DATAERR)
+
+    def test_it_fails_when_a_task_is_not_found(self):
+        del self.states['b']
+        self.run_action(os.EX_DATAERR)
+        self.assertFalse(self.module.TaskDashboard.called)
+
+
+class TaskRowTest(CLIActionTestCase):
+
+    def test_it_computes_progress_and_size(self):
+        row = Watch.task_row({'uuid': 'a', 'state': 'running', 'start_time': None, 'finish_time': None,
+            'progress': {'total_count': 4, 'items_left': 1, 'total_size': 100, 'size_left': 40}})
+        self.assertEqual(0.75, row['progress'])
+        self.assertEqual(60, row['size_done'])
+
+    def test_job_progress_is_share_of_finished_tasks(self):
+        row = Watch.job_row({'id': 7, 'state': 'running',
+            'tasks': [{'state': 'finished'}, {'state': 'running'}]})
+        self.assertEqual('7', row['id'])
+        self.assertEqual(0.5, row['progress'])
@@ -1,11 +1,13 @@
 import unittest
 import os
+from mock import Mock
 
 from katello.tests.core.action_test_utils import CLIOptionTestCase, CLIActionTestCase
 
 import katello.client.core.user
 from katello.client.core.user import Report
 from katello.client.lib.utils.io import convert_to_mime_type
+from katello.client.lib.utils.encoding import stdout_origin
 
 class UserReportTest(CLIActionTestCase):
 
@@ -13,21 +15,23 @@ class UserReportTest(CLIActionTestCase):
         self.set_action(Report())
         self.set_module(katello.client.core.user)
         self.mock(self.action.api, 'report', ('', ''))
-        self.mock(self.module, 'save_report')
+        self.mock(self.module, 'report_file_opener')
+        self.mock(self.module, 'ProgressBar').return_value = Mock()
 
     def tearDown(self):
         self.restore_mocks()
 
     def test_it_calls_report_api_with_default_format(self):
         self.run_action()
-        self.action.api.report.assert_called_once_with('text/plain')
+        self.action.api.report.assert_called_once_with('text/plain', stdout_origin)
 
     def test_it_uses_format_parameter(self):
         self.mock_options({'format': 'pdf'})
         self.run_action()
-        self.action.api.report.assert_called_once_with(convert_to_mime_type('pdf'))
+        self.assertEqual(convert_to_mime_type('pdf'), self.action.api.report.call_args[0][0])
 
-    def test_it_saves_pdf_report(self):
+    def test_it_streams_pdf_report_to_file(self):
         self.mock_options({'format': 'pdf'})
         self.run_action()
-        self.module.save_report.assert_called_once()
+        self.module.report_file_opener.assert_called_once_with('katello_users_report.pdf')
+        self.assertEqual(self.module.report_file_opener.return_value, self.action.api.report.call_args[0][1])
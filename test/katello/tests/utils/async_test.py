@@ -0,0 +1,51 @@
+import unittest
+from mock import Mock
+
+from katello.client.lib.async import AsyncTask
+from katello.client.lib.executor import Executor
+
+
+class AsyncTaskUpdateTest(unittest.TestCase):
+
+    def setUp(self):
+        self.status_api = Mock()
+        self.status_api.server.executor = Executor(4)
+        self.status_api.status.side_effect = lambda uuid: {'uuid': uuid, 'state': 'finished'}
+        self.status_api.statuses.return_value = None
+        self.task = AsyncTask([{'uuid': 'a', 'state': 'running'}, {'uuid': 'b', 'state': 'running'},
+            {'uuid': 'c', 'state': 'failed'}])
+        self.task.status_api = Mock(return_value=self.status_api)
+
+    def tearDown(self):
+        self.status_api.server.executor.shutdown()
+
+    def test_polls_only_running_subtasks(self):
+        self.task.update()
+        self.assertEqual(['a', 'b'], sorted([c[0][0] for c in self.status_api.status.call_args_list]))
+        self.assertEqual(['finished', 'finished', 'failed'], [t['state'] for t in self.task.get_hashes()])
+        self.assertTrue(self.task.finished())
+
+    def test_uses_batch_statuses_when_supported(self):
+        self.status_api.statuses.return_value = {'a': {'uuid': 'a', 'state': 'finished'}}
+        self.task.update()
+        self.assertFalse(self.status_api.status.called)
+        self.assertEqual(['finished', 'running', 'failed'], [t['state'] for t in self.task.get_hashes()])
+
+    def test_subtask_without_status_fails_after_missed_polls(self):
+        self.status_api.status.side_effect = lambda uuid: {'uuid': uuid, 'state': 'finished'} if uuid == 'a' else None
+        for i in range(AsyncTask.MAX_MISSED_POLLS - 1):
+            self.task.update()
+            self.assertEqual('running', self.task.get_hashes()[1]['state'])
+        self.task.update()
+        self.assertEqual('failed', self.task.get_hashes()[1]['state'])
+        self.assertTrue(self.task.finished())
+        self.assertTrue(self.task.failed())
+        self.assertTrue('b' in self.task.get_hashes()[1]['result']['errors'][0][0])
+
+    def test_missed_polls_are_counted_in_a_row(self):
+        missing = [None, None, {'uuid': 'b', 'state': 'running'}, None, None]
+        self.status_api.status.side_effect = lambda uuid: {'uuid': uuid, 'state': 'finished'} if uuid == 'a' \
+            else missing.pop(0)
+        for i in range(5):
+            self.task.update()
+        self.assertEqual('running', self.task.get_hashes()[1]['state'])
@@ -0,0 +1,118 @@
+import httplib
+import socket
+import threading
+import unittest
+from mock import Mock, patch
+
+from katello.client.server import ConnectionPool, KatelloServer
+
+
+class ConnectionPoolTest(unittest.TestCase):
+
+    KEY = ('example.com', 443, 'https', 'NoAuthentication')
+
+    def setUp(self):
+        self.pool = ConnectionPool(max_idle=1)
+        self.factory = Mock(side_effect=lambda: Mock(sock=None))
+
+    def test_creates_connection_when_none_is_idle(self):
+        connection, reused = self.pool.acquire(self.KEY, self.factory)
+        self.assertFalse(reused)
+        self.assertEqual(1, self.factory.call_count)
+
+    def test_reuses_released_connection(self):
+        connection = self.pool.acquire(self.KEY, self.factory)[0]
+        self.pool.release(self.KEY, connection)
+        self.assertEqual((connection, True), self.pool.acquire(self.KEY, self.factory))
+        self.assertEqual(1, self.factory.call_count)
+
+    def test_connections_are_kept_per_key(self):
+        connection = self.pool.acquire(self.KEY, self.factory)[0]
+        self.pool.release(self.KEY, connection)
+        self.assertFalse(self.pool.acquire(self.KEY[:-1] + ('other',), self.factory)[1])
+
+    def test_discards_connections_over_the_limit(self):
+        first = self.pool.acquire(self.KEY, self.factory)[0]
+        second = self.pool.acquire(self.KEY, self.factory)[0]
+        self.pool.release(self.KEY, first)
+        self.pool.release(self.KEY, second)
+        self.assertTrue(second.close.called)
+        self.assertFalse(first.close.called)
+
+    def test_skips_connections_closed_by_server(self):
+        local, remote = socket.socketpair()
+        try:
+            closed = Mock(sock=local)
+            self.pool.release(self.KEY, closed)
+            remote.close()
+            connection, reused = self.pool.acquire(self.KEY, self.factory)
+            self.assertFalse(reused)
+            self.assertTrue(closed.close.called)
+        finally:
+            local.close()
+
+    def test_clear_closes_idle_connections(self):
+        connection = self.pool.acquire(self.KEY, self.factory)[0]
+        self.pool.release(self.KEY, connection)
+        self.pool.clear()
+        self.assertTrue(connection.close.called)
+        self.assertFalse(self.pool.acquire(self.KEY, self.factory)[1])
+
+
+class StaleConnectionRetryTest(unittest.TestCase):
+
+    def setUp(self):
+        self.server = KatelloServer('example.com')
+        self.server.pool = ConnectionPool()
+        self.stale = Mock(sock=None)
+        self.server.pool.release(self.server._connection_key(), self.stale)
+        self.fresh = Mock(sock=None)
+        self.fresh.getresponse.return_value = self.response()
+        self.patcher = patch.object(KatelloServer, '_connect', return_value=self.fresh)
+        self.connect = self.patcher.start()
+        self.server._process_response = Mock(return_value=(200, 'ok', []))
+
+    def tearDown(self):
+        self.patcher.stop()
+
+    @classmethod
+    def response(cls):
+        response = Mock(status=200, will_close=False)
+        response.isclosed.return_value = True
+        response.msg.getallmatchingheaders.return_value = []
+        return response
+
+    def send(self, method):
+        return self.server._send_request(method, '/api/items', None, {})
+
+    def test_read_is_repeated_when_response_is_lost(self):
+        self.stale.getresponse.side_effect = httplib.BadStatusLine('')
+        self.assertEqual((200, 'ok', []), self.send('GET'))
+        self.assertTrue(self.fresh.request.called)
+
+    def test_write_is_not_repeated_when_response_is_lost(self):
+        self.stale.getresponse.side_effect = httplib.BadStatusLine('')
+        self.assertRaises(httplib.BadStatusLine, self.send, 'POST')
+        self.assertFalse(self.connect.called)
+
+    def test_write_is_repeated_when_it_was_not_sent(self):
+        self.stale.request.side_effect = socket.error(32, 'Broken pipe')
+        self.assertEqual((200, 'ok', []), self.send('POST'))
+        self.assertTrue(self.fresh.request.called)
+
+
+class ServerShutdownTest(unittest.TestCase):
+
+    def test_shutdown_stops_workers_and_closes_idle_connections(self):
+        server = KatelloServer('example.com', max_workers=2)
+        connection = Mock(sock=None)
+        server.pool = ConnectionPool()
+        server.pool.release(('example.com',), connection)
+        futures = [server.executor.submit(lambda: threading.currentThread()) for dummy in range(4)]
+        workers = set([f.result() for f in futures])
+
+        server.shutdown()
+        for worker in workers:
+            worker.join(5)
+        self.assertEqual([], [worker for worker in workers if worker.isAlive()])
+        self.assertTrue(connection.close.called)
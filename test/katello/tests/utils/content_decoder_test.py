@@ -0,0 +1,40 @@
+import unittest
+import zlib
+
+from katello.client.server import ContentDecoder, gzip_compress
+
+
+class ContentDecoderTest(unittest.TestCase):
+
+    DATA = 'katello ' * 1000
+
+    def compress(self, wbits):
+        compressor = zlib.compressobj(6, zlib.DEFLATED, wbits)
+        return compressor.compress(self.DATA) + compressor.flush()
+
+    def decode(self, encoding, data, chunk_size):
+        decoder = ContentDecoder(encoding)
+        chunks = [decoder.decompress(data[i:i + chunk_size]) for i in range(0, len(data), chunk_size)]
+        return ''.join(chunks) + decoder.flush()
+
+    def test_decodes_gzip(self):
+        self.assertEqual(self.DATA, self.decode('gzip', gzip_compress(self.DATA), 100))
+
+    def test_decodes_x_gzip(self):
+        self.assertEqual(self.DATA, self.decode('x-gzip', gzip_compress(self.DATA), 100))
+
+    def test_decodes_deflate_with_zlib_header(self):
+        self.assertEqual(self.DATA, self.decode('deflate', zlib.compress(self.DATA), 100))
+
+    def test_decodes_raw_deflate(self):
+        self.assertEqual(self.DATA, self.decode('deflate', self.compress(-zlib.MAX_WBITS), 100))
+
+    def test_decodes_deflate_read_byte_by_byte(self):
+        self.assertEqual(self.DATA, self.decode('deflate', zlib.compress(self.DATA), 1))
+        self.assertEqual(self.DATA, self.decode('deflate', self.compress(-zlib.MAX_WBITS), 1))
+
+    def test_decodes_empty_deflate_body(self):
+        self.assertEqual('', self.decode('deflate', '', 1))
+
+    def test_rejects_damaged_gzip(self):
+        self.assertRaises(zlib.error, self.decode, 'gzip', 'not gzip data', 100)
@@ -0,0 +1,74 @@
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+from mock import Mock
+
+from katello.client.server import CookieJar
+
+
+class CookieJarTest(unittest.TestCase):
+
+    KEY = ('example.com', 443, 'https', 'BasicAuthentication', 'admin')
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.dir, 'cookies')
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def response(self, *cookies):
+        response = Mock()
+        response.msg.getallmatchingheaders.return_value = ['Set-Cookie: %s' % c for c in cookies]
+        return response
+
+    def test_cookies_are_replayed(self):
+        jar = CookieJar()
+        jar.update(self.KEY, self.response('_session=abc; path=/'))
+        self.assertEqual('_session=abc', jar.header(self.KEY))
+        self.assertEqual(None, jar.header(self.KEY[:-1] + ('other',)))
+
+    def test_cookies_are_saved_for_owner_only(self):
+        CookieJar(self.path).update(self.KEY, self.response('_session=abc'))
+        self.assertEqual('_session=abc', CookieJar(self.path).header(self.KEY))
+        self.assertEqual(0600, os.stat(self.path).st_mode & 0777)
+
+    def test_parallel_saves_leave_no_temporary_files(self):
+        def save(name):
+            jar = CookieJar(self.path)
+            for i in range(20):
+                jar.update(self.KEY, self.response('%s=%d' % (name, i)))
+        writers = [threading.Thread(target=save, args=(name,)) for name in 'abc']
+        for writer in writers:
+            writer.start()
+        for writer in writers:
+            writer.join()
+        self.assertEqual(['cookies'], os.listdir(self.dir))
+        self.assertTrue(CookieJar(self.path).header(self.KEY))
+
+    def test_refused_cookies_are_forgotten(self):
+        jar = CookieJar()
+        jar.update(self.KEY, self.response('_session=abc'))
+        jar.refuse(self.KEY)
+        self.assertEqual(None, jar.header(self.KEY))
+        jar.update(self.KEY, self.response('_session=def'))
+        self.assertEqual('_session=def', jar.header(self.KEY))
+        self.assertFalse(jar.rejected(self.KEY))
+
+    def test_cookies_refused_twice_are_rejected(self):
+        jar = CookieJar(self.path)
+        jar.refuse(self.KEY)
+        jar.refuse(self.KEY)
+        jar = CookieJar(self.path)
+        self.assertTrue(jar.rejected(self.KEY))
+        jar.update(self.KEY, self.response('_session=abc'))
+        self.assertEqual(None, jar.header(self.KEY))
+
+    def test_accepted_cookies_are_not_rejected(self):
+        jar = CookieJar()
+        jar.refuse(self.KEY)
+        jar.accept(self.KEY)
+        jar.refuse(self.KEY)
+        self.assertFalse(jar.rejected(self.KEY))
@@ -0,0 +1,45 @@
+import threading
+import unittest
+
+from katello.client.lib.executor import Executor, wait_all
+
+
+class ExecutorTest(unittest.TestCase):
+
+    def setUp(self):
+        self.executor = Executor(4)
+
+    def tearDown(self):
+        self.executor.shutdown()
+
+    def test_returns_results_in_order(self):
+        futures = self.executor.map(lambda x: x * 2, range(10))
+        self.assertEqual([x * 2 for x in range(10)], wait_all(futures))
+
+    def test_captures_exceptions_per_call(self):
+        def fail_on_odd(x):
+            if x % 2:
+                raise ValueError(x)
+            return x
+        futures = self.executor.map(fail_on_odd, range(4))
+        self.assertEqual(0, futures[0].result())
+        self.assertTrue(isinstance(futures[1].exception(), ValueError))
+        self.assertRaises(ValueError, futures[3].result)
+
+    def test_runs_calls_concurrently(self):
+        barrier = threading.Event()
+        arrived = []
+        def call(x):
+            arrived.append(x)
+            if len(arrived) == 2:
+                barrier.set()
+            barrier.wait(5)
+            return barrier.isSet()
+        self.assertEqual([True, True], wait_all(self.executor.map(call, range(2))))
+
+    def test_nested_submit_runs_inline(self):
+        executor = Executor(2)
+        def outer(x):
+            return wait_all(executor.map(lambda y: y + x, range(3)))
+        self.assertEqual([[0, 1, 2], [1, 2, 3]], wait_all(executor.map(outer, range(2))))
+        executor.shutdown()
@@ -0,0 +1,177 @@
+import httplib
+import os
+import shutil
+import tempfile
+import time
+import unittest
+from mock import Mock
+
+from katello.client.server import BasicAuthentication, CacheEntry, CookieJar, HttpCache, KatelloServer, ServerRequestError
+
+
+class FakeResponse(object):
+
+    will_close = False
+
+    def __init__(self, status, headers, body='', cookies=()):
+        self.status = status
+        self.headers = headers
+        self.body = body
+        self.msg = Mock()
+        self.msg.getallmatchingheaders.return_value = ['Set-Cookie: %s' % c for c in cookies]
+
+    def getheaders(self):
+        return self.headers
+
+    def getheader(self, name, default=None):
+        return dict(self.headers).get(name, default)
+
+    def read(self, size=-1):
+        if size < 0:
+            size = len(self.body)
+        data, self.body = self.body[:size], self.body[size:]
+        return data
+
+    def isclosed(self):
+        return not self.body
+
+
+class HttpCacheTest(unittest.TestCase):
+
+    HEADERS = [('content-type', 'application/json'), ('etag', '"v1"'), ('content-length', '9')]
+
+    def setUp(self):
+        self.path = tempfile.mkdtemp()
+        self.cache = HttpCache(os.path.join(self.path, 'cache'))
+
+    def tearDown(self):
+        shutil.rmtree(self.path)
+
+    def test_stores_responses_with_validator(self):
+        self.cache.store('a', self.HEADERS, '{"id": 1}')
+        entry = self.cache.lookup('a')
+        self.assertEqual('{"id": 1}', entry.body)
+        self.assertEqual('"v1"', entry.etag)
+        self.assertEqual({'If-None-Match': '"v1"'}, entry.conditional_headers())
+
+    def test_drops_headers_of_the_transfer(self):
+        self.cache.store('a', self.HEADERS, '{"id": 1}')
+        self.assertEqual([('content-type', 'application/json'), ('etag', '"v1"')], self.cache.lookup('a').headers)
+
+    def test_skips_responses_without_validator(self):
+        self.cache.store('a', [('content-type', 'application/json')], '{}')
+        self.assertEqual(None, self.cache.lookup('a'))
+
+    def test_skips_responses_marked_no_store(self):
+        self.cache.store('a', self.HEADERS + [('cache-control', 'private, no-store')], '{}')
+        self.assertEqual(None, self.cache.lookup('a'))
+
+    def test_evicts_least_recently_used_entries(self):
+        self.cache.max_size = 10
+        self.cache.store('old', self.HEADERS, '12345')
+        os.utime(os.path.join(self.cache.path, 'old.meta'), (time.time() - 60, time.time() - 60))
+        self.cache.store('new', self.HEADERS, '123456')
+        self.assertEqual(None, self.cache.lookup('old'))
+        self.assertEqual('123456', self.cache.lookup('new').body)
+
+    def test_clear_removes_entries(self):
+        self.cache.store('a', self.HEADERS, '{}')
+        self.cache.clear()
+        self.assertEqual(None, self.cache.lookup('a'))
+
+    def test_keys_differ_per_user(self):
+        headers = {'Accept': 'application/json'}
+        self.assertNotEqual(HttpCache.key('/api/a', headers, ('host', 'alice')),
+            HttpCache.key('/api/a', headers, ('host', 'bob')))
+
+
+class CachedRequestTest(unittest.TestCase):
+
+    def setUp(self):
+        self.path = tempfile.mkdtemp()
+        self.server = KatelloServer('example.com', cookies=CookieJar())
+        self.server.cache = HttpCache(self.path)
+        self.connection = Mock()
+        self.server.pool = Mock()
+        self.server.pool.acquire.return_value = (self.connection, False)
+
+    def tearDown(self):
+        self.server.executor.shutdown()
+        shutil.rmtree(self.path)
+
+    def respond(self, status, headers, body=''):
+        self.connection.getresponse.return_value = FakeResponse(status, headers, body)
+
+    def sent_headers(self):
+        return self.connection.request.call_args[1]['headers']
+
+    def test_first_request_is_not_conditional_and_stores_response(self):
+        self.respond(httplib.OK, [('content-type', 'application/json'), ('etag', '"v1"')], '{"id": 1}')
+        self.assertEqual({'id': 1}, self.server.GET('/api/a')[1])
+        self.assertFalse('If-None-Match' in self.sent_headers())
+
+    def test_stored_response_is_revalidated(self):
+        self.respond(httplib.OK, [('content-type', 'application/json'), ('etag', '"v1"')], '{"id": 1}')
+        self.server.GET('/api/a')
+        self.respond(httplib.OK, [('content-type', 'application/json'), ('etag', '"v2"')], '{"id": 2}')
+        self.assertEqual({'id': 2}, self.server.GET('/api/a')[1])
+        self.assertEqual('"v1"', self.sent_headers()['If-None-Match'])
+
+    def test_not_modified_response_uses_stored_body(self):
+        self.respond(httplib.OK, [('content-type', 'application/json'), ('etag', '"v1"')], '{"id": 1}')
+        self.server.GET('/api/a')
+        self.respond(httplib.NOT_MODIFIED, [('etag', '"v1"')])
+        status, body, headers = self.server.GET('/api/a')
+        self.assertEqual((httplib.OK, {'id': 1}), (status, body))
+        self.assertEqual('application/json', dict(headers)['content-type'])
+
+    def test_not_modified_without_stored_body_is_an_error(self):
+        entry = CacheEntry('a', etag='"v1"')
+        response = FakeResponse(httplib.NOT_MODIFIED, [('etag', '"v1"')])
+        self.assertRaises(ServerRequestError, self.server._process_response, response, cache_entry=entry)
+
+
+class RefusedCookieTest(unittest.TestCase):
+
+    def setUp(self):
+        self.server = KatelloServer('example.com', cookies=CookieJar())
+        self.server.set_auth_method(BasicAuthentication('admin', 'admin'))
+        self.connection = Mock()
+        self.server.pool = Mock()
+        self.server.pool.acquire.return_value = (self.connection, False)
+
+    def tearDown(self):
+        self.server.executor.shutdown()
+
+    def respond(self, *responses):
+        self.connection.getresponse.side_effect = list(responses)
+
+    def sent_headers(self):
+        return [c[1]['headers'] for c in self.connection.request.call_args_list]
+
+    def test_expired_session_is_renewed(self):
+        self.respond(FakeResponse(httplib.OK, [], cookies=['_session=a']),
+            FakeResponse(httplib.UNAUTHORIZED, []),
+            FakeResponse(httplib.OK, [], cookies=['_session=b']),
+            FakeResponse(httplib.OK, []))
+        for i in range(3):
+            self.server.GET('/api/a')
+        headers = self.sent_headers()
+        self.assertEqual('_session=a', headers[1]['Cookie'])
+        self.assertTrue('Authorization' in headers[2])
+        self.assertEqual('_session=b', headers[3]['Cookie'])
+
+    def test_credentials_are_sent_to_server_rejecting_cookies_twice(self):
+        self.respond(FakeResponse(httplib.OK, [], cookies=['_session=a']),
+            FakeResponse(httplib.UNAUTHORIZED, []),
+            FakeResponse(httplib.OK, [], cookies=['_session=b']),
+            FakeResponse(httplib.UNAUTHORIZED, []),
+            FakeResponse(httplib.OK, [], cookies=['_session=c']),
+            FakeResponse(httplib.OK, [], cookies=['_session=d']))
+        for i in range(4):
+            self.server.GET('/api/a')
+        headers = self.sent_headers()
+        self.assertEqual(6, len(headers))
+        self.assertEqual(['_session=a', '_session=b'], [h['Cookie'] for h in headers if 'Cookie' in h])
+        self.assertTrue('Authorization' in headers[5])
+        self.assertFalse('Cookie' in headers[5])
@@ -0,0 +1,85 @@
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+from mock import Mock
+
+from katello.client.lib.lookup_cache import LookupCache
+
+
+class LookupCacheTest(unittest.TestCase):
+
+    PRODUCT = {'id': 1, 'name': 'prod'}
+
+    def setUp(self):
+        self.cache = LookupCache()
+        self.find = Mock(return_value=self.PRODUCT)
+
+    def test_finds_record_only_once(self):
+        self.assertEqual(self.PRODUCT, self.cache.lookup('product', ('ACME', 'prod'), self.find))
+        self.assertEqual(self.PRODUCT, self.cache.lookup('product', ('ACME', 'prod'), self.find))
+        self.assertEqual(1, self.find.call_count)
+
+    def test_does_not_cache_missing_records(self):
+        self.find.return_value = None
+        self.cache.lookup('product', ('ACME', 'prod'), self.find)
+        self.cache.lookup('product', ('ACME', 'prod'), self.find)
+        self.assertEqual(2, self.find.call_count)
+
+    def test_records_expire(self):
+        self.cache.set('product', ('ACME', 'prod'), self.PRODUCT)
+        self.cache.ttls['product'] = 0
+        self.assertEqual(None, self.cache.get('product', ('ACME', 'prod')))
+
+    def test_changes_invalidate_records_of_the_entity(self):
+        self.cache.set('product', ('ACME', 'prod'), self.PRODUCT)
+        self.cache.set('organization', ('ACME',), {'name': 'ACME'})
+        self.cache.request_sent('GET', '/api/organizations/ACME/products/')
+        self.assertEqual(self.PRODUCT, self.cache.get('product', ('ACME', 'prod')))
+        self.cache.request_sent('POST', '/api/organizations/ACME/products/')
+        self.assertEqual(None, self.cache.get('product', ('ACME', 'prod')))
+        self.assertEqual({'name': 'ACME'}, self.cache.get('organization', ('ACME',)))
+        self.cache.request_sent('DELETE', '/api/organizations/ACME')
+        self.assertEqual(None, self.cache.get('organization', ('ACME',)))
+
+    def test_other_organization_resources_keep_records(self):
+        self.cache.set('product', ('ACME', 'prod'), self.PRODUCT)
+        self.cache.set('organization', ('ACME',), {'name': 'ACME'})
+        self.cache.request_sent('POST', '/api/organizations/ACME/systems')
+        self.cache.request_sent('PUT', '/api/organizations/ACME/systems/abc/subscriptions')
+        self.assertEqual(self.PRODUCT, self.cache.get('product', ('ACME', 'prod')))
+        self.assertEqual({'name': 'ACME'}, self.cache.get('organization', ('ACME',)))
+        self.cache.request_sent('POST', '/api/organizations/')
+        self.assertEqual(None, self.cache.get('product', ('ACME', 'prod')))
+
+
+class PersistentLookupCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'lookups')
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_records_are_shared_within_namespace(self):
+        LookupCache(self.path, 'admin').set('environment', ('ACME', 'Dev'), {'id': 2})
+        self.assertEqual({'id': 2}, LookupCache(self.path, 'admin').get('environment', ('ACME', 'Dev')))
+        self.assertEqual(None, LookupCache(self.path, 'other').get('environment', ('ACME', 'Dev')))
+        self.assertEqual(0600, os.stat(self.path).st_mode & 0777)
+
+    def test_parallel_saves_leave_no_temporary_files(self):
+        def save(name):
+            cache = LookupCache(self.path, name)
+            for i in range(20):
+                cache.set('environment', ('ACME', str(i)), {'id': i})
+        writers = [threading.Thread(target=save, args=(name,)) for name in 'abc']
+        for writer in writers:
+            writer.start()
+        for writer in writers:
+            writer.join()
+        self.assertEqual(['lookups'], os.listdir(self.directory))
+        # the cache isn't merged between processes, the last writer's records are kept whole
+        found = [LookupCache(self.path, name).get('environment', ('ACME', '19')) for name in 'abc']
+        self.assertTrue({'id': 19} in found)
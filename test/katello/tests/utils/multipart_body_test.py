@@ -0,0 +1,77 @@
+import os
+import tempfile
+import unittest
+from mock import Mock
+
+from katello.client.server import KatelloServer, MultipartBody
+
+
+class MultipartBodyTest(unittest.TestCase):
+
+    CONTENT = 'manifest content\n' * 100
+
+    def setUp(self):
+        fd, self.path = tempfile.mkstemp()
+        os.write(fd, self.CONTENT)
+        os.close(fd)
+        self.file = open(self.path, 'rb')
+
+    def tearDown(self):
+        self.file.close()
+        os.remove(self.path)
+
+    def read_all(self, body, size):
+        chunks = []
+        while True:
+            chunk = body.read(size)
+            if not chunk:
+                return ''.join(chunks)
+            chunks.append(chunk)
+
+    def test_length_counts_strings_and_files(self):
+        body = MultipartBody(['head\r\n', self.file, '\r\ntail'])
+        self.assertEqual(len(self.CONTENT) + 12, len(body))
+
+    def test_length_counts_files_from_their_position(self):
+        self.file.seek(10)
+        body = MultipartBody([self.file])
+        self.assertEqual(len(self.CONTENT) - 10, len(body))
+        self.assertEqual(self.CONTENT[10:], body.read())
+
+    def test_reads_parts_in_chunks(self):
+        body = MultipartBody(['head\r\n', self.file, '\r\ntail'])
+        self.assertEqual('head\r\n' + self.CONTENT + '\r\ntail', self.read_all(body, 7))
+
+    def test_reads_the_same_data_after_seek(self):
+        body = MultipartBody(['head\r\n', self.file, '\r\ntail'])
+        first = self.read_all(body, 100)
+        body.seek(0)
+        self.assertEqual(first, self.read_all(body, 64))
+        self.assertEqual(len(body), len(first))
+
+    def test_reports_progress(self):
+        progress = Mock()
+        body = MultipartBody(['head', self.file], progress)
+        self.read_all(body, 1000)
+        sent = [call[0] for call in progress.call_args_list]
+        self.assertEqual((len(body), len(body)), sent[-1])
+        self.assertEqual(sorted(sent), sent)
+
+    def test_progress_starts_over_after_seek(self):
+        progress = Mock()
+        body = MultipartBody(['head', self.file], progress)
+        self.read_all(body, 1000)
+        body.seek(0)
+        body.read(4)
+        self.assertEqual((4, len(body)), progress.call_args[0])
+
+    def test_encoded_form_length_matches_its_content(self):
+        server = KatelloServer('example.com')
+        try:
+            content_type, body = server._encode_multipart_formdata({'import': self.file, 'force': u'tru\xe9'})
+        finally:
+            server.executor.shutdown()
+        data = body.read()
+        self.assertEqual(len(body), len(data))
+        self.assertTrue(self.CONTENT in data)
+        self.assertTrue(content_type.startswith('multipart/form-data; boundary='))
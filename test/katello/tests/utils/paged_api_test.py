@@ -0,0 +1,54 @@
+import unittest
+from mock import Mock, patch
+
+from katello.client.api.base import KatelloAPI
+
+
+class PagedApiTest(unittest.TestCase):
+
+    RECORDS = [{'id': i} for i in range(5)]
+
+    def setUp(self):
+        self.server = Mock()
+        self.patcher = patch.object(KatelloAPI, 'server', self.server)
+        self.patcher.start()
+        self.api = KatelloAPI()
+
+    def tearDown(self):
+        self.patcher.stop()
+
+    def serve(self, page_function):
+        def get(path, queries):
+            offset, size = queries['offset'], queries['page_size']
+            return (200, page_function(self.RECORDS[offset:offset + size]))
+        self.server.GET.side_effect = get
+
+    def test_fetches_paged_responses_page_by_page(self):
+        self.serve(lambda page: {'items': page, 'subtotal': len(self.RECORDS)})
+        records = list(self.api._get_paged('/api/items', {'q': 'x'}, 'items', page_size=2))
+        self.assertEqual(self.RECORDS, records)
+        self.assertEqual(3, self.server.GET.call_count)
+        self.assertEqual({'q': 'x', 'paged': 'true', 'offset': 4, 'page_size': 2},
+            self.server.GET.call_args[0][1])
+
+    def test_stops_after_short_list_page(self):
+        self.serve(lambda page: page)
+        records = list(self.api._get_paged('/api/items', None, 'items', page_size=2))
+        self.assertEqual(self.RECORDS, records)
+        self.assertEqual(3, self.server.GET.call_count)
+
+    def test_stops_when_paging_is_ignored(self):
+        self.server.GET.return_value = (200, self.RECORDS)
+        records = list(self.api._get_paged('/api/items', None, 'items', page_size=2))
+        self.assertEqual(self.RECORDS, records)
+        self.assertEqual(1, self.server.GET.call_count)
+
+    def test_stops_when_ignored_paging_returns_a_full_page(self):
+        self.server.GET.return_value = (200, self.RECORDS)
+        records = list(self.api._get_paged('/api/items', None, 'items', page_size=5))
+        self.assertEqual(self.RECORDS, records)
+        self.assertEqual(2, self.server.GET.call_count)
+
+    def test_fails_when_paged_response_lacks_collection(self):
+        self.server.GET.return_value = (200, {'records': self.RECORDS, 'subtotal': 5})
+        self.assertRaises(ValueError, list, self.api._get_paged('/api/items', None, 'items'))
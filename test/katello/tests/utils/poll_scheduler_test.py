@@ -0,0 +1,24 @@
+import unittest
+
+from katello.client.lib.ui.progress import PollScheduler
+
+
+class PollSchedulerTest(unittest.TestCase):
+
+    def setUp(self):
+        self.scheduler = PollScheduler(initial_delay=1, max_delay=4, backoff=2, jitter=0)
+
+    def test_backs_off_up_to_max_delay(self):
+        delays = [self.scheduler.next_delay('same') for i in range(5)]
+        self.assertEqual([1, 2, 4, 4, 4], delays)
+
+    def test_polls_fast_again_after_progress(self):
+        self.scheduler.next_delay(0.1)
+        self.scheduler.next_delay(0.1)
+        self.assertEqual(1, self.scheduler.next_delay(0.2))
+
+    def test_jitter_spreads_delays(self):
+        scheduler = PollScheduler(initial_delay=1, jitter=0.5)
+        delays = [scheduler.next_delay(i) for i in range(50)]
+        self.assertTrue(min(delays) >= 0.5 and max(delays) <= 1.5)
+        self.assertTrue(len(set(delays)) > 1)
@@ -2,11 +2,13 @@ from unittest import TestCase
 from mock import Mock
 
 from katello.client.lib.ui import printer
-from katello.client.lib.ui.printer import Printer, VerboseStrategy, GrepStrategy
+from katello.client.lib.ui.printer import Printer, VerboseStrategy, GrepStrategy, JsonStrategy, \
+    JsonLinesStrategy, CsvStrategy
 from katello.client.lib.ui.printer import indent_text, text_to_line, center_text, print_line, get_term_width
 from katello.tests.test_utils import ColoredAssertionError, EasyMock
 
 import os
+import json
 import StringIO
 
 class PrintStrategyTest(EasyMock):
@@ -110,6 +112,12 @@ class MultipleOutputStrategyTest(PrintStrategyTest):
         self.assertTrue(out.find('A1') >= 0)
         self.assertTrue(out.find('B2') >= 0)
 
+    def test_formatter_is_called_once_per_item(self):
+        formatter = Mock(return_value='###')
+        columns = [{'attr_name': 'id', 'name': 'Id', 'formatter': formatter}]
+        self.print_it(columns, self.PRINTABLE_ITEMS)
+        self.assertEqual(2, formatter.call_count)
+
 
 
 class GrepStrategyTest():
@@ -130,7 +138,12 @@ class GrepDefaultValueStrategyTest(GrepStrategyTest, DefaultValueStrategyTest, T
     pass
 
 class GrepMultipleOutputStrategyTest(GrepStrategyTest, MultipleOutputStrategyTest, TestCase):
-    pass
+
+    def test_columns_are_aligned(self):
+        columns = [{'attr_name': 'name', 'name': 'Name'}, {'attr_name': 'id', 'name': 'Id'}]
+        items = [{'id': 'A1', 'name': 'long_name_a'}, {'id': 'B2', 'name': 'b'}]
+        lines = self.print_it(columns, items, None).splitlines()
+        self.assertEqual(['long_name_a A1 ', 'b           B2 '], lines)
 
 class VerboseOutputStrategyTest(VerboseStrategyTest, OutputStrategyTest, TestCase):
     pass
@@ -141,3 +154,100 @@ class VerboseDefaultValueStrategyTest(VerboseStrategyTest, DefaultValueStrategyT
 class VerboseMultipleOutputStrategyTest(VerboseStrategyTest, MultipleOutputStrategyTest, TestCase):
     pass
 
+
+
+class GrepStreamingStrategyTest(TestCase):
+
+    def setUp(self):
+        self.output = StringIO.StringIO()
+        self.strategy = GrepStrategy(output=self.output, sample_size=1)
+        self.columns = [{'attr_name': 'name', 'name': 'Name'}, {'attr_name': 'id', 'name': 'Id'}]
+
+    def test_generators_are_printed_while_consumed(self):
+        printed = []
+        def items():
+            for name in ['a', 'b']:
+                printed.append(self.output.getvalue())
+                yield {'id': name.upper(), 'name': name}
+        self.strategy.print_items(None, self.columns, items())
+        self.assertEqual(['', 'a    A  \n'], printed)
+
+    def test_widths_are_fixed_from_the_sample(self):
+        items = iter([{'id': 'A', 'name': 'a'}, {'id': 'B', 'name': 'long_name_b'}])
+        self.strategy.print_items(None, self.columns, items)
+        self.assertEqual(['a    A  ', 'long_name_b B  '], self.output.getvalue().splitlines())
+
+    def test_lists_are_not_streamed(self):
+        items = [{'id': 'A', 'name': 'a'}, {'id': 'B', 'name': 'long_name_b'}]
+        self.strategy.print_items(None, self.columns, items)
+        self.assertEqual(['a           A  ', 'long_name_b B  '], self.output.getvalue().splitlines())
+
+
+class MachineReadableStrategyTest(TestCase):
+
+    COLUMNS = [{'attr_name': 'id', 'name': 'Id'}, {'attr_name': 'name', 'name': 'Name', 'formatter': lambda v: v.upper()}]
+    ITEMS = [{'id': 1, 'name': u'a\xe9'}, {'id': 2}]
+
+    def setUp(self):
+        self.output = StringIO.StringIO()
+
+    def print_items(self, strategy_class, heading="header"):
+        strategy_class(output=self.output).print_items(heading, self.COLUMNS, iter(self.ITEMS))
+        return self.output.getvalue()
+
+    def test_json_lines(self):
+        lines = self.print_items(JsonLinesStrategy).splitlines()
+        self.assertEqual([{'id': 1, 'name': u'A\xc9'}, {'id': 2}], [json.loads(l) for l in lines])
+
+    def test_json(self):
+        self.assertEqual([{'id': 1, 'name': u'A\xc9'}, {'id': 2}], json.loads(self.print_items(JsonStrategy)))
+
+    def test_json_single_item(self):
+        JsonStrategy(output=self.output).print_item("header", self.COLUMNS, self.ITEMS[1])
+        self.assertEqual({'id': 2}, json.loads(self.output.getvalue()))
+
+    def test_json_empty(self):
+        self.ITEMS = []
+        self.assertEqual([], json.loads(self.print_items(JsonStrategy)))
+
+    def test_csv(self):
+        self.assertEqual([u'Id,Name', u'1,A\xc9', u'2,'], self.print_items(CsvStrategy).splitlines())
+
+    def test_csv_without_heading(self):
+        self.assertEqual([u'1,A\xc9', u'2,'], self.print_items(CsvStrategy, None).splitlines())
+
+
+class VerboseLayoutTest(TestCase):
+
+    def test_each_item_is_written_at_once(self):
+        output = Mock()
+        strategy = VerboseStrategy(output=output)
+        strategy._max_label_width = Mock(return_value=4)
+        columns = [{'attr_name': 'id', 'name': 'Id'}, {'attr_name': 'name', 'name': 'Name'}]
+        strategy.print_items(None, columns, PrintStrategyTest.PRINTABLE_ITEMS)
+        self.assertEqual(2, output.write.call_count)
+        self.assertEqual(1, strategy._max_label_width.call_count)
+        self.assertEqual(u"\nId   : A1\nName : name_a\n\n", output.write.call_args_list[0][0][0])
+
+
+class MachineReadableColumnsTest(TestCase):
+
+    ITEM = {'id': 'A1', 'name': 'name_a', 'nvra': 'a-1.noarch'}
+
+    def print_with(self, strategy_class):
+        output = StringIO.StringIO()
+        p = Printer(strategy_class(output=output))
+        p.add_column('id', 'Id')
+        p.add_column('name', 'Name', show_with=VerboseStrategy)
+        p.add_column('nvra', 'NVRA', show_with=GrepStrategy)
+        p.print_items([self.ITEM])
+        return output.getvalue()
+
+    def test_json_shows_verbose_columns(self):
+        self.assertEqual([{'id': 'A1', 'name': 'name_a'}], json.loads(self.print_with(JsonStrategy)))
+
+    def test_json_lines_shows_verbose_columns(self):
+        self.assertEqual({'id': 'A1', 'name': 'name_a'}, json.loads(self.print_with(JsonLinesStrategy)))
+
+    def test_csv_shows_verbose_columns(self):
+        self.assertEqual(['Id,Name', 'A1,name_a'], self.print_with(CsvStrategy).splitlines())
@@ -1,13 +1,14 @@
 from unittest import TestCase
-from mock import Mock
+from mock import Mock, patch
 
 from katello.client.lib.ui import printer
 from katello.client.lib.ui.printer import Printer, VerboseStrategy, GrepStrategy
-from katello.client.lib.ui.printer import indent_text, text_to_line, center_text, print_line, batch_add_columns, get_term_width
+from katello.client.lib.ui.printer import indent_text, text_to_line, center_text, print_line, batch_add_columns, get_term_width, unicode_len
 from katello.tests.test_utils import ColoredAssertionError, EasyMock
 
 import os
 import StringIO
+import unicodedata
 
 
 
@@ -187,3 +188,29 @@ class BatchAddColumnsTest(PrinterTestCase):
         self.printer.add_column.assert_any_call("col_b", "Column B")
 
 
+
+
+class UnicodeLenTest(PrinterTestCase):
+
+    def test_ascii(self):
+        self.assertEqual(5, unicode_len("hello"))
+
+    def test_non_string(self):
+        self.assertEqual(4, unicode_len(None))
+
+    def test_wide_characters(self):
+        self.assertEqual(6, unicode_len(u'a\u4e2d\u6587\xe9'))
+
+    def test_width_is_measured_only_once(self):
+        printer._unicode_widths.clear()
+        width = Mock(side_effect=unicodedata.east_asian_width)
+        with patch.object(printer.unicodedata, 'east_asian_width', width):
+            unicode_len(u'a\u4e2d\u6587\xe9')
+            unicode_len(u'a\u4e2d\u6587\xe9')
+        self.assertEqual(4, width.call_count)
+
+    def test_cache_is_bounded(self):
+        size = printer.UNICODE_WIDTHS_CACHE_SIZE
+        for i in range(size + 1):
+            unicode_len(u'\u4e2d%d' % i)
+        self.assertTrue(len(printer._unicode_widths) <= size)
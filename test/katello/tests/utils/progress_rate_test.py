@@ -0,0 +1,38 @@
+import unittest
+
+from katello.client.lib.ui.progress import ProgressRate, format_eta
+
+
+class ProgressRateTest(unittest.TestCase):
+
+    def setUp(self):
+        self.rate = ProgressRate(window=10, smoothing=0.5)
+
+    def test_needs_two_samples(self):
+        self.rate.add_sample(0, 0, timestamp=0)
+        self.assertEqual(None, self.rate.size_rate())
+        self.assertEqual(None, self.rate.eta(100, 10))
+
+    def test_computes_rates_within_window(self):
+        self.rate.add_sample(0, 0, timestamp=0)
+        self.rate.add_sample(1000, 1, timestamp=10)
+        self.rate.add_sample(3000, 3, timestamp=20)
+        self.assertEqual(200, self.rate.size_rate())
+        self.assertEqual(0.2, self.rate.items_rate())
+
+    def test_smooths_eta(self):
+        self.rate.add_sample(0, 0, timestamp=0)
+        self.rate.add_sample(100, 1, timestamp=1)
+        self.assertEqual(10, self.rate.eta(1000, 10))
+        self.rate.add_sample(100, 1, timestamp=2)
+        self.rate.add_sample(300, 2, timestamp=3)
+        # raw estimate 700 / 100 = 7, previous 10 - 2 seconds elapsed = 8
+        self.assertEqual(7.5, self.rate.eta(700, 8))
+
+    def test_uses_items_when_nothing_is_transferred(self):
+        self.rate.add_sample(0, 0, timestamp=0)
+        self.rate.add_sample(0, 5, timestamp=5)
+        self.assertEqual(20, self.rate.eta(0, 20))
+
+    def test_formats_eta(self):
+        self.assertEqual("1:01:05", format_eta(3665))
@@ -0,0 +1,67 @@
+import hashlib
+import unittest
+from mock import patch
+
+from katello.client import server
+from katello.client.server import BasicAuthentication, KerberosAuthentication, GSSError
+
+
+class BasicAuthenticationKeyTest(unittest.TestCase):
+
+    def test_key_differs_by_password(self):
+        self.assertNotEqual(BasicAuthentication('admin', 'admin').connection_key(),
+                            BasicAuthentication('admin', 'wrong').connection_key())
+
+    def test_key_is_stable_for_same_credentials(self):
+        self.assertEqual(BasicAuthentication('admin', 'admin').connection_key(),
+                         BasicAuthentication('admin', 'admin').connection_key())
+
+    def test_key_does_not_contain_password(self):
+        self.assertFalse('secret' in BasicAuthentication('admin', 'secret').connection_key())
+
+    def test_key_is_not_a_plain_password_hash(self):
+        key = BasicAuthentication('admin', 'admin', 'user secret').connection_key()
+        self.assertFalse(hashlib.sha256('admin:admin').hexdigest() in key)
+
+    def test_key_differs_by_secret(self):
+        self.assertNotEqual(BasicAuthentication('admin', 'admin', 'one').connection_key(),
+                            BasicAuthentication('admin', 'admin', 'other').connection_key())
+        self.assertEqual(BasicAuthentication('admin', 'admin', 'one').connection_key(),
+                         BasicAuthentication('admin', 'admin', 'one').connection_key())
+
+
+class KerberosAuthenticationKeyTest(unittest.TestCase):
+
+    def setUp(self):
+        self.patches = [
+            patch.object(server.kerberos, 'authGSSClientInit', create=True, return_value=(1, 'ctx')),
+            patch.object(server.kerberos, 'authGSSClientStep', create=True),
+            patch.object(server.kerberos, 'authGSSClientUserName', create=True),
+        ]
+        for p in ['GSS_C_DELEG_FLAG', 'GSS_C_MUTUAL_FLAG', 'GSS_C_SEQUENCE_FLAG']:
+            self.patches.append(patch.object(server.kerberos, p, 1, create=True))
+        mocks = [p.start() for p in self.patches]
+        self.user_name = mocks[2]
+
+    def tearDown(self):
+        for p in self.patches:
+            p.stop()
+
+    def test_key_differs_by_principal(self):
+        self.user_name.return_value = 'alice@EXAMPLE.COM'
+        alice = KerberosAuthentication('katello.example.com').connection_key()
+        self.user_name.return_value = 'bob@EXAMPLE.COM'
+        bob = KerberosAuthentication('katello.example.com').connection_key()
+        self.assertNotEqual(alice, bob)
+        self.assertTrue('alice@EXAMPLE.COM' in alice)
+
+    def test_principal_is_resolved_once(self):
+        self.user_name.return_value = 'alice@EXAMPLE.COM'
+        auth = KerberosAuthentication('katello.example.com')
+        self.assertEqual(auth.connection_key(), auth.connection_key())
+        self.assertEqual(1, self.user_name.call_count)
+
+    def test_unknown_principal_shares_no_session(self):
+        self.user_name.side_effect = GSSError()
+        self.assertNotEqual(KerberosAuthentication('katello.example.com').connection_key(),
+                            KerberosAuthentication('katello.example.com').connection_key())
@@ -0,0 +1,84 @@
+import os
+import tempfile
+import unittest
+from mock import Mock, patch
+
+from katello.client import server
+from katello.client.server import ResumableHTTPSConnection, SSLAuthentication
+
+
+class SSLContextCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        self.files = []
+        for dummy in range(3):
+            fd, path = tempfile.mkstemp()
+            os.close(fd)
+            self.files.append(path)
+        self.patch = patch.object(server.SSL.Context, 'load_cert')
+        self.load_cert = self.patch.start()
+
+    def tearDown(self):
+        self.patch.stop()
+        for path in self.files:
+            os.remove(path)
+
+    def test_context_is_built_once_per_certificate(self):
+        cert, key, other_cert = self.files
+        first = SSLAuthentication(cert, key)._get_ssl_context()
+        second = SSLAuthentication(cert, key)._get_ssl_context()
+        self.assertTrue(first is second)
+        self.load_cert.assert_called_once_with(cert, key)
+
+    def test_other_certificate_gets_own_context(self):
+        cert, key, other_cert = self.files
+        first = SSLAuthentication(cert, key)._get_ssl_context()
+        other = SSLAuthentication(other_cert, key)._get_ssl_context()
+        self.assertFalse(first is other)
+
+    def test_connections_use_the_cached_context(self):
+        cert, key, other_cert = self.files
+        auth = SSLAuthentication(cert, key)
+        connection = auth.connect('example.com', 443, 'https')
+        self.assertTrue(isinstance(connection, ResumableHTTPSConnection))
+        self.assertTrue(connection.ssl_ctx is auth._get_ssl_context())
+
+
+class ResumableHTTPSConnectionTest(unittest.TestCase):
+
+    def setUp(self):
+        self.sessions = []
+        self.patch = patch.object(server.httpslib.HTTPSConnection, 'connect', self.fake_connect)
+        self.patch.start()
+        self.context = server.SSL.Context()
+
+    def tearDown(self):
+        self.patch.stop()
+        ResumableHTTPSConnection._sessions.clear()
+
+    def fake_connect(self, connection):
+        # a new session is negotiated when none is offered
+        session = connection.session or Mock()
+        self.sessions.append((connection.session, session))
+        connection.sock = Mock()
+        connection.sock.get_session.return_value = session
+
+    def connect(self, host='example.com', context=None):
+        connection = ResumableHTTPSConnection(host, 443, ssl_context=context or self.context)
+        connection.connect()
+        return connection
+
+    def test_first_connection_makes_full_handshake(self):
+        self.connect()
+        self.assertEqual(None, self.sessions[0][0])
+
+    def test_next_connection_resumes_the_session(self):
+        self.connect()
+        self.connect()
+        self.assertTrue(self.sessions[1][0] is self.sessions[0][1])
+
+    def test_sessions_are_kept_per_server_and_context(self):
+        self.connect()
+        self.connect(host='other.example.com')
+        self.connect(context=server.SSL.Context())
+        self.assertEqual([None, None], [offered for offered, negotiated in self.sessions[1:]])
@@ -0,0 +1,75 @@
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+
+from katello.client.lib.async import AsyncTask, SystemGroupAsyncJob
+from katello.client.lib.task_journal import TaskJournal
+
+
+class TaskJournalTest(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.dir, 'tasks')
+        self.journal = TaskJournal(self.path, 'repo synchronize --name repo')
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def test_records_tasks_with_their_command(self):
+        self.journal.record(AsyncTask([{'uuid': 'a', 'state': 'waiting'}]))
+        entry = self.journal.entries()[0]
+        self.assertEqual(('a', 'task', 'waiting', 'repo synchronize --name repo'),
+            (entry['id'], entry['type'], entry['state'], entry['target']))
+
+    def test_records_system_group_jobs(self):
+        self.journal.record(SystemGroupAsyncJob('ACME', 3, {'id': 7, 'state': 'running'}))
+        entry = self.journal.entries()[0]
+        self.assertEqual(('7', 'job', 'ACME', 3), (entry['id'], entry['type'], entry['org'], entry['system_group_id']))
+
+    def test_updates_last_known_state(self):
+        task = AsyncTask([{'uuid': 'a', 'state': 'running'}])
+        self.journal.record(task)
+        task.get_hashes()[0]['state'] = 'finished'
+        self.journal.update(task)
+        self.assertEqual('finished', self.journal.entries()[0]['state'])
+        self.assertEqual([], self.journal.running_entries())
+
+    def test_update_ignores_unknown_tasks(self):
+        self.journal.update(AsyncTask([{'uuid': 'a', 'state': 'running'}]))
+        self.assertEqual([], self.journal.entries())
+
+    def test_is_shared_by_journals_with_the_same_file(self):
+        self.journal.record(AsyncTask([{'uuid': 'a', 'state': 'running'}]))
+        other = TaskJournal(self.path, 'task wait')
+        other.record(AsyncTask([{'uuid': 'b', 'state': 'running'}]))
+        self.assertEqual(['a', 'b'], sorted([e['id'] for e in self.journal.entries()]))
+        self.assertEqual(0600, os.stat(self.path).st_mode & 0777)
+
+    def test_keeps_only_newest_entries(self):
+        self.journal.max_entries = 2
+        for uuid in ['a', 'b', 'c']:
+            self.journal.record(AsyncTask([{'uuid': uuid, 'state': 'running'}]))
+        self.assertEqual(2, len(self.journal.entries()))
+
+    def test_damaged_journal_is_kept_aside(self):
+        open(self.path, 'w').write('[{"id": "a", ')
+        self.journal.record(AsyncTask([{'uuid': 'b', 'state': 'running'}]))
+        self.assertEqual(['b'], [e['id'] for e in self.journal.entries()])
+        self.assertEqual('[{"id": "a", ', open(self.path + '.corrupt').read())
+
+    def test_parallel_writers_keep_all_entries(self):
+        def write(prefix):
+            journal = TaskJournal(self.path)
+            for i in range(20):
+                journal.record(AsyncTask([{'uuid': '%s%d' % (prefix, i), 'state': 'running'}]))
+        writers = [threading.Thread(target=write, args=(prefix,)) for prefix in 'abc']
+        for writer in writers:
+            writer.start()
+        for writer in writers:
+            writer.join()
+        self.assertEqual(60, len(self.journal.entries()))
+        self.assertFalse(os.path.exists(self.path + '.corrupt'))
+        self.assertEqual(['tasks', 'tasks.lock'], sorted(os.listdir(self.dir)))
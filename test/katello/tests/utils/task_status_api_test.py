@@ -0,0 +1,89 @@
+import os
+import shutil
+import tempfile
+import time
+import unittest
+from mock import Mock, patch
+
+from katello.client.api.base import KatelloAPI
+from katello.client.api.task_status import TaskStatusAPI
+from katello.client.server import ServerRequestError
+
+
+class TaskStatusesTest(unittest.TestCase):
+
+    UUIDS = ['a', 'b']
+
+    def setUp(self):
+        self.server = Mock()
+        self.server.protocol, self.server.host, self.server.port = 'https', 'example.com', 443
+        self.patcher = patch.object(KatelloAPI, 'server', self.server)
+        self.patcher.start()
+        self.dir = tempfile.mkdtemp()
+        TaskStatusAPI.unsupported_servers_path = os.path.join(self.dir, 'batch_task_status')
+        TaskStatusAPI.batch_supported = True
+        self.api = TaskStatusAPI()
+
+    def tearDown(self):
+        TaskStatusAPI.batch_supported = True
+        TaskStatusAPI.unsupported_servers_path = None
+        shutil.rmtree(self.dir)
+        self.patcher.stop()
+
+    def respond(self, tasks):
+        self.server.GET.return_value = (200, tasks)
+
+    def refuse(self, status):
+        self.server.GET.side_effect = ServerRequestError(status, {}, None)
+
+    def in_new_process(self):
+        # a later invocation starts with the flag set and reads the same file
+        TaskStatusAPI.batch_supported = True
+        self.server.GET.reset_mock()
+
+    def test_fetches_statuses_in_one_request(self):
+        self.respond([{'uuid': 'a', 'state': 'running'}, {'uuid': 'b', 'state': 'finished'}])
+        self.assertEqual(['a', 'b'], sorted(self.api.statuses(self.UUIDS).keys()))
+        self.assertEqual(1, self.server.GET.call_count)
+
+    def test_refusal_is_remembered_by_later_invocations(self):
+        self.refuse(404)
+        self.assertEqual(None, self.api.statuses(self.UUIDS))
+        self.in_new_process()
+        self.assertEqual(None, self.api.statuses(self.UUIDS))
+        self.assertFalse(self.server.GET.called)
+
+    def test_ignored_filter_means_unsupported(self):
+        self.respond([{'uuid': 'a', 'state': 'running'}, {'uuid': 'x', 'state': 'running'}])
+        self.assertEqual(None, self.api.statuses(self.UUIDS))
+        self.assertFalse(self.api.is_batch_supported())
+
+    def test_missing_task_does_not_disable_batch_requests(self):
+        self.respond([{'uuid': 'a', 'state': 'running'}])
+        self.assertEqual(None, self.api.statuses(self.UUIDS))
+        self.assertTrue(self.api.is_batch_supported())
+
+    def test_server_failure_does_not_disable_batch_requests(self):
+        self.refuse(500)
+        self.assertEqual(None, self.api.statuses(self.UUIDS))
+        self.in_new_process()
+        self.assertTrue(self.api.is_batch_supported())
+
+    def test_disabled_batch_requests_are_not_sent(self):
+        TaskStatusAPI.batch_supported = False
+        self.assertEqual(None, self.api.statuses(self.UUIDS))
+        self.assertFalse(self.server.GET.called)
+
+    def test_refusal_is_remembered_per_server(self):
+        self.refuse(404)
+        self.api.statuses(self.UUIDS)
+        self.in_new_process()
+        self.server.host = 'other.example.com'
+        self.assertTrue(self.api.is_batch_supported())
+
+    def test_refusal_is_forgotten_after_a_while(self):
+        self.refuse(404)
+        self.api.statuses(self.UUIDS)
+        self.in_new_process()
+        with patch('time.time', Mock(return_value=time.time() + TaskStatusAPI.UNSUPPORTED_FOR + 1)):
+            self.assertTrue(self.api.is_batch_supported())
@@ -1,7 +1,11 @@
+import os
+import shutil
+import stat
+import tempfile
 import unittest
 
-from katello.client.lib.utils.io import convert_to_mime_type, attachment_file_name
-from katello.client.lib.utils.data import slice_dict
+from katello.client.lib.utils.io import convert_to_mime_type, attachment_file_name, read_private_secret
+from katello.client.lib.utils.data import slice_dict, has_fields
 
 class ConvertToMimeTest(unittest.TestCase):
 
@@ -32,6 +36,10 @@ class AttachmentFilenameTest(unittest.TestCase):
             ('cache-control', 'private'),
             ('content-disposition', 'attachment; filename="' + self.FILENAME + '"')], self.DEFAULT_FILENAME))
 
+    def test_handles_unquoted_filename(self):
+        self.assertEqual(self.FILENAME, attachment_file_name([
+            ('content-disposition', 'attachment; filename=' + self.FILENAME)], self.DEFAULT_FILENAME))
+
     def test_handles_capitalized_header_name(self):
         self.assertEqual(self.FILENAME, attachment_file_name([
             ('content-type', 'application/pdf'),
@@ -95,3 +103,38 @@ class SliceDictTest(unittest.TestCase):
             {"A": "a"}
         )
 
+
+
+class HasFieldsTest(unittest.TestCase):
+
+    RECORD = {"id": 1, "name": "a"}
+
+    def test_record_with_all_fields(self):
+        self.assertTrue(has_fields(self.RECORD, ("id", "name")))
+
+    def test_record_missing_a_field(self):
+        self.assertFalse(has_fields(self.RECORD, ("id", "label")))
+
+    def test_no_fields_requested(self):
+        self.assertFalse(has_fields(self.RECORD, None))
+
+
+class ReadPrivateSecretTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'katello', 'secret')
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_creates_secret_readable_by_owner_only(self):
+        secret, created = read_private_secret(self.path)
+        self.assertTrue(created)
+        self.assertEqual(64, len(secret))
+        self.assertEqual(0600, stat.S_IMODE(os.stat(self.path).st_mode))
+
+    def test_reads_existing_secret(self):
+        secret = read_private_secret(self.path)[0]
+        self.assertEqual((secret, False), read_private_secret(self.path))
+        self.assertEqual(['secret'], os.listdir(os.path.dirname(self.path)))